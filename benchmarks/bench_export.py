@@ -0,0 +1,44 @@
+"""Throughput of the CSV, JSON, NDJSON and PDF exporters."""
+import json
+import os
+import tempfile
+
+from common import rate, sizes, timed, use_tree
+
+use_tree("app")
+
+from ljudladan.export import data_to_csv, data_to_json, write_export  # noqa: E402
+from ljudladan.report import cairo_module  # noqa: E402
+
+SIZES = (1000, 10_000, 100_000)
+PDF_LIMIT = 10_000
+
+
+def _items(n):
+    return [{"date": f"2026-01-01 00:{i % 60:02d}", "level": ("Loud", "Normal", "Whisper")[i % 3],
+             "emoji": "🔊"} for i in range(n)]
+
+
+def run():
+    from ljudladan.export import export_data_pdf
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes(SIZES):
+            items = _items(n)
+            entry = results[str(n)] = {}
+            for name, fn in (("data_to_csv", lambda: data_to_csv(items)),
+                             ("data_to_json", lambda: data_to_json(items))):
+                s = timed(fn)
+                entry[f"{name}_s"], entry[f"{name}_per_second"] = round(s, 4), rate(n, s)
+            for ext in ("csv", "json", "ndjson"):
+                path = os.path.join(tmp, f"out.{ext}")
+                s = timed(lambda: write_export(ext, iter(items), path))
+                entry[f"write_{ext}_s"], entry[f"write_{ext}_per_second"] = round(s, 4), rate(n, s)
+            if cairo_module() is not None and n <= PDF_LIMIT:
+                s = timed(lambda: export_data_pdf(items, "Benchmark", os.path.join(tmp, "out.pdf")), 1)
+                entry["export_data_pdf_s"], entry["export_data_pdf_per_second"] = round(s, 4), rate(n, s)
+    return results
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,101 @@
+"""Gapless loops: analysis time, 8-hour playback cost, flat memory and seams."""
+import json
+import time
+import tracemalloc
+
+import numpy as np
+
+from common import QUICK, timed, use_tree
+
+use_tree("src")
+
+from ljudladan.loop import LoopSource, plan_loop  # noqa: E402
+from ljudladan.mixer import Mixer  # noqa: E402
+from ljudladan.render import render_soundscape  # noqa: E402
+from ljudladan.sinks import NullSink  # noqa: E402
+from ljudladan.synth import SAMPLE_RATE, render  # noqa: E402
+
+SOUNDS = ("White noise", "Ocean waves", "Rain")
+CLIP_SECONDS = 30
+HOURS = 1 if QUICK else 8
+TONE = 220.37
+
+
+def _mixer(clips, plans, seed=0):
+    mixer = Mixer()
+    for i, sound in enumerate(SOUNDS):
+        mixer.add(LoopSource(clips[sound], plans[sound], variations=True, jitter_db=1.0,
+                             seed=seed + i), gain=0.3)
+    return mixer
+
+
+def _play(mixer, seconds):
+    for _i in range(int(seconds * mixer.sr / mixer.block)):
+        mixer.mix()
+
+
+def _peak_mib(clips, plans, seconds):
+    mixer = _mixer(clips, plans)
+    tracemalloc.start()
+    _play(mixer, seconds)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return round(peak / 2 ** 20, 3)
+
+
+def _seam_jump(clip, plan):
+    """Largest sample step across the seam, relative to the largest inside the clip."""
+    inner = float(np.abs(np.diff(clip)).max())
+    end = plan.bounds[-1][1]
+    naive = abs(float(clip[0]) - float(clip[-1])) / inner
+    out = np.zeros(end + 1024, dtype=np.float32)
+    LoopSource(clip, plan).read_into(out)
+    looped = float(np.abs(np.diff(out[end - 1024:])).max()) / inner
+    return round(naive, 3), round(looped, 3)
+
+
+def _rms(x):
+    return float(np.sqrt(np.mean(np.square(x, dtype=np.float64))))
+
+
+def _seam_level_db(clip, plan):
+    """Level over the crossfade minus the level of the clip, in dB."""
+    end, fade = plan.bounds[-1][1], plan.fade
+    out = np.zeros(end + fade, dtype=np.float32)
+    LoopSource(clip, plan).read_into(out)
+    return round(20 * np.log10(_rms(out[end:]) / _rms(clip)), 2)
+
+
+def run():
+    clips = {s: render(s, CLIP_SECONDS) for s in SOUNDS}
+    results, plans = {}, {}
+    for sound in SOUNDS:
+        plan_s = timed(lambda: plan_loop(clips[sound], SAMPLE_RATE), 3)
+        plans[sound] = plan_loop(clips[sound], SAMPLE_RATE)
+        single = plan_loop(clips[sound], SAMPLE_RATE, segment=None)
+        results[sound] = {"plan_ms": round(plan_s * 1000, 2), "segments": len(plans[sound].bounds),
+                          "seam_level_db": _seam_level_db(clips[sound], single)}
+    # A steady tone shows a click at a plain wrap-around most clearly.
+    tone = (0.5 * np.sin(2 * np.pi * TONE * np.arange(CLIP_SECONDS * SAMPLE_RATE) / SAMPLE_RATE)
+            ).astype(np.float32)
+    naive, looped = _seam_jump(tone, plan_loop(tone, SAMPLE_RATE, segment=None))
+    results["tone"] = {"naive_seam_jump": naive, "loop_seam_jump": looped}
+    seconds = HOURS * 3600
+    t = time.perf_counter()
+    _play(_mixer(clips, plans), seconds)
+    elapsed = time.perf_counter() - t
+    blocks = int(seconds * SAMPLE_RATE / Mixer().block)
+    results["playback"] = {"audio_hours": HOURS, "elapsed": round(elapsed, 2),
+                           "realtime_factor": round(seconds / elapsed, 1),
+                           "block_us": round(elapsed * 1e6 / blocks, 2)}
+    # Re-synthesizing the same layers live, for comparison.
+    t = time.perf_counter()
+    render_soundscape([(s, 0.3) for s in SOUNDS], 60, NullSink())
+    results["playback"]["synth_realtime_factor"] = round(60 / (time.perf_counter() - t), 1)
+    # Peak memory must stay flat when playback runs longer.
+    results["peak_mib"] = {str(s): _peak_mib(clips, plans, s) for s in (60, 600)}
+    return results
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
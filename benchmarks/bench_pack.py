@@ -0,0 +1,63 @@
+"""Sound packs: opening, name lookup and sample access versus one file per sound."""
+import json
+import os
+import tempfile
+import wave
+
+import numpy as np
+
+from common import sizes, timed, use_tree
+
+use_tree("src")
+
+SIZES = (10, 100, 1000)
+SECONDS = 5
+RATE = 44100
+
+
+def _write_wav(path, data):
+    with wave.open(path, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(RATE)
+        w.writeframes((data * 32767).astype("<i2").tobytes())
+
+
+def _bench(n, tmp):
+    from ljudladan.pack import AssetPack, build
+    rng = np.random.default_rng(0)
+    sounds = []
+    for i in range(n):
+        data = (rng.standard_normal(RATE * SECONDS) * 0.1).astype(np.float32)
+        path = os.path.join(tmp, f"sound{i}.wav")
+        _write_wav(path, data)
+        np.save(os.path.join(tmp, f"sound{i}.npy"), data)
+        sounds.append((f"Sound {i}", f"Category {i % 8}", path))
+    out = os.path.join(tmp, "sounds.pack")
+    build_s = timed(lambda: build(sounds, out), 1)
+    open_s = timed(lambda: AssetPack(out).close(), 5)
+    names = [s[0] for s in sounds]
+    with AssetPack(out) as pack:
+        lookup_s = timed(lambda: [pack.assets[name] for name in names], 5)
+        view_s = timed(lambda: [pack.mono(name) for name in names], 5)
+        mix_s = timed(lambda: [pack.mono(name)[:RATE].sum() for name in names], 3)
+    npy = [os.path.join(tmp, f"sound{i}.npy") for i in range(n)]
+    load_s = timed(lambda: [np.load(p) for p in npy], 3)
+    npy_mix_s = timed(lambda: [np.load(p)[:RATE].sum() for p in npy], 3)
+    return {"build_s": round(build_s, 3), "open_ms": round(open_s * 1000, 3),
+            "lookup_us": round(lookup_s * 1e6 / n, 3), "view_us": round(view_s * 1e6 / n, 3),
+            "npy_load_us": round(load_s * 1e6 / n, 3),
+            "first_second_us": round(mix_s * 1e6 / n, 3),
+            "npy_first_second_us": round(npy_mix_s * 1e6 / n, 3)}
+
+
+def run():
+    results = {}
+    for n in sizes(SIZES, 100):
+        with tempfile.TemporaryDirectory() as tmp:
+            results[str(n)] = _bench(n, tmp)
+    return results
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,57 @@
+"""History persistence: journal and SQLite writes and reads by size."""
+import json
+import os
+import tempfile
+
+from common import rate, sizes, timed, use_tree
+
+use_tree("src")
+
+from ljudladan.journal import Journal  # noqa: E402
+from ljudladan.store import HistoryStore  # noqa: E402
+
+FIELDS = ("date", "sound", "category", "volume", "comfort")
+SIZES = (100, 1000, 10_000, 100_000, 1_000_000)
+
+
+def _records(n):
+    return [{"date": f"2026-01-01T00:{i % 60:02d}:00", "sound": "Rain", "category": "Nature",
+             "volume": i % 100, "comfort": ("good", "okay", None)[i % 3]} for i in range(n)]
+
+
+def _bench_size(n, tmp):
+    records = _records(n)
+    path = os.path.join(tmp, f"h{n}.jsonl")
+    journal = Journal(path, FIELDS)
+    extend = timed(lambda: journal.extend(records), 1)
+    journal.sync()
+    load = timed(journal.load, 1)
+    appends = min(n, 1000)
+    append = timed(lambda: [journal.append(r) for r in records[:appends]], 1)
+    journal.close()
+    legacy = os.path.join(tmp, f"legacy{n}.json")
+
+    def rewrite():
+        with open(legacy, "w", encoding="utf-8") as f:
+            json.dump(records, f, ensure_ascii=False, indent=2)
+    result = {"journal_extend_s": round(extend, 4), "journal_extend_per_second": rate(n, extend),
+              "journal_load_s": round(load, 4), "journal_load_per_second": rate(n, load),
+              "journal_append_us": round(append / appends * 1e6, 1),
+              "legacy_rewrite_s": round(timed(rewrite, 1), 4),
+              "journal_bytes": os.path.getsize(path)}
+    if n <= 100_000:
+        store = HistoryStore(os.path.join(tmp, f"h{n}.db"), FIELDS, indexed=FIELDS)
+        insert = timed(lambda: store.extend(records), 1)
+        select = timed(lambda: sum(1 for _r in store.select(comfort="good")), 1)
+        store.close()
+        result.update(sqlite_extend_s=round(insert, 4), sqlite_select_s=round(select, 4))
+    return result
+
+
+def run():
+    with tempfile.TemporaryDirectory() as tmp:
+        return {str(n): _bench_size(n, tmp) for n in sizes(SIZES)}
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
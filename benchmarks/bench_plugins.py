@@ -0,0 +1,62 @@
+"""Plugin startup: importing every plugin versus reading the manifest index."""
+import importlib.util
+import json
+import os
+import tempfile
+
+from common import sizes, timed, use_tree
+
+use_tree("src")
+
+SIZES = (10, 100, 500)
+# Stands in for the work a typical plugin does at import time.
+PLUGIN = '''import json, xml.dom.minidom
+PLUGIN = {"name": "Plugin %d", "version": "1.0", "hooks": ["on_sound_played"]}
+TABLE = {str(i): i * i for i in range(2000)}
+
+def on_sound_played(sound, category):
+    return len(sound)
+'''
+
+
+def _eager(plugin_dir):
+    modules = []
+    for fname in sorted(os.listdir(plugin_dir)):
+        if fname.endswith(".py"):
+            spec = importlib.util.spec_from_file_location(fname[:-3], os.path.join(plugin_dir, fname))
+            mod = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(mod)
+            modules.append(mod)
+    return modules
+
+
+def _bench(n, tmp):
+    from ljudladan.plugins import PluginManager
+    plugin_dir = os.path.join(tmp, "plugins")
+    os.makedirs(plugin_dir)
+    for i in range(n):
+        with open(os.path.join(plugin_dir, f"plugin{i}.py"), "w") as f:
+            f.write(PLUGIN % i)
+    index = os.path.join(tmp, "plugins.json")
+    cold_s = timed(lambda: PluginManager(plugin_dir).scan(), 1)
+    PluginManager(plugin_dir, index).scan()
+    warm_s = timed(lambda: PluginManager(plugin_dir, index).scan(), 3)
+    manager = PluginManager(plugin_dir, index)
+    manager.scan()
+    first_s = timed(lambda: manager.call("on_sound_played", "Rain", "nature"), 1)
+    call_s = timed(lambda: manager.call("on_sound_played", "Rain", "nature"), 5)
+    return {"eager_import_ms": round(timed(lambda: _eager(plugin_dir), 1) * 1000, 2),
+            "index_cold_ms": round(cold_s * 1000, 2), "index_warm_ms": round(warm_s * 1000, 2),
+            "first_call_ms": round(first_s * 1000, 2), "dispatch_us": round(call_s * 1e6 / n, 3)}
+
+
+def run():
+    results = {}
+    for n in sizes(SIZES):
+        with tempfile.TemporaryDirectory() as tmp:
+            results[str(n)] = _bench(n, tmp)
+    return results
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,53 @@
+"""ProfileManager operations with many profiles on disk."""
+import json
+import os
+import tempfile
+
+from common import rate, sizes, timed, use_tree
+
+use_tree("src")
+
+SIZES = (10, 100, 1000)
+
+
+def _bench(n, home):
+    from ljudladan.profiles import ProfileManager
+    os.environ["HOME"] = home
+    manager = ProfileManager("ljudladan-bench")
+    data = {"volume": 30, "favorites": ["Rain", "Ocean waves"], "history": list(range(50))}
+    names = [f"child{i}" for i in range(n)]
+
+    def create():
+        for name in names:
+            manager.switch(name)
+            manager.save_data(data)
+
+    def switch_load():
+        for name in names:
+            manager.switch(name)
+            manager.load_data()
+
+    create_s = timed(create, 1)
+    switch_s = timed(switch_load, 1)
+    list_s = timed(manager.list_profiles, 5)
+    from ljudladan.persistence import PersistenceWorker
+    worker = PersistenceWorker()
+    manager = ProfileManager("ljudladan-bench", persistence=worker)
+    manager.preload().join()
+    fresh_s = timed(switch_load, 1)
+    worker.close()
+    return {"create_s": round(create_s, 4), "create_per_second": rate(n, create_s),
+            "switch_load_s": round(switch_s, 4), "switch_load_per_second": rate(n, switch_s),
+            "preloaded_switch_load_s": round(fresh_s, 4), "list_profiles_ms": round(list_s * 1000, 3)}
+
+
+def run():
+    results = {}
+    for n in sizes(SIZES):
+        with tempfile.TemporaryDirectory() as home:
+            results[str(n)] = _bench(n, home)
+    return results
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
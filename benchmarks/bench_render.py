@@ -0,0 +1,49 @@
+"""Real-time factor and memory of streaming soundscape renders."""
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src"))
+# Set by ``run.py --quick``.
+QUICK = bool(os.environ.get("LJUDLADAN_BENCH_QUICK"))
+
+from ljudladan.render import render_soundscape, render_to_file  # noqa: E402
+from ljudladan.sinks import NullSink  # noqa: E402
+
+LAYERS = [("Rain", 0.6), ("Ocean waves", 0.4), ("Forest", 0.3)]
+
+
+def _timed(fn, seconds):
+    t = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - t
+    return {"audio_seconds": seconds, "elapsed": round(elapsed, 3),
+            "realtime_factor": round(seconds / elapsed, 1)}
+
+
+def _peak_mib(fn):
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return round(peak / 2 ** 20, 2)
+
+
+def run(seconds=None):
+    if seconds is None:
+        seconds = 30 if QUICK else 600
+    results = {"null": _timed(lambda: render_soundscape(LAYERS, seconds, NullSink()), seconds)}
+    with tempfile.TemporaryDirectory() as d:
+        path = os.path.join(d, "calm.wav")
+        results["wav"] = _timed(lambda: render_to_file(LAYERS, seconds, path), seconds)
+    # Peak memory must stay flat when the duration grows.
+    results["peak_mib"] = {str(s): _peak_mib(lambda: render_soundscape(LAYERS, s, NullSink()))
+                           for s in ((10, 40) if QUICK else (30, 120))}
+    return results
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(float(sys.argv[1]) if len(sys.argv) > 1 else None), indent=2))
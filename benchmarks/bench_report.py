@@ -0,0 +1,47 @@
+"""Pages per second of the paginated PDF report engine."""
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ljudladan.report import cairo_module  # noqa: E402
+
+LEVELS = ("Silent", "Whisper", "Normal", "Loud", "Very loud", "Overwhelming")
+
+
+def _rows(n):
+    return [{"date": f"2026-{i % 12 + 1:02d}-{i % 28 + 1:02d} {i % 24:02d}:00",
+             "level": LEVELS[i % len(LEVELS)], "emoji": "🔊",
+             "note": "waited at the bus stop next to the road works " * (i % 4)}
+            for i in range(n)]
+
+
+def run(rows=(1000, 5000)):
+    if cairo_module() is None:
+        return {"skipped": "cairo is not installed"}
+    from ljudladan.export import export_data_pdf
+    from ljudladan.report import Report, columns_for
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in rows:
+            items = _rows(n)
+            path = os.path.join(tmp, f"report_{n}.pdf")
+            t = time.perf_counter()
+            pages = Report("Benchmark", columns_for(items), items).render(path)
+            elapsed = time.perf_counter() - t
+            t = time.perf_counter()
+            export_data_pdf(items, "Benchmark", path)
+            export_elapsed = time.perf_counter() - t
+            results[str(n)] = {"pages": pages, "elapsed": round(elapsed, 3),
+                               "pages_per_second": round(pages / elapsed, 1),
+                               "rows_per_second": round(n / elapsed),
+                               "export_data_pdf_elapsed": round(export_elapsed, 3),
+                               "bytes": os.path.getsize(path)}
+    return results
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
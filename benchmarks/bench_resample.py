@@ -0,0 +1,56 @@
+"""Resampling: filter design, one-shot and streaming throughput, accuracy."""
+import json
+import time
+
+import numpy as np
+
+from common import QUICK, timed, use_tree
+
+use_tree("src")
+
+from ljudladan.resample import QUALITY, Resampler, _bank, filter_bank, resample  # noqa: E402
+
+PAIRS = ((22050, 48000), (44100, 48000), (48000, 44100))
+SECONDS = 2 if QUICK else 10
+BLOCK = 1024
+TONE = 1000.0
+
+
+def _snr_db(y, dst):
+    ref = np.sin(2 * np.pi * TONE * np.arange(len(y)) / dst)
+    mid = slice(len(y) // 4, 3 * len(y) // 4)
+    err = y[mid] - ref[mid]
+    return round(float(10 * np.log10(np.mean(ref[mid] ** 2) / np.mean(err ** 2))), 1)
+
+
+def _stream(x, src, dst, quality):
+    r = Resampler(src, dst, quality)
+    for i in range(0, len(x), BLOCK):
+        r.process(x[i:i + BLOCK])
+    r.flush()
+
+
+def _bench(src, dst, quality):
+    x = np.sin(2 * np.pi * TONE * np.arange(SECONDS * src) / src).astype(np.float32)
+    _bank.cache_clear()
+    t = time.perf_counter()
+    filter_bank(src, dst, quality)
+    design_s = time.perf_counter() - t
+    cached_s = timed(lambda: filter_bank(src, dst, quality), 5)
+    oneshot_s = timed(lambda: resample(x, src, dst, quality), 3)
+    stream_s = timed(lambda: _stream(x, src, dst, quality), 3)
+    interp_s = timed(lambda: np.interp(np.arange(SECONDS * dst) * (src / dst),
+                                       np.arange(len(x)), x), 3)
+    return {"design_ms": round(design_s * 1000, 3), "cached_design_us": round(cached_s * 1e6, 3),
+            "realtime_factor": round(SECONDS / oneshot_s, 1),
+            "stream_realtime_factor": round(SECONDS / stream_s, 1),
+            "linear_interp_realtime_factor": round(SECONDS / interp_s, 1),
+            "snr_db": _snr_db(resample(x, src, dst, quality), dst)}
+
+
+def run():
+    return {f"{src}->{dst}": {q: _bench(src, dst, q) for q in QUALITY} for src, dst in PAIRS}
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
@@ -0,0 +1,103 @@
+"""Cold import time and time to first frame, checked against a budget."""
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TREES = {"app": ROOT, "src": os.path.join(ROOT, "src")}
+RUNS = 5
+# Milliseconds; a median above the limit is reported as a regression.
+THRESHOLDS = {"import_ms": 250, "first_frame_ms": 1200, "cli_import_ms": 50}
+# Modules that must stay out of a cold start.
+LAZY = ("ljudladan.export", "ljudladan.store", "ljudladan.synth", "ljudladan.pack", "numpy", "cairo",
+        "sqlite3")
+# The command line must never touch GTK.
+CLI_LAZY = LAZY + ("gi",)
+
+_IMPORT = """
+import json, sys, time
+t = time.perf_counter()
+import ljudladan.main
+ms = (time.perf_counter() - t) * 1000
+print(json.dumps({"import_ms": ms, "loaded": [m for m in %r if m in sys.modules]}))
+"""
+
+_FIRST_FRAME = """
+import json, sys, time
+t = time.perf_counter()
+import ljudladan.main as m
+app = m.SoundApp() if hasattr(m, "SoundApp") else m.App()
+result = {}
+def on_frame(win):
+    result["first_frame_ms"] = (time.perf_counter() - t) * 1000
+    result["loaded"] = [n for n in %r if n in sys.modules]
+    app.quit()
+def on_window(_app, win):
+    m.after_first_frame(win, on_frame, win)
+app.connect("window-added", on_window)
+app.set_flags(app.get_flags() | m.Gio.ApplicationFlags.NON_UNIQUE)
+app.run([])
+print(json.dumps(result))
+"""
+
+
+_CLI = """
+import json, sys, time
+t = time.perf_counter()
+import ljudladan.cli
+ms = (time.perf_counter() - t) * 1000
+print(json.dumps({"cli_import_ms": ms, "loaded": [m for m in %r if m in sys.modules]}))
+"""
+
+
+def _child(tree, code, home):
+    env = dict(os.environ, PYTHONPATH=TREES[tree], XDG_CONFIG_HOME=os.path.join(home, "config"),
+               XDG_CACHE_HOME=os.path.join(home, "cache"))
+    # Run from ``home`` so the checkout root cannot shadow the tree under test.
+    proc = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True,
+                          text=True, timeout=60, cwd=home)
+    if proc.returncode != 0 or not proc.stdout.strip():
+        raise RuntimeError((proc.stderr.strip().splitlines() or ["no output"])[-1])
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _measure(tree, code, key, runs, home):
+    samples, loaded = [], set()
+    for _i in range(runs):
+        out = _child(tree, code, home)
+        samples.append(out[key])
+        loaded.update(out["loaded"])
+    return {key: round(statistics.median(samples), 1), "eager_imports": sorted(loaded)}
+
+
+def run(runs=RUNS, thresholds=THRESHOLDS):
+    """Measure both trees; the first frame is skipped without a display."""
+    results = {}
+    with tempfile.TemporaryDirectory() as home:
+        for tree in TREES:
+            entry = results[tree] = {"eager_imports": []}
+            checks = [("import_ms", _IMPORT, LAZY), ("first_frame_ms", _FIRST_FRAME, LAZY)]
+            if os.path.exists(os.path.join(TREES[tree], "ljudladan", "cli.py")):
+                checks.append(("cli_import_ms", _CLI, CLI_LAZY))
+            for key, code, lazy in checks:
+                try:
+                    measured = _measure(tree, code % (lazy,), key, runs, home)
+                except (RuntimeError, subprocess.TimeoutExpired) as e:
+                    entry[key] = None
+                    entry.setdefault("skipped", {})[key] = str(e)
+                    continue
+                entry[key] = measured[key]
+                entry["eager_imports"] = sorted(set(entry["eager_imports"]) | set(measured["eager_imports"]))
+            entry["regressions"] = [k for k, limit in thresholds.items()
+                                    if entry.get(k) is not None and entry[k] > limit]
+            entry["regressions"] += [f"eager import: {m}" for m in entry["eager_imports"]]
+    return results
+
+
+if __name__ == "__main__":
+    results = run()
+    print(json.dumps(results, indent=2))
+    sys.exit(1 if any(r["regressions"] for r in results.values()) else 0)
@@ -0,0 +1,71 @@
+"""Widget-tree construction time of the main windows."""
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from common import TREES
+
+REPEAT = 5
+
+# Each child builds its window's widgets REPEAT times without presenting
+# them and prints the best time in milliseconds.
+_CHILDREN = {
+    "src_build_ui_ms": ("src", """
+import time, ljudladan.main as m
+app = m.SoundApp()
+app.register(None)
+win = m.SoundWindow(application=app)
+best = min(_timed(win._build_ui) for _i in range({repeat}))
+"""),
+    "app_build_level_page_ms": ("app", """
+import ljudladan.main as m
+app = m.App()
+app.register(None)
+win = m.MainWindow(app)
+best = min(_timed(win._build_level_page) for _i in range({repeat}))
+"""),
+    "app_main_window_ms": ("app", """
+import ljudladan.main as m
+app = m.App()
+app.register(None)
+best = min(_timed(lambda: m.MainWindow(app)) for _i in range({repeat}))
+"""),
+}
+
+_PRELUDE = """
+import json, time
+def _timed(fn):
+    t = time.perf_counter()
+    fn()
+    return (time.perf_counter() - t) * 1000
+"""
+
+
+def _child(tree, code, home):
+    env = dict(os.environ, PYTHONPATH=TREES[tree], XDG_CONFIG_HOME=home, XDG_CACHE_HOME=home)
+    script = _PRELUDE + code.format(repeat=REPEAT) + "\nprint(json.dumps(round(best, 2)))\n"
+    proc = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True,
+                          text=True, timeout=120)
+    if proc.returncode != 0:
+        raise RuntimeError((proc.stderr.strip().splitlines() or ["failed"])[-1])
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def run():
+    """Needs gi and a display; a case that cannot start is reported skipped."""
+    results, skipped = {}, {}
+    with tempfile.TemporaryDirectory() as home:
+        for name, (tree, code) in _CHILDREN.items():
+            try:
+                results[name] = _child(tree, code, home)
+            except (RuntimeError, subprocess.TimeoutExpired) as e:
+                skipped[name] = str(e)
+    if skipped:
+        results["skipped"] = skipped
+    return results
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
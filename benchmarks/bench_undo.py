@@ -0,0 +1,66 @@
+"""UndoRedoManager push, undo and redo at large history sizes."""
+import inspect
+import json
+
+from common import rate, sizes, timed, use_tree
+
+use_tree("app")
+
+from ljudladan.undo_redo import UndoRedoManager  # noqa: E402
+
+SIZES = (1000, 10_000, 100_000)
+# Measure the stack itself, not the default memory budget.
+UNBOUNDED = ({"max_bytes": 1 << 40}
+             if "max_bytes" in inspect.signature(UndoRedoManager).parameters else {})
+
+
+def _noop():
+    pass
+
+
+def _bench(n):
+    state = {}
+
+    def fill():
+        manager = UndoRedoManager(max_size=n, **UNBOUNDED)
+        for i in range(n):
+            manager.push(_noop, _noop, "step")
+        state["manager"] = manager
+
+    def push_full():
+        manager = state["manager"]
+        for i in range(n):
+            manager.push(_noop, _noop, "step")
+
+    def undo_redo():
+        manager = state["manager"]
+        while manager.undo():
+            pass
+        while manager.redo():
+            pass
+
+    fill_s = timed(fill, 1)
+    full_s = timed(push_full, 1)
+    cycle_s = timed(undo_redo, 1)
+    result = {}
+    if hasattr(UndoRedoManager, "set_value"):
+        def drag():
+            manager = UndoRedoManager(max_size=n)
+            for i in range(n):
+                manager.set_value("volume", i % 100, (i + 1) % 100, "Volume")
+            state["drag_entries"] = len(manager._undo_stack)
+
+        drag_s = timed(drag, 1)
+        result = {"drag_s": round(drag_s, 4), "drag_per_second": rate(n, drag_s),
+                  "drag_entries": state["drag_entries"]}
+    return dict(result, **{"push_s": round(fill_s, 4), "push_per_second": rate(n, fill_s),
+            "push_at_capacity_s": round(full_s, 4), "push_at_capacity_per_second": rate(n, full_s),
+            "undo_redo_s": round(cycle_s, 4), "undo_redo_per_second": rate(2 * n, cycle_s)})
+
+
+def run():
+    return {str(n): _bench(n) for n in sizes(SIZES)}
+
+
+if __name__ == "__main__":
+    print(json.dumps(run(), indent=2))
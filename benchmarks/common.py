@@ -0,0 +1,32 @@
+"""Helpers shared by the benchmark scripts."""
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+TREES = {"app": ROOT, "src": os.path.join(ROOT, "src")}
+# Set by ``run.py --quick``: smaller inputs for a fast smoke run.
+QUICK = bool(os.environ.get("LJUDLADAN_BENCH_QUICK"))
+
+
+def use_tree(name):
+    """Put one of the two ``ljudladan`` trees first on ``sys.path``."""
+    sys.path.insert(0, TREES[name])
+
+
+def sizes(full, quick_limit=10_000):
+    return [n for n in full if n <= quick_limit] if QUICK else list(full)
+
+
+def timed(fn, repeat=3):
+    """Best wall time of ``repeat`` calls, in seconds."""
+    best = float("inf")
+    for _i in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best
+
+
+def rate(n, seconds):
+    return round(n / seconds) if seconds > 0 else None
@@ -0,0 +1,161 @@
+"""Run the benchmark scripts and compare the results with a baseline.
+
+Every ``bench_*.py`` runs in its own interpreter and prints a JSON
+document. The combined results are saved under ``benchmarks/results``
+with the commit they were measured on; metrics that got worse than the
+baseline by more than the threshold are reported and make the run fail.
+
+    python benchmarks/run.py                 # everything, compare with latest.json
+    python benchmarks/run.py --quick export  # small sizes, one script
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+RESULTS_DIR = os.path.join(HERE, "results")
+THRESHOLD = 0.25
+# Timings below these are dominated by noise and never flagged.
+MIN_SECONDS = 0.005
+MIN_MS = 5.0
+HIGHER_IS_BETTER = ("per_second", "realtime_factor")
+LOWER_IS_BETTER = ("_s", "_ms", "_us", "elapsed", "peak_mib")
+
+
+def discover(names=()):
+    scripts = sorted(glob.glob(os.path.join(HERE, "bench_*.py")))
+    if names:
+        wanted = {n if n.startswith("bench_") else f"bench_{n}" for n in names}
+        scripts = [s for s in scripts if os.path.basename(s)[:-3] in wanted]
+    return scripts
+
+
+def run_script(path, quick=False, timeout=1800):
+    env = dict(os.environ)
+    if quick:
+        env["LJUDLADAN_BENCH_QUICK"] = "1"
+    t = time.perf_counter()
+    try:
+        proc = subprocess.run([sys.executable, path], capture_output=True, text=True,
+                              timeout=timeout, env=env, cwd=HERE)
+    except subprocess.TimeoutExpired:
+        return {"error": f"timed out after {timeout} s"}
+    try:
+        result = json.loads(proc.stdout)
+    except ValueError:
+        lines = proc.stderr.strip().splitlines() or [f"exit status {proc.returncode}"]
+        return {"error": lines[-1]}
+    if isinstance(result, dict):
+        result["_wall_s"] = round(time.perf_counter() - t, 2)
+    return result
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, cwd=HERE, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.TimeoutExpired):
+        return None
+
+
+def flatten(data, prefix=""):
+    """Numeric leaves of nested dicts keyed by dotted path."""
+    out = {}
+    for key, value in data.items():
+        path = f"{prefix}.{key}" if prefix else str(key)
+        if isinstance(value, dict):
+            out.update(flatten(value, path))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            out[path] = value
+    return out
+
+
+def _direction(path):
+    leaf = path.rsplit(".", 1)[-1]
+    if leaf.startswith("_"):
+        return 0
+    if any(leaf.endswith(s) for s in HIGHER_IS_BETTER):
+        return 1
+    if any(leaf.endswith(s) for s in LOWER_IS_BETTER):
+        return -1
+    return 0
+
+
+def _noise(path, old, new):
+    leaf = path.rsplit(".", 1)[-1]
+    if leaf.endswith("_s") or leaf.endswith("elapsed"):
+        return max(old, new) < MIN_SECONDS
+    if leaf.endswith("_ms"):
+        return max(old, new) < MIN_MS
+    return False
+
+
+def compare(baseline, current, threshold=THRESHOLD):
+    """Return ``(path, old, new, change)`` for metrics that regressed."""
+    old, new = flatten(baseline), flatten(current)
+    regressions = []
+    for path, value in new.items():
+        direction = _direction(path)
+        before = old.get(path)
+        if not direction or before is None or before <= 0 or _noise(path, before, value):
+            continue
+        change = (value - before) / before
+        if change * direction < -threshold:
+            regressions.append((path, before, value, change))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("names", nargs="*", help="scripts to run, e.g. export or bench_export")
+    parser.add_argument("--quick", action="store_true", help="use small input sizes")
+    parser.add_argument("--baseline", help="results file to compare with (default: latest)")
+    parser.add_argument("--threshold", type=float, default=THRESHOLD,
+                        help="relative change that counts as a regression")
+    parser.add_argument("--no-save", action="store_true", help="do not write results")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for path in discover(args.names):
+        name = os.path.basename(path)[:-3]
+        print(f"{name} …", file=sys.stderr, flush=True)
+        results[name] = run_script(path, args.quick)
+    doc = {"meta": {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": _commit(),
+                    "python": platform.python_version(), "platform": platform.platform(),
+                    "quick": args.quick},
+           "results": results}
+
+    baseline_path = args.baseline or os.path.join(RESULTS_DIR, "latest.json")
+    regressions = []
+    if os.path.exists(baseline_path):
+        with open(baseline_path, encoding="utf-8") as f:
+            baseline = json.load(f)
+        if baseline.get("meta", {}).get("quick") == args.quick:
+            regressions = compare(baseline["results"], results, args.threshold)
+    doc["regressions"] = [{"metric": p, "baseline": a, "current": b, "change": round(c, 3)}
+                          for p, a, b, c in regressions]
+
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        for target in (os.path.join(RESULTS_DIR, f"{stamp}.json"),
+                       os.path.join(RESULTS_DIR, "latest.json")):
+            with open(target, "w", encoding="utf-8") as f:
+                json.dump(doc, f, indent=2, ensure_ascii=False)
+
+    print(json.dumps(doc, indent=2, ensure_ascii=False))
+    for p, a, b, c in regressions:
+        print(f"REGRESSION {p}: {a} -> {b} ({c:+.0%})", file=sys.stderr)
+    errors = [n for n, r in results.items() if isinstance(r, dict) and "error" in r]
+    for name in errors:
+        print(f"ERROR {name}: {results[name]['error']}", file=sys.stderr)
+    return 1 if regressions or errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,101 +1,158 @@
-"""Export functionality for Sound Box."""
+"""Export functionality for Sound Box.
+
+The data writers are plain Python; Gtk is imported only when the export
+dialog is shown so that importing this module stays cheap.
+"""
 
 import csv
 import io
 import json
+import os
+import threading
 from datetime import datetime
 
 import gettext
 _ = gettext.gettext
 
 from ljudladan import __version__
+from ljudladan.trace import traced
 
 APP_LABEL = _("Sound Box")
 AUTHOR = "Daniel Nylander"
 WEBSITE = "www.autismappar.se"
+BUFFER_SIZE = 64 * 1024
+PROGRESS_EVERY = 500
 
-import gi
-gi.require_version('Gtk', '4.0')
-gi.require_version('Adw', '1')
-from gi.repository import Gtk, Adw, Gio, GLib
 
+def _gtk():
+    import gi
+    gi.require_version('Gtk', '4.0')
+    gi.require_version('Adw', '1')
+    from gi.repository import Adw, GLib, Gtk
+    return Gtk, Adw, GLib
 
-def data_to_csv(items, label=""):
-    """Export data as CSV."""
-    output = io.StringIO()
-    writer = csv.writer(output)
-    if items and isinstance(items[0], dict):
-        writer.writerow(items[0].keys())
+
+def _write_csv(f, items):
+    writer = csv.writer(f)
+    items = iter(items)
+    first = next(items, None)
+    if isinstance(first, dict):
+        writer.writerow(first.keys())
+        writer.writerow(first.values())
         for item in items:
             writer.writerow(item.values())
     writer.writerow([])
     writer.writerow([f"{APP_LABEL} v{__version__} — {WEBSITE}"])
-    return output.getvalue()
 
 
-def data_to_json(items, label=""):
-    """Export data as JSON."""
-    data = {
-        "data": items,
-        "_exported_by": f"{APP_LABEL} v{__version__}",
-        "_author": AUTHOR,
-        "_website": WEBSITE,
-    }
-    return json.dumps(data, indent=2, ensure_ascii=False)
+def _write_json(f, items):
+    f.write('{\n  "data": [')
+    sep = "\n    "
+    for item in items:
+        f.write(sep + json.dumps(item, indent=2, ensure_ascii=False).replace("\n", "\n    "))
+        sep = ",\n    "
+    f.write("\n  ],\n" if sep != "\n    " else "],\n")
+    tail = json.dumps({"_exported_by": f"{APP_LABEL} v{__version__}", "_author": AUTHOR,
+                       "_website": WEBSITE}, indent=2, ensure_ascii=False)
+    f.write(tail[2:])
 
 
-def export_data_pdf(items, title, output_path):
-    """Export data as PDF."""
-    try:
-        import cairo
-    except ImportError:
+def _write_ndjson(f, items):
+    for item in items:
+        f.write(json.dumps(item, ensure_ascii=False, separators=(",", ":")))
+        f.write("\n")
+
+
+WRITERS = {"csv": _write_csv, "json": _write_json, "ndjson": _write_ndjson}
+
+
+class _Feed:
+    """Iterate items, reporting progress and stopping when cancelled."""
+
+    def __init__(self, items, progress=None, cancel=None):
+        self.items = items
+        self.progress, self.cancel = progress, cancel
         try:
-            import cairocffi as cairo
-        except ImportError:
+            self.total = len(items)
+        except TypeError:
+            self.total = None
+        self.done = 0
+        self.cancelled = False
+
+    def __iter__(self):
+        for item in self.items:
+            if self.done % PROGRESS_EVERY == 0:
+                if self.cancel is not None and self.cancel.is_set():
+                    self.cancelled = True
+                    return
+                if self.progress is not None:
+                    self.progress(self.done, self.total)
+            yield item
+            self.done += 1
+        if self.progress is not None:
+            self.progress(self.done, self.total)
+
+
+@traced(cat="export")
+def write_export(ext, items, path, progress=None, cancel=None):
+    """Stream ``items`` to ``path`` as csv, json or ndjson.
+
+    Rows are written as they are produced through a buffered file, into
+    a ``.part`` file that replaces ``path`` only when complete.
+    ``progress(done, total)`` is called every few hundred items; setting
+    ``cancel`` stops early, removes the partial file and returns False.
+    """
+    feed = _Feed(items, progress, cancel)
+    tmp = path + ".part"
+    try:
+        with open(tmp, "w", newline="", encoding="utf-8", buffering=BUFFER_SIZE) as f:
+            WRITERS[ext](f, feed)
+        if feed.cancelled:
+            os.remove(tmp)
             return False
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return True
 
-    width, height = 595, 842
-    surface = cairo.PDFSurface(output_path, width, height)
-    ctx = cairo.Context(surface)
 
-    ctx.set_font_size(24)
-    ctx.move_to(40, 50)
-    ctx.show_text(title)
+def data_to_csv(items, label=""):
+    """Export data as CSV."""
+    output = io.StringIO()
+    _write_csv(output, items)
+    return output.getvalue()
 
-    ctx.set_font_size(12)
-    ctx.move_to(40, 75)
-    ctx.show_text(datetime.now().strftime("%Y-%m-%d"))
 
-    y = 110
-    ctx.set_font_size(12)
-    for item in items:
-        if y > height - 40:
-            surface.show_page()
-            y = 40
-        if isinstance(item, dict):
-            text = " | ".join(str(v) for v in item.values())
-        else:
-            text = str(item)
-        ctx.move_to(40, y)
-        ctx.show_text(text[:80])
-        y += 20
-
-    ctx.set_font_size(9)
-    ctx.set_source_rgb(0.5, 0.5, 0.5)
-    footer = f"{APP_LABEL} v{__version__} — {WEBSITE} — {datetime.now().strftime('%Y-%m-%d')}"
-    ctx.move_to(40, height - 20)
-    ctx.show_text(footer)
-
-    surface.finish()
-    return True
+def data_to_json(items, label=""):
+    """Export data as JSON."""
+    output = io.StringIO()
+    _write_json(output, items)
+    return output.getvalue()
+
+
+def export_data_pdf(items, title, output_path, progress=None, cancel=None):
+    """Export data as a paginated PDF table; False without cairo or when cancelled."""
+    from ljudladan import report
+    if report.cairo_module() is None:
+        return False
+    items = items if isinstance(items, list) else list(items)
+    chart = report.summary_chart(items)
+    doc = report.Report(title, report.columns_for(items), items,
+                        subtitle=datetime.now().strftime("%Y-%m-%d"),
+                        charts=[chart] if chart else ())
+    return doc.render(output_path, progress, cancel) > 0
 
 
 def show_export_dialog(window, items, title="", status_callback=None):
     """Show export dialog."""
+    _Gtk, Adw, _GLib = _gtk()
     dialog = Adw.AlertDialog.new(_("Export"), _("Choose export format:"))
     dialog.add_response("cancel", _("Cancel"))
     dialog.add_response("csv", _("CSV"))
     dialog.add_response("json", _("JSON"))
+    dialog.add_response("ndjson", _("NDJSON"))
     dialog.add_response("pdf", _("PDF"))
     dialog.set_default_response("csv")
     dialog.set_close_response("cancel")
@@ -103,33 +160,63 @@ def show_export_dialog(window, items, title="", status_callback=None):
     dialog.present(window)
 
 
+@traced
 def _on_response(dialog, response, window, items, title, status_callback):
     if response == "cancel":
         return
     ext = response
+    Gtk, _Adw, _GLib = _gtk()
     fd = Gtk.FileDialog.new()
     fd.set_title(_("Save Export"))
     fd.set_initial_name(f"ljudladan_{datetime.now().strftime('%Y-%m-%d')}.{ext}")
-    fd.save(window, None, _on_save, items, title, ext, status_callback)
+    fd.save(window, None, _on_save, window, items, title, ext, status_callback)
 
 
-def _on_save(dialog, result, items, title, ext, status_callback):
+@traced
+def _on_save(dialog, result, window, items, title, ext, status_callback):
+    _Gtk, Adw, GLib = _gtk()
     try:
         gfile = dialog.save_finish(result)
     except GLib.Error:
         return
     path = gfile.get_path()
-    try:
-        if ext == "csv":
-            with open(path, "w") as f:
-                f.write(data_to_csv(items))
-        elif ext == "json":
-            with open(path, "w") as f:
-                f.write(data_to_json(items))
-        elif ext == "pdf":
-            export_data_pdf(items, title or APP_LABEL, path)
-        if status_callback:
+    if isinstance(items, list):
+        items = items[:]
+    cancel = threading.Event()
+    progress_dialog = Adw.AlertDialog.new(_("Exporting…"), "")
+    progress_dialog.add_response("cancel", _("Cancel"))
+    progress_dialog.set_close_response("cancel")
+    progress_dialog.connect("response", lambda *_a: cancel.set())
+    progress_dialog.present(window)
+
+    def progress(done, total):
+        body = _("%d of %d rows") % (done, total) if total else _("%d rows") % done
+        GLib.idle_add(progress_dialog.set_body, body)
+
+    def work():
+        try:
+            if ext == "pdf":
+                ok, error = export_data_pdf(items, title or APP_LABEL, path, progress, cancel), None
+                if not ok and not cancel.is_set():
+                    error = _("cairo is not installed")
+            else:
+                ok, error = write_export(ext, items, path, progress, cancel), None
+        except Exception as e:
+            ok, error = False, e
+        GLib.idle_add(_on_done, progress_dialog, ext, ok, error, cancel, status_callback)
+
+    threading.Thread(target=work, name="export", daemon=True).start()
+
+
+@traced
+def _on_done(progress_dialog, ext, ok, error, cancel, status_callback):
+    if not cancel.is_set():
+        progress_dialog.force_close()
+    if status_callback:
+        if error is not None:
+            status_callback(_("Export error: %s") % str(error))
+        elif ok:
             status_callback(_("Exported %s") % ext.upper())
-    except Exception as e:
-        if status_callback:
-            status_callback(_("Export error: %s") % str(e))
+        else:
+            status_callback(_("Export cancelled"))
+    return False
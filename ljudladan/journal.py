@@ -0,0 +1,317 @@
+"""Append-only JSON Lines journal for the session history."""
+import json
+import os
+import threading
+import time
+import zlib
+
+from ljudladan.trace import traced
+
+FORMAT_VERSION = 1
+
+
+class Journal:
+    """History file where every record is one compact JSON line.
+
+    The first line is a header naming the record fields; every following
+    line is a JSON array holding the values in that order, with trailing
+    empty values trimmed and unknown keys kept in a trailing object.
+    Appending never touches existing lines, so the cost of a write does
+    not depend on how long the history is.
+    """
+
+    def __init__(self, path, fields, legacy_path=None, fsync_every=32, fsync_interval=5.0):
+        self.path = path
+        self.fields = tuple(fields)
+        self._legacy_path = legacy_path
+        self._fsync_every = fsync_every
+        self._fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        # Readers and the writer may each be first; only one migrates.
+        self._migrate_lock = threading.Lock()
+        self._fh = None
+        self._file_fields = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._bad_lines = 0
+        self._compactor = None
+
+    # ── Encoding ─────────────────────────────────────────────
+
+    @staticmethod
+    def _dumps(obj):
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+    def _header(self, fields):
+        return self._dumps({"v": FORMAT_VERSION, "fields": list(fields)}) + "\n"
+
+    def _encode(self, record, fields):
+        row = [record.get(f) for f in fields]
+        extra = {k: v for k, v in record.items() if k not in fields}
+        if extra:
+            row.append(extra)
+        else:
+            while row and row[-1] is None:
+                row.pop()
+        return self._dumps(row) + "\n"
+
+    @staticmethod
+    def _decode(row, fields):
+        extra = row.pop() if row and isinstance(row[-1], dict) else None
+        record = {f: v for f, v in zip(fields, row) if v is not None}
+        if extra:
+            record.update(extra)
+        return record
+
+    # ── Reading ──────────────────────────────────────────────
+
+    def __iter__(self):
+        """Stream records from disk one line at a time."""
+        self._migrate_legacy()
+        return self._iter_from(0)
+
+    def _iter_from(self, offset, stop=None):
+        bad = 0
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            fields = self._read_header(f)
+            if offset:
+                f.seek(offset)
+            for raw in f:
+                if stop is not None and f.tell() > stop:
+                    break
+                if not raw.endswith(b"\n"):
+                    bad += 1
+                    break
+                try:
+                    row = json.loads(raw)
+                except ValueError:
+                    bad += 1
+                    continue
+                if isinstance(row, list):
+                    yield self._decode(row, fields)
+        if offset == 0 and stop is None:
+            self._bad_lines = bad
+
+    def changes(self, cursor=None):
+        """Yield ``(cursor, record)`` for every record after ``cursor``.
+
+        A cursor remembers the byte offset and checksum of the last line
+        read, so resuming seeks straight to new records. If compaction has
+        rewritten the file since, the checksum no longer matches and the
+        position is recovered by skipping the records already counted.
+        """
+        self._migrate_legacy()
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            fields = self._read_header(f)
+            count = skip = 0
+            if cursor:
+                count = cursor.get("count", 0)
+                if not self._seek_cursor(f, cursor):
+                    f.seek(0)
+                    fields = self._read_header(f)
+                    skip, count = count, 0
+            while True:
+                raw = f.readline()
+                if not raw.endswith(b"\n"):
+                    break
+                try:
+                    row = json.loads(raw)
+                except ValueError:
+                    continue
+                if not isinstance(row, list):
+                    continue
+                count += 1
+                if skip:
+                    skip -= 1
+                    continue
+                yield ({"offset": f.tell(), "length": len(raw), "crc": zlib.crc32(raw),
+                        "count": count}, self._decode(row, fields))
+
+    @staticmethod
+    def _seek_cursor(f, cursor):
+        offset, length = cursor.get("offset"), cursor.get("length")
+        if offset is None or length is None or offset < length:
+            return False
+        f.seek(offset - length)
+        if zlib.crc32(f.read(length)) != cursor.get("crc"):
+            return False
+        return f.tell() == offset
+
+    def _read_header(self, f):
+        first = f.readline()
+        try:
+            header = json.loads(first)
+            fields = tuple(header["fields"])
+        except (ValueError, KeyError, TypeError):
+            f.seek(0)
+            return self.fields
+        return fields
+
+    @traced(cat="persistence")
+    def load(self):
+        """Return the whole history as a list."""
+        return list(self)
+
+    # ── Writing ──────────────────────────────────────────────
+
+    def _open(self):
+        if self._fh is not None:
+            return self._fh
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._migrate_legacy()
+        fh = open(self.path, "a+b")
+        fh.seek(0)
+        if fh.read(1):
+            fh.seek(0)
+            self._file_fields = self._read_header(fh)
+            fh.seek(-1, os.SEEK_END)
+            if fh.read(1) != b"\n":
+                # A torn last line from a crash; keep it isolated so the
+                # next record starts on a line of its own.
+                fh.write(b"\n")
+        else:
+            self._file_fields = self.fields
+            fh.write(self._header(self.fields).encode("utf-8"))
+        self._fh = fh
+        return fh
+
+    def append(self, record):
+        """Append one record."""
+        self.extend((record,))
+
+    @traced(cat="persistence")
+    def extend(self, records):
+        """Append several records with a single write."""
+        with self._lock:
+            fh = self._open()
+            data = "".join(self._encode(r, self._file_fields) for r in records)
+            if not data:
+                return
+            fh.write(data.encode("utf-8"))
+            fh.flush()
+            self._unsynced += 1
+            now = time.monotonic()
+            if self._unsynced >= self._fsync_every or now - self._last_sync >= self._fsync_interval:
+                self._sync_locked(now)
+
+    def _sync_locked(self, now=None):
+        if self._fh is not None and self._unsynced:
+            os.fsync(self._fh.fileno())
+        self._unsynced = 0
+        self._last_sync = now or time.monotonic()
+
+    @traced(cat="persistence")
+    def sync(self):
+        """Force pending appends to stable storage."""
+        with self._lock:
+            self._sync_locked()
+
+    def close(self):
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+        with self._lock:
+            self._sync_locked()
+            if self._fh is not None:
+                self._fh.close()
+                self._fh = None
+
+    # ── Migration and compaction ─────────────────────────────
+
+    def _migrate_legacy(self):
+        legacy = self._legacy_path
+        if not legacy:
+            return
+        with self._migrate_lock:
+            if os.path.exists(self.path) or not os.path.exists(legacy):
+                return
+            try:
+                with open(legacy, encoding="utf-8") as f:
+                    records = json.load(f)
+            except (OSError, ValueError):
+                records = []
+            self._write_atomic(r for r in records if isinstance(r, dict))
+            os.replace(legacy, legacy + ".migrated")
+
+    def _write_records(self, out, records):
+        out.write(self._header(self.fields).encode("utf-8"))
+        chunk = []
+        for record in records:
+            chunk.append(self._encode(record, self.fields))
+            if len(chunk) >= 4096:
+                out.write("".join(chunk).encode("utf-8"))
+                chunk.clear()
+        out.write("".join(chunk).encode("utf-8"))
+
+    def _write_atomic(self, records):
+        tmp = self.path + ".tmp"
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(tmp, "wb") as out:
+            self._write_records(out, records)
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp, self.path)
+
+    @property
+    def needs_compaction(self):
+        """True when the file holds torn lines or an outdated layout."""
+        if self._bad_lines:
+            return True
+        if self._file_fields is None and os.path.exists(self.path):
+            with open(self.path, "rb") as f:
+                self._file_fields = self._read_header(f)
+        return self._file_fields is not None and self._file_fields != self.fields
+
+    @traced(cat="persistence")
+    def compact(self):
+        """Rewrite the journal without torn lines and in the current layout.
+
+        Appends keep working while the bulk of the file is copied; only the
+        bytes written during the copy are transferred under the lock.
+        """
+        with self._lock:
+            if self._fh is not None:
+                self._fh.flush()
+            try:
+                snapshot = os.path.getsize(self.path)
+            except OSError:
+                return
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as out:
+            self._write_records(out, self._iter_from(0, stop=snapshot))
+            with self._lock:
+                with open(self.path, "rb") as f:
+                    f.seek(snapshot)
+                    tail = f.read()
+                fields = self._file_fields
+                if fields is not None and fields != self.fields:
+                    # Appends made during the copy still used the old layout.
+                    tail = b"".join(
+                        self._encode(self._decode(json.loads(line), fields), self.fields).encode("utf-8")
+                        for line in tail.splitlines(True) if line.startswith(b"[") and line.endswith(b"\n"))
+                out.write(tail)
+                out.flush()
+                os.fsync(out.fileno())
+                os.replace(tmp, self.path)
+                if self._fh is not None:
+                    self._fh.close()
+                    self._fh = None
+                self._bad_lines = 0
+                self._file_fields = self.fields
+
+    def compact_async(self):
+        """Start compaction in a background thread if it is needed."""
+        running = self._compactor is not None and self._compactor.is_alive()
+        if running or not self.needs_compaction:
+            return False
+        self._compactor = threading.Thread(target=self.compact, name="journal-compact", daemon=True)
+        self._compactor.start()
+        return True
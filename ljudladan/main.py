@@ -1,7 +1,6 @@
 """Ljudlådan — Sound sensitivity tool."""
 
 import gettext
-import json
 import locale
 from pathlib import Path
 
@@ -11,7 +10,9 @@ gi.require_version("Adw", "1")
 from gi.repository import Adw, Gdk, Gio, GLib, Gtk
 
 from ljudladan import __version__
-from ljudladan.export import show_export_dialog
+from ljudladan.journal import Journal
+from ljudladan.persistence import PersistenceWorker
+from ljudladan.trace import start_watchdog, traced
 
 try:
     locale.setlocale(locale.LC_ALL, "")
@@ -51,22 +52,46 @@ def _config_dir():
     p.mkdir(parents=True, exist_ok=True)
     return p
 
+LOG_FIELDS = ("date", "level", "emoji")
+_log_journal = None
+
+def _journal():
+    global _log_journal
+    if _log_journal is None:
+        d = _config_dir()
+        _log_journal = Journal(str(d / "log.jsonl"), LOG_FIELDS, legacy_path=str(d / "log.json"))
+    return _log_journal
+
 def _load_log():
-    path = _config_dir() / "log.json"
-    if path.exists():
-        try: return json.loads(path.read_text())
-        except Exception: pass
-    return []
+    return _journal().load()
+
+def _compact_log():
+    _journal().compact_async()
+    return True
 
-def _save_log(log):
-    (_config_dir() / "log.json").write_text(json.dumps(log[-200:], indent=2, ensure_ascii=False))
+def _call_once(callback, args):
+    callback(*args)
+    return False
+
+def after_first_frame(widget, callback, *args):
+    """Run ``callback(*args)`` from the main loop once ``widget`` has painted."""
+    def on_map(_widget):
+        widget.disconnect(map_id)
+        clock = widget.get_frame_clock()
+        def on_paint(_clock):
+            clock.disconnect(paint_id)
+            GLib.idle_add(_call_once, callback, args)
+        paint_id = clock.connect("after-paint", on_paint)
+    map_id = widget.connect("map", on_map)
 
 
 class MainWindow(Adw.ApplicationWindow):
     def __init__(self, app):
         super().__init__(application=app, title=_("Sound Box"))
         self.set_default_size(450, 650)
-        self.log = _load_log()
+        self.log = []
+        self.loaded = False
+        after_first_frame(self, self._load_log)
 
         main_box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
         self.set_content(main_box)
@@ -118,13 +143,37 @@ class MainWindow(Adw.ApplicationWindow):
         main_box.append(self.status)
         GLib.timeout_add_seconds(1, lambda: (self.status.set_label(GLib.DateTime.new_now_local().format("%Y-%m-%d %H:%M:%S")), True)[-1])
 
+    @traced
+    def _load_log(self):
+        # Read on the persistence thread, behind any entry already queued.
+        pending = len(self.log)
+        self.get_application().persistence.read(
+            _load_log, lambda log, error: self._on_log_loaded(pending, log, error))
+
+    @traced
+    def _on_log_loaded(self, pending, log, error):
+        self.loaded = True
+        if error is not None:
+            # Keep only this session's entries and leave the file alone.
+            self.status.set_label(_("Could not read the log: %s") % error)
+            return
+        self.log[:pending] = log
+        _compact_log()
+        GLib.timeout_add_seconds(600, _compact_log)
+
+    @traced
     def _on_key(self, ctrl, keyval, keycode, state):
         if state & Gdk.ModifierType.CONTROL_MASK and keyval in (Gdk.KEY_e, Gdk.KEY_E):
             self._on_export()
             return True
         return False
 
+    @traced
     def _on_export(self):
+        if not self.loaded:
+            self.status.set_label(_("Still loading the log…"))
+            return
+        from ljudladan.export import show_export_dialog
         show_export_dialog(self, self.log, _("Sound Box"), lambda m: self.status.set_label(m))
 
     def _build_level_page(self):
@@ -149,12 +198,19 @@ class MainWindow(Adw.ApplicationWindow):
         scroll.set_child(box)
         return scroll
 
+    @traced
     def _on_level_select(self, row, name, emoji):
         from datetime import datetime
-        self.log.append({"date": datetime.now().strftime("%Y-%m-%d %H:%M"), "level": _(name), "emoji": emoji})
-        _save_log(self.log)
+        entry = {"date": datetime.now().strftime("%Y-%m-%d %H:%M"), "level": _(name), "emoji": emoji}
+        self.log.append(entry)
+        self.get_application().persistence.append(_journal(), entry, self._on_saved)
         self.status.set_label(_("Logged: %s %s") % (emoji, _(name)))
 
+    @traced
+    def _on_saved(self, error):
+        if error is not None:
+            self.status.set_label(_("Could not save log: %s") % error)
+
     def _build_safe_page(self):
         scroll = Gtk.ScrolledWindow(vexpand=True)
         box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=8)
@@ -179,7 +235,15 @@ class MainWindow(Adw.ApplicationWindow):
 class App(Adw.Application):
     def __init__(self):
         super().__init__(application_id=APP_ID)
+        self.persistence = PersistenceWorker(notify=GLib.idle_add)
+        start_watchdog(GLib.timeout_add)
         self.connect("activate", self._on_activate)
+        self.connect("shutdown", self._on_shutdown)
+
+    def _on_shutdown(self, *_args):
+        self.persistence.close()
+        if _log_journal is not None:
+            _log_journal.close()
 
     def _on_activate(self, *_args):
         win = self.props.active_window or MainWindow(self)
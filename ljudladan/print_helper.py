@@ -9,28 +9,40 @@ except Exception:
     pass
 
 
-def print_to_pdf(widget, title="Document", output_dir=None):
-    """Save widget content as PDF using Gtk.PrintOperation."""
+def print_to_pdf(widget, title="Document", output_dir=None, rows=None, columns=None):
+    """Save a report as PDF using Gtk.PrintOperation.
+
+    ``rows`` (dicts) are laid out as a paginated table by
+    :mod:`ljudladan.report`; without them the page holds the title only.
+    """
+    from ljudladan.report import Report, columns_for
+
     if output_dir is None:
         output_dir = GLib.get_user_special_dir(GLib.UserDirectory.DIRECTORY_DOCUMENTS) or os.path.expanduser("~")
     
     timestamp = time.strftime("%Y%m%d_%H%M%S")
     filename = f"{title.replace(' ', '_')}_{timestamp}.pdf"
     filepath = os.path.join(output_dir, filename)
+
+    rows = list(rows or ())
+    try:
+        report = Report(title, columns or (columns_for(rows) if rows else ()), rows,
+                        subtitle=time.strftime("%Y-%m-%d %H:%M"))
+    except ImportError:
+        return None
+    pages = list(report.pages())
     
     print_op = Gtk.PrintOperation()
     print_op.set_export_filename(filepath)
     
     def on_draw_page(op, context, page_nr):
         cr = context.get_cairo_context()
-        cr.set_source_rgb(0, 0, 0)
-        cr.select_font_face("Sans")
-        cr.set_font_size(12)
-        cr.move_to(72, 72)
-        cr.show_text(f"{title} — {time.strftime('%Y-%m-%d %H:%M')}")
+        scale = context.get_width() / report.page_size[0]
+        cr.scale(scale, scale)
+        report.draw_page(cr, pages[page_nr])
         
     print_op.connect("draw-page", on_draw_page)
-    print_op.set_n_pages(1)
+    print_op.set_n_pages(len(pages))
     
     try:
         result = print_op.run(Gtk.PrintOperationAction.EXPORT, None)
@@ -0,0 +1,412 @@
+"""Paginated table reports drawn with cairo.
+
+Rows are laid out one page at a time and each page is drawn and flushed
+to the PDF as soon as it is full, so memory does not grow with the
+number of rows. Text is measured from a per-font table of character
+advances instead of asking cairo for every cell.
+"""
+import os
+import threading
+from collections import Counter, namedtuple
+from datetime import datetime
+from functools import lru_cache
+
+import gettext
+_ = gettext.gettext
+
+from ljudladan import __version__
+from ljudladan.export import APP_LABEL, WEBSITE
+
+A4 = (595, 842)
+MARGIN = 40
+FONT = "Sans"
+BODY_SIZE = 9
+TITLE_SIZE = 18
+HEADER_SIZE = 10
+FOOTER_SIZE = 8
+PAD = 3
+CHART_MAX_BARS = 12
+CHART_BAR = 12
+
+Page = namedtuple("Page", "number first_row rows")
+
+
+def cairo_module():
+    """Return pycairo or cairocffi, whichever is installed, else None."""
+    try:
+        import cairo
+    except ImportError:
+        try:
+            import cairocffi as cairo
+        except ImportError:
+            return None
+    return cairo
+
+
+class FontMetrics:
+    """Advance widths of one toy font, measured once per character.
+
+    Toy-font metrics scale linearly in user space, so a table built on a
+    1x1 image surface is valid for PDF and print contexts alike.
+    """
+
+    def __init__(self, cairo, family=FONT, size=BODY_SIZE, bold=False):
+        self.family, self.size, self.bold = family, size, bold
+        ctx = cairo.Context(cairo.ImageSurface(cairo.FORMAT_ARGB32, 1, 1))
+        weight = cairo.FONT_WEIGHT_BOLD if bold else cairo.FONT_WEIGHT_NORMAL
+        ctx.select_font_face(family, cairo.FONT_SLANT_NORMAL, weight)
+        ctx.set_font_size(size)
+        ascent, descent = ctx.font_extents()[:2]
+        self.ascent = ascent
+        self.line_height = ascent + descent
+        self._ctx = ctx
+        self._lock = threading.Lock()
+        self._advance = {}
+        for ch in map(chr, range(32, 127)):
+            self._advance[ch] = ctx.text_extents(ch)[4]
+
+    def _measure(self, ch):
+        with self._lock:
+            adv = self._advance[ch] = self._ctx.text_extents(ch)[4]
+        return adv
+
+    def width(self, text):
+        advance = self._advance
+        total = 0.0
+        for ch in text:
+            adv = advance.get(ch)
+            total += adv if adv is not None else self._measure(ch)
+        return total
+
+    def fit(self, text, width):
+        """Number of leading characters of ``text`` that fit in ``width``."""
+        total = 0.0
+        for i, ch in enumerate(text):
+            adv = self._advance.get(ch)
+            total += adv if adv is not None else self._measure(ch)
+            if total > width:
+                return max(1, i)
+        return len(text)
+
+    def select(self, ctx, cairo):
+        weight = cairo.FONT_WEIGHT_BOLD if self.bold else cairo.FONT_WEIGHT_NORMAL
+        ctx.select_font_face(self.family, cairo.FONT_SLANT_NORMAL, weight)
+        ctx.set_font_size(self.size)
+
+
+@lru_cache(maxsize=16)
+def metrics(size=BODY_SIZE, bold=False, family=FONT):
+    """Shared FontMetrics for a font, built on first use."""
+    return FontMetrics(cairo_module(), family, size, bold)
+
+
+def wrap(text, width, font):
+    """Break ``text`` into lines no wider than ``width``."""
+    lines = []
+    space = font.width(" ")
+    for para in str(text).split("\n"):
+        line, line_w = "", 0.0
+        for word in para.split(" "):
+            word_w = font.width(word)
+            if line and line_w + space + word_w <= width:
+                line += " " + word
+                line_w += space + word_w
+                continue
+            if line:
+                lines.append(line)
+            while word_w > width and len(word) > 1:
+                cut = font.fit(word, width)
+                lines.append(word[:cut])
+                word = word[cut:]
+                word_w = font.width(word)
+            line, line_w = word, word_w
+        lines.append(line)
+    return lines
+
+
+class Column:
+    """A table column: the record key, its heading and a relative width."""
+
+    def __init__(self, key, title=None, weight=1.0, align="left"):
+        self.key = key
+        self.title = key.replace("_", " ").capitalize() if title is None else title
+        self.weight = weight
+        self.align = align
+
+
+class BarChart:
+    """Horizontal bar chart of ``(label, value)`` pairs."""
+
+    def __init__(self, title, items):
+        self.title = title
+        self.items = list(items)[:CHART_MAX_BARS]
+
+    @property
+    def height(self):
+        return HEADER_SIZE * 2 + len(self.items) * CHART_BAR + 8
+
+    def draw(self, ctx, cairo, x, y, width):
+        head, body = metrics(HEADER_SIZE, True), metrics()
+        head.select(ctx, cairo)
+        ctx.set_source_rgb(0, 0, 0)
+        ctx.move_to(x, y + head.ascent)
+        ctx.show_text(self.title)
+        y += HEADER_SIZE * 2
+        label_w = width * 0.3
+        top = max((v for _l, v in self.items), default=0) or 1
+        body.select(ctx, cairo)
+        for label, value in self.items:
+            label = str(label)
+            ctx.set_source_rgb(0.2, 0.2, 0.2)
+            ctx.move_to(x, y + body.ascent)
+            ctx.show_text(label[:body.fit(label, label_w - PAD)])
+            bar_w = (width - label_w - 40) * value / top
+            ctx.set_source_rgb(0.35, 0.55, 0.8)
+            ctx.rectangle(x + label_w, y + 1, bar_w, CHART_BAR - 3)
+            ctx.fill()
+            ctx.set_source_rgb(0.2, 0.2, 0.2)
+            ctx.move_to(x + label_w + bar_w + PAD, y + body.ascent)
+            ctx.show_text(f"{value:g}" if isinstance(value, float) else str(value))
+            y += CHART_BAR
+
+
+class Report:
+    """A titled table with optional charts on the first page.
+
+    ``rows`` may be any iterable of dicts and is consumed once, page by
+    page. Cells wrap within their column; a row taller than a page is
+    cut to what fits.
+    """
+
+    def __init__(self, title, columns, rows, subtitle="", charts=(), page_size=A4, total=None):
+        if cairo_module() is None:
+            raise ImportError("cairo is not installed")
+        self.title, self.subtitle = title, subtitle
+        self.columns = list(columns)
+        self.rows = rows
+        self.charts = list(charts)
+        self.page_size = page_size
+        if total is None:
+            try:
+                total = len(rows)
+            except TypeError:
+                total = None
+        self.total = total
+        self.body = metrics()
+        self.head = metrics(HEADER_SIZE, True)
+        width = page_size[0] - 2 * MARGIN
+        weights = sum(c.weight for c in self.columns) or 1
+        self._widths = [width * c.weight / weights for c in self.columns]
+        self._x = [MARGIN + sum(self._widths[:i]) for i in range(len(self.columns))]
+
+    # ── Layout ───────────────────────────────────────────────
+
+    def _top(self, first):
+        y = MARGIN
+        if first:
+            y += TITLE_SIZE * 1.6
+            if self.subtitle:
+                y += HEADER_SIZE * 1.6
+            y += sum(chart.height for chart in self.charts)
+        else:
+            y += HEADER_SIZE * 2
+        if self.columns:
+            y += self.head.line_height + 2 * PAD
+        return y
+
+    @property
+    def _bottom(self):
+        return self.page_size[1] - MARGIN
+
+    def _cells(self, row):
+        cells = []
+        for col, width in zip(self.columns, self._widths):
+            value = row.get(col.key) if isinstance(row, dict) else row
+            cells.append(wrap("" if value is None else value, width - 2 * PAD, self.body))
+        return cells
+
+    def pages(self):
+        """Yield pages of laid-out rows; always at least one page."""
+        line = self.body.line_height
+        bottom, top = self._bottom, self._top(False)
+        room = int((bottom - top - 2 * PAD) // line)
+        number, first_row, index = 1, 0, 0
+        rows, y = [], self._top(True)
+        for row in self.rows:
+            cells = self._cells(row)
+            lines = min(max((len(c) for c in cells), default=1), room)
+            height = lines * line + 2 * PAD
+            if rows and y + height > bottom:
+                yield Page(number, first_row, rows)
+                number, first_row, rows, y = number + 1, index, [], top
+            rows.append(([c[:lines] for c in cells], height))
+            y += height
+            index += 1
+        yield Page(number, first_row, rows)
+
+    # ── Drawing ──────────────────────────────────────────────
+
+    def draw_page(self, ctx, page):
+        """Draw one laid-out page onto a cairo context in points."""
+        cairo = cairo_module()
+        first = page.number == 1
+        y = self._draw_header(ctx, cairo, first)
+        if self.columns:
+            y = self._draw_column_titles(ctx, cairo, y)
+        self.body.select(ctx, cairo)
+        line, ascent = self.body.line_height, self.body.ascent
+        width = self.page_size[0] - 2 * MARGIN
+        for i, (cells, height) in enumerate(page.rows):
+            if (page.first_row + i) % 2:
+                ctx.set_source_rgb(0.94, 0.95, 0.97)
+                ctx.rectangle(MARGIN, y, width, height)
+                ctx.fill()
+            ctx.set_source_rgb(0, 0, 0)
+            for col, x, w, lines in zip(self.columns, self._x, self._widths, cells):
+                for k, text in enumerate(lines):
+                    tx = x + PAD
+                    if col.align == "right":
+                        tx = x + w - PAD - self.body.width(text)
+                    ctx.move_to(tx, y + PAD + ascent + k * line)
+                    ctx.show_text(text)
+            y += height
+        self._draw_footer(ctx, cairo, page.number)
+
+    def _draw_header(self, ctx, cairo, first):
+        ctx.set_source_rgb(0, 0, 0)
+        y = MARGIN
+        if not first:
+            self.head.select(ctx, cairo)
+            ctx.set_source_rgb(0.4, 0.4, 0.4)
+            ctx.move_to(MARGIN, y + self.head.ascent)
+            ctx.show_text(self.title)
+            return y + HEADER_SIZE * 2
+        title = metrics(TITLE_SIZE, True)
+        title.select(ctx, cairo)
+        ctx.move_to(MARGIN, y + title.ascent)
+        ctx.show_text(self.title)
+        y += TITLE_SIZE * 1.6
+        if self.subtitle:
+            self.head.select(ctx, cairo)
+            ctx.set_source_rgb(0.4, 0.4, 0.4)
+            ctx.move_to(MARGIN, y + self.head.ascent)
+            ctx.show_text(self.subtitle)
+            y += HEADER_SIZE * 1.6
+        for chart in self.charts:
+            chart.draw(ctx, cairo, MARGIN, y, self.page_size[0] - 2 * MARGIN)
+            y += chart.height
+        return y
+
+    def _draw_column_titles(self, ctx, cairo, y):
+        height = self.head.line_height + 2 * PAD
+        ctx.set_source_rgb(0.85, 0.88, 0.93)
+        ctx.rectangle(MARGIN, y, self.page_size[0] - 2 * MARGIN, height)
+        ctx.fill()
+        ctx.set_source_rgb(0, 0, 0)
+        self.head.select(ctx, cairo)
+        for col, x, w in zip(self.columns, self._x, self._widths):
+            text = col.title[:self.head.fit(col.title, w - 2 * PAD)]
+            ctx.move_to(x + PAD, y + PAD + self.head.ascent)
+            ctx.show_text(text)
+        return y + height
+
+    def _draw_footer(self, ctx, cairo, number):
+        footer = metrics(FOOTER_SIZE)
+        footer.select(ctx, cairo)
+        ctx.set_source_rgb(0.5, 0.5, 0.5)
+        y = self.page_size[1] - MARGIN / 2
+        ctx.move_to(MARGIN, y)
+        ctx.show_text(f"{APP_LABEL} v{__version__} — {WEBSITE} — {datetime.now().strftime('%Y-%m-%d')}")
+        label = _("Page %d") % number
+        ctx.move_to(self.page_size[0] - MARGIN - footer.width(label), y)
+        ctx.show_text(label)
+
+    # ── Output ───────────────────────────────────────────────
+
+    def render(self, path, progress=None, cancel=None):
+        """Write the report as PDF, one page at a time; return the page count.
+
+        The file appears at ``path`` only when complete. ``progress(done,
+        total)`` is called after each page with the rows drawn so far;
+        setting ``cancel`` stops, removes the partial file and returns 0.
+        """
+        cairo = cairo_module()
+        if cairo is None:
+            raise ImportError("cairo is not installed")
+        tmp = path + ".part"
+        surface = cairo.PDFSurface(tmp, *self.page_size)
+        ctx = cairo.Context(surface)
+        count = 0
+        try:
+            for page in self.pages():
+                if cancel is not None and cancel.is_set():
+                    break
+                self.draw_page(ctx, page)
+                ctx.show_page()
+                count += 1
+                if progress is not None:
+                    progress(page.first_row + len(page.rows), self.total)
+            surface.finish()
+        except BaseException:
+            surface.finish()
+            os.remove(tmp)
+            raise
+        if cancel is not None and cancel.is_set():
+            os.remove(tmp)
+            return 0
+        os.replace(tmp, path)
+        return count
+
+    def render_async(self, path, on_done, notify=None, progress=None, cancel=None):
+        """Render on a daemon thread and report ``on_done(pages, error)``.
+
+        ``notify`` (for example ``GLib.idle_add``) moves the callback to the
+        caller's main loop.
+        """
+        def work():
+            try:
+                pages, error = self.render(path, progress, cancel), None
+            except (OSError, ImportError, MemoryError) as e:
+                pages, error = 0, e
+            if notify is None:
+                on_done(pages, error)
+            else:
+                notify(_deliver, on_done, pages, error)
+        thread = threading.Thread(target=work, name="report", daemon=True)
+        thread.start()
+        return thread
+
+
+def _deliver(on_done, pages, error):
+    on_done(pages, error)
+    return False
+
+
+def columns_for(items, sample=100):
+    """Columns for the keys of dict ``items``, sized by typical content."""
+    if not items or not isinstance(items[0], dict):
+        return [Column("entry", _("Entry"))]
+    font = metrics()
+    rows = items[:sample]
+    columns = []
+    for key in items[0]:
+        mean = sum(font.width(str(r.get(key, ""))) for r in rows) / len(rows)
+        weight = max(font.width(key), min(mean, 250))
+        columns.append(Column(key, weight=weight))
+    return columns
+
+
+def summary_chart(items, max_distinct=CHART_MAX_BARS):
+    """Bar chart of counts for the first column with a few distinct values."""
+    if not items or not isinstance(items[0], dict):
+        return None
+    for key in items[0]:
+        counts = Counter()
+        for item in items:
+            counts[str(item.get(key, ""))] += 1
+            if len(counts) > max_distinct:
+                break
+        else:
+            if len(counts) >= 2:
+                return BarChart(_("Entries by %s") % key, counts.most_common())
+    return None
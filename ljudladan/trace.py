@@ -0,0 +1,193 @@
+"""Opt-in timing of handlers and persistence, written as a Chrome trace.
+
+Set ``LJUDLADAN_TRACE=1`` to record. Functions decorated with
+:func:`traced` and blocks in :func:`span` become complete events, and a
+watchdog records every main-loop stall longer than
+``LJUDLADAN_TRACE_STALL_MS`` (default 100) together with the stack the
+main thread was stuck in. The trace is written to
+``~/.cache/ljudladan/traces`` at exit; open it in ``chrome://tracing``
+or Perfetto. When tracing is off, :func:`traced` returns the function
+unchanged, so it costs nothing.
+"""
+import atexit
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import nullcontext
+
+ENV = "LJUDLADAN_TRACE"
+STALL_ENV = "LJUDLADAN_TRACE_STALL_MS"
+enabled = os.environ.get(ENV, "") not in ("", "0")
+STALL_MS = float(os.environ.get(STALL_ENV) or 100)
+# Oldest events are dropped past this, so a long session cannot grow without bound.
+MAX_EVENTS = 200_000
+
+_events = deque(maxlen=MAX_EVENTS)
+_threads = {}
+_pid = os.getpid()
+_t0 = time.perf_counter()
+
+
+def _now_us():
+    return (time.perf_counter() - _t0) * 1e6
+
+
+def _tid():
+    ident = threading.get_ident()
+    if ident not in _threads:
+        _threads[ident] = threading.current_thread().name
+    return ident
+
+
+def _complete(name, cat, start, args=None):
+    event = {"name": name, "cat": cat, "ph": "X", "ts": round(start, 1),
+             "dur": round(_now_us() - start, 1), "pid": _pid, "tid": _tid()}
+    if args:
+        event["args"] = args
+    _events.append(event)
+
+
+def traced(fn=None, cat="handler", name=None):
+    """Record each call of ``fn``; usable bare or as ``@traced(cat=...)``."""
+    if fn is None:
+        return lambda f: traced(f, cat, name)
+    if not enabled:
+        return fn
+    label = name or fn.__qualname__
+
+    def wrapper(*args, **kwargs):
+        start = _now_us()
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _complete(label, cat, start)
+    wrapper.__wrapped__ = fn
+    wrapper.__name__, wrapper.__qualname__, wrapper.__doc__ = fn.__name__, fn.__qualname__, fn.__doc__
+    return wrapper
+
+
+class _Span:
+    __slots__ = ("name", "cat", "args", "start")
+
+    def __init__(self, name, cat, args):
+        self.name, self.cat, self.args = name, cat, args
+
+    def __enter__(self):
+        self.start = _now_us()
+        return self
+
+    def __exit__(self, *_exc):
+        _complete(self.name, self.cat, self.start, self.args)
+
+
+_NULL = nullcontext()
+
+
+def span(name, cat="code", **args):
+    """Context manager recording the enclosed block."""
+    return _Span(name, cat, args) if enabled else _NULL
+
+
+def instant(name, cat="mark", **args):
+    if enabled:
+        _events.append({"name": name, "cat": cat, "ph": "i", "s": "t", "ts": round(_now_us(), 1),
+                        "pid": _pid, "tid": _tid(), "args": args})
+
+
+class Watchdog:
+    """Detect main-loop stalls with a heartbeat and a monitor thread.
+
+    ``timeout_add`` is ``GLib.timeout_add``; the heartbeat it schedules
+    should run every ``interval_ms``. When it has not run for
+    ``stall_ms`` the monitor samples the main thread's stack, and when it
+    runs again the whole gap is recorded as a ``stall`` event.
+    """
+
+    def __init__(self, timeout_add, stall_ms=STALL_MS, interval_ms=None):
+        self.stall_s = stall_ms / 1000
+        self.interval_ms = interval_ms or max(10, int(stall_ms // 4))
+        self.stalls = 0
+        self._main = threading.get_ident()
+        self._beat = time.perf_counter()
+        self._stack = None
+        self._stop = threading.Event()
+        timeout_add(self.interval_ms, self._heartbeat)
+        self._thread = threading.Thread(target=self._monitor, name="trace-watchdog", daemon=True)
+        self._thread.start()
+
+    def _heartbeat(self):
+        now = time.perf_counter()
+        gap = now - self._beat - self.interval_ms / 1000
+        if gap >= self.stall_s:
+            self.stalls += 1
+            args = {"ms": round(gap * 1000, 1)}
+            if self._stack:
+                args["stack"] = self._stack
+            _events.append({"name": "stall", "cat": "mainloop", "ph": "X",
+                            "ts": round((now - gap - _t0) * 1e6, 1), "dur": round(gap * 1e6, 1),
+                            "pid": _pid, "tid": self._main, "args": args})
+        self._beat, self._stack = now, None
+        return not self._stop.is_set()
+
+    def _monitor(self):
+        while not self._stop.wait(self.stall_s / 2):
+            if self._stack is None and time.perf_counter() - self._beat > self.stall_s:
+                frame = sys._current_frames().get(self._main)
+                if frame is not None:
+                    import traceback
+                    self._stack = [line.strip() for line in traceback.format_stack(frame)[-8:]]
+
+    def stop(self):
+        self._stop.set()
+
+
+_watchdog = None
+
+
+def start_watchdog(timeout_add):
+    """Start the stall watchdog once, if tracing is enabled."""
+    global _watchdog
+    if enabled and _watchdog is None:
+        _threads[threading.get_ident()] = "main"
+        _watchdog = Watchdog(timeout_add)
+    return _watchdog
+
+
+def _trace_dir():
+    xdg = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(xdg, "ljudladan", "traces")
+
+
+def write(path=None):
+    """Write the events recorded so far; return the path or None."""
+    if not _events:
+        return None
+    if path is None:
+        path = os.path.join(_trace_dir(), time.strftime(f"trace-%Y%m%d-%H%M%S-{_pid}.json"))
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    meta = [{"name": "thread_name", "ph": "M", "pid": _pid, "tid": tid, "args": {"name": name}}
+            for tid, name in list(_threads.items())]
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": meta + list(_events), "displayTimeUnit": "ms"}, f)
+    os.replace(tmp, path)
+    return path
+
+
+def _write_at_exit():
+    if _watchdog is not None:
+        _watchdog.stop()
+    try:
+        path = write()
+    except OSError as e:
+        print(f"ljudladan: could not write trace: {e}", file=sys.stderr)
+        return
+    if path:
+        print(f"ljudladan: trace written to {path}", file=sys.stderr)
+
+
+if enabled:
+    atexit.register(_write_at_exit)
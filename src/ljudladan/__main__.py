@@ -0,0 +1,11 @@
+import sys
+
+from ljudladan.cli import COMMANDS
+
+# Subcommands run headless; anything else starts the application.
+if sys.argv[1:] and sys.argv[1].split("=")[0] in COMMANDS + ("--config", "--backend"):
+    from ljudladan.cli import main
+    sys.exit(main())
+else:
+    from ljudladan.main import main
+    main()
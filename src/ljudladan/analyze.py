@@ -0,0 +1,246 @@
+"""Batch loudness analysis of recorded environments."""
+import argparse
+import json
+import os
+import sys
+import wave
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import numpy as np
+
+from ljudladan.meter import LEVELS, LoudnessMeter, level_name
+from ljudladan.paths import cache_dir
+
+CACHE_FILE = "analysis.json"
+# Bump when results change meaning so cached entries are measured again.
+CACHE_VERSION = 1
+CHUNK_SECONDS = 1.0
+EXTENSIONS = (".wav", ".flac", ".ogg")
+
+
+def _wav_chunks(path, seconds):
+    with wave.open(path, "rb") as w:
+        sr, channels, width = w.getframerate(), w.getnchannels(), w.getsampwidth()
+        frames = max(1, int(seconds * sr))
+        yield sr
+        while True:
+            raw = w.readframes(frames)
+            if not raw:
+                return
+            if width == 1:
+                x = (np.frombuffer(raw, np.uint8).astype(np.float32) - 128) / 128
+            elif width == 3:
+                b = np.frombuffer(raw, np.uint8).reshape(-1, 3)
+                x = (b[:, 0].astype(np.int32) | b[:, 1].astype(np.int32) << 8
+                     | b[:, 2].astype(np.int8).astype(np.int32) << 16) / float(1 << 23)
+            elif width in (2, 4):
+                dtype = "<i2" if width == 2 else "<i4"
+                x = np.frombuffer(raw, dtype) / float(1 << (8 * width - 1))
+            else:
+                raise ValueError(f"unsupported sample width: {width}")
+            yield x.reshape(-1, channels).mean(axis=1) if channels > 1 else x
+
+
+def _soundfile_chunks(path, seconds):
+    try:
+        import soundfile
+    except (ImportError, OSError):
+        raise ValueError("reading this format needs the soundfile package") from None
+    with soundfile.SoundFile(path) as f:
+        yield f.samplerate
+        for block in f.blocks(max(1, int(seconds * f.samplerate)), dtype="float32"):
+            yield block.mean(axis=1) if block.ndim > 1 else block
+
+
+def analyze_file(path, chunk_seconds=CHUNK_SECONDS):
+    """Measure one file, streaming it through a meter in fixed chunks.
+
+    Multichannel files are measured on their mono downmix, the way the
+    app plays sounds. ``level`` is the SOUND_LEVELS bucket of the gated
+    integrated loudness and ``loudest`` that of the loudest moment.
+    """
+    reader = _wav_chunks if path.lower().endswith(".wav") else _soundfile_chunks
+    chunks = reader(path, chunk_seconds)
+    sr = next(chunks)
+    meter = LoudnessMeter(sr)
+    for chunk in chunks:
+        meter.process(chunk)
+    integrated = meter.integrated
+    return {
+        "duration": round(meter.frames / sr, 3),
+        "sample_rate": sr,
+        "integrated_lufs": _rounded(integrated),
+        "max_momentary_lufs": _rounded(meter.max_momentary),
+        "rms_db": _rounded(meter.rms_db),
+        "peak_db": _rounded(meter.peak_db),
+        "true_peak_db": _rounded(meter.true_peak_db),
+        "level": level_name(integrated),
+        "loudest": level_name(meter.max_momentary),
+    }
+
+
+def _rounded(value):
+    return round(value, 1) if np.isfinite(value) else None
+
+
+def find_audio(paths):
+    """Expand files and directories into a sorted list of audio files."""
+    found = set()
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _dirs, files in os.walk(path):
+                found.update(os.path.join(root, f) for f in files if f.lower().endswith(EXTENSIONS))
+        elif os.path.isfile(path):
+            found.add(path)
+    return sorted(os.path.abspath(p) for p in found)
+
+
+def _load_cache(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+        return {}
+    return data.get("files", {})
+
+
+def _save_cache(path, files):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": CACHE_VERSION, "files": files}, f, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def _analyze_job(path):
+    try:
+        return path, analyze_file(path), None
+    except (OSError, EOFError, ValueError, wave.Error) as e:
+        return path, None, str(e) or type(e).__name__
+
+
+class Analyzer:
+    """Analyze many files across processes, remembering earlier results.
+
+    Results are cached by absolute path and reused while the file's size
+    and modification time are unchanged, so a re-run over the same folder
+    only measures new or edited recordings. ``cache_path=None`` disables
+    the cache.
+    """
+
+    def __init__(self, cache_path=None, workers=None):
+        self.cache_path = cache_path
+        self.workers = workers or os.cpu_count() or 1
+        self._cache = _load_cache(cache_path) if cache_path else {}
+        self.analyzed = 0
+        self.reused = 0
+
+    def run(self, paths, progress=None):
+        """Return one result dict per audio file under ``paths``.
+
+        ``progress(done, total)`` is called as files finish. Files that
+        cannot be read get an ``error`` entry and are retried next run.
+        """
+        files = find_audio(paths)
+        results, todo = {}, []
+        for path in files:
+            try:
+                st = os.stat(path)
+            except OSError as e:
+                results[path] = {"path": path, "error": str(e)}
+                continue
+            key = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+            entry = self._cache.get(path)
+            if entry and all(entry.get(k) == v for k, v in key.items()):
+                results[path] = dict(entry["result"], path=path, **key)
+                self.reused += 1
+            else:
+                todo.append((path, key))
+        done = len(results)
+        if progress is not None:
+            progress(done, len(files))
+        keys = dict(todo)
+        for path, result, error in self._measure(list(keys)):
+            key = keys[path]
+            if error is None:
+                self._cache[path] = dict(key, result=result)
+                results[path] = dict(result, path=path, **key)
+                self.analyzed += 1
+            else:
+                results[path] = dict(path=path, error=error, **key)
+            done += 1
+            if progress is not None:
+                progress(done, len(files))
+        if todo and self.cache_path:
+            _save_cache(self.cache_path, self._cache)
+        return [results[p] for p in files]
+
+    def _measure(self, paths):
+        if len(paths) <= 1 or self.workers <= 1:
+            yield from map(_analyze_job, paths)
+            return
+        with ProcessPoolExecutor(min(self.workers, len(paths))) as pool:
+            for future in as_completed([pool.submit(_analyze_job, p) for p in paths]):
+                yield future.result()
+
+
+def analyze(paths, cache=True, workers=None, progress=None):
+    """Analyze files and directories with the default on-disk cache."""
+    cache_path = os.path.join(cache_dir(), CACHE_FILE) if cache else None
+    return Analyzer(cache_path, workers).run(paths, progress)
+
+
+def to_rows(results):
+    """Shape results for ``export_csv``/``export_json``."""
+    rows = []
+    for r in results:
+        mtime = r.get("mtime_ns")
+        date = datetime.fromtimestamp(mtime / 1e9).isoformat(timespec="seconds") if mtime else ""
+        if "error" in r:
+            summary = r["error"]
+        elif r["integrated_lufs"] is None:
+            summary = r["level"]
+        else:
+            summary = f'{r["level"]} ({r["integrated_lufs"]} LUFS, peak {r["true_peak_db"]} dBTP)'
+        rows.append(dict(r, date=date, details=r["path"], result=summary))
+    return rows
+
+
+def export(results, filepath):
+    """Write results through the app's exporters, chosen by extension."""
+    from ljudladan.export import export_csv, export_json, export_pdf
+    writers = {".csv": export_csv, ".json": export_json, ".pdf": export_pdf}
+    ext = os.path.splitext(filepath)[1].lower()
+    if ext not in writers:
+        raise ValueError(f"unsupported export format: {ext}")
+    writers[ext](to_rows(results), filepath)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="ljudladan-analyze",
+                                     description="Classify recordings by loudness.")
+    parser.add_argument("paths", nargs="+", help="audio files or folders")
+    parser.add_argument("-o", "--output", help="export to .csv, .json or .pdf")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="worker processes")
+    parser.add_argument("--no-cache", action="store_true", help="measure every file again")
+    args = parser.parse_args(argv)
+    analyzer = Analyzer(None if args.no_cache else os.path.join(cache_dir(), CACHE_FILE), args.jobs)
+    results = analyzer.run(args.paths)
+    width = max(len(name) for name in LEVELS)
+    for r in results:
+        if "error" in r:
+            print(f'{"error":<{width}}  {"":>6}  {r["path"]}: {r["error"]}', file=sys.stderr)
+        else:
+            lufs = "-inf" if r["integrated_lufs"] is None else f'{r["integrated_lufs"]:.1f}'
+            print(f'{r["level"]:<{width}}  {lufs:>6}  {r["path"]}')
+    print(f"{analyzer.analyzed} analyzed, {analyzer.reused} from cache", file=sys.stderr)
+    if args.output:
+        export(results, args.output)
+    return 1 if any("error" in r for r in results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""Memory-budgeted LRU cache of rendered audio buffers."""
+import hashlib
+import os
+import shutil
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from ljudladan import paths
+
+DEFAULT_BUDGET = 64 * 1024 * 1024
+MAX_MAPPED = 32
+
+
+class AudioCache:
+    """Keep rendered buffers in memory up to ``budget`` bytes.
+
+    Keys are ``(sound, volume, duration, sample_rate)`` tuples. When the
+    budget is exceeded the least recently used buffers are written to
+    ``spill_dir`` as ``.npy`` files; a later lookup memory-maps the file
+    and returns it as a read-only array, so nothing is re-rendered or
+    copied. Buffers handed out are read-only because they are shared.
+
+    Spilled files outlive the process. ``tag`` names what they were made
+    with (synth version, packs, resampler); they are kept in a folder of
+    that name, and :meth:`prune` removes those of any other tag.
+    """
+
+    def __init__(self, budget=DEFAULT_BUDGET, spill_dir=None, tag=None):
+        self.budget = budget
+        self.root = spill_dir or os.path.join(paths.cache_dir(), "buffers")
+        self.spill_dir = os.path.join(self.root, tag) if tag else self.root
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._mapped = OrderedDict()
+        self._bytes = 0
+        self.hits = self.misses = self.evictions = self.spill_hits = 0
+
+    def _spill_path(self, key):
+        digest = hashlib.sha1(repr(key).encode("utf-8")).hexdigest()
+        return os.path.join(self.spill_dir, digest + ".npy")
+
+    def get(self, key):
+        """Return the cached buffer for ``key`` or ``None``."""
+        with self._lock:
+            array = self._entries.get(key)
+            if array is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return array
+            array = self._mapped.get(key)
+            if array is not None:
+                self._mapped.move_to_end(key)
+                self.hits += 1
+                self.spill_hits += 1
+                return array
+        path = self._spill_path(key)
+        try:
+            array = np.load(path, mmap_mode="r")
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self._mapped[key] = array
+            while len(self._mapped) > MAX_MAPPED:
+                self._mapped.popitem(last=False)
+            self.hits += 1
+            self.spill_hits += 1
+        return array
+
+    def put(self, key, array):
+        """Store ``array`` and spill older entries if over budget."""
+        array = np.ascontiguousarray(array)
+        array.flags.writeable = False
+        evicted = []
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old.nbytes
+            self._mapped.pop(key, None)
+            self._entries[key] = array
+            self._bytes += array.nbytes
+            while self._bytes > self.budget and len(self._entries) > 1:
+                old_key, old = self._entries.popitem(last=False)
+                self._bytes -= old.nbytes
+                self.evictions += 1
+                evicted.append((old_key, old))
+        for old_key, old in evicted:
+            self._spill(old_key, old)
+        return array
+
+    def _spill(self, key, array):
+        path = self._spill_path(key)
+        if os.path.exists(path):
+            return
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            with open(path + ".tmp", "wb") as f:
+                np.save(f, array)
+            os.replace(path + ".tmp", path)
+        except OSError:
+            pass
+
+    def get_or_render(self, key, render):
+        """Return the buffer for ``key``, calling ``render()`` on a miss."""
+        array = self.get(key)
+        if array is None:
+            array = self.put(key, render())
+        return array
+
+    @property
+    def nbytes(self):
+        return self._bytes
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "spill_hits": self.spill_hits, "entries": len(self._entries),
+                    "mapped": len(self._mapped), "bytes": self._bytes, "budget": self.budget}
+
+    def prune(self):
+        """Delete spilled buffers made under another tag."""
+        if self.spill_dir == self.root:
+            return
+        keep = os.path.basename(self.spill_dir)
+        try:
+            entries = list(os.scandir(self.root))
+        except OSError:
+            return
+        for entry in entries:
+            if entry.name == keep:
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                shutil.rmtree(entry.path, ignore_errors=True)
+            elif entry.name.endswith((".npy", ".tmp")):
+                try:
+                    os.remove(entry.path)
+                except OSError:
+                    pass
+
+    def clear(self, spilled=False):
+        """Drop in-memory buffers, and with ``spilled`` the files as well."""
+        with self._lock:
+            self._entries.clear()
+            self._mapped.clear()
+            self._bytes = 0
+        if spilled and os.path.isdir(self.spill_dir):
+            for name in os.listdir(self.spill_dir):
+                if name.endswith(".npy"):
+                    os.remove(os.path.join(self.spill_dir, name))
@@ -0,0 +1,76 @@
+"""The built-in sound library: categories, sounds and their display data.
+
+Every sound here can be synthesized, so the app works without any pack
+installed; packs add recordings and sounds of their own on top. The
+strings are marked with ``N_`` so xgettext finds them, and translated
+where they are shown. Importing this module does no I/O.
+"""
+
+N_ = lambda s: s
+
+CATEGORIES = [
+    {"name": N_("Nature"), "emoji": "\U0001f333", "sounds": [
+        {"name": N_("Rain"), "emoji": "🌧️", "description": N_("Gentle and soothing"), "safe": True},
+        {"name": N_("Wind")},
+        {"name": N_("Birds singing")},
+        {"name": N_("Thunder")},
+        {"name": N_("Ocean waves"), "emoji": "🌊", "description": N_("Calm and repetitive"),
+         "safe": True},
+    ]},
+    {"name": N_("Animals"), "emoji": "\U0001f436", "sounds": [
+        {"name": N_("Dog barking")},
+        {"name": N_("Cat meowing")},
+        {"name": N_("Cow mooing")},
+        {"name": N_("Horse neighing")},
+        {"name": N_("Rooster crowing")},
+    ]},
+    {"name": N_("Music"), "emoji": "\U0001f3b5", "sounds": [
+        {"name": N_("Piano")},
+        {"name": N_("Guitar")},
+        {"name": N_("Drums")},
+        {"name": N_("Violin")},
+        {"name": N_("Flute")},
+    ]},
+    {"name": N_("Everyday"), "emoji": "\U0001f3e0", "sounds": [
+        {"name": N_("Doorbell")},
+        {"name": N_("Vacuum cleaner")},
+        {"name": N_("Alarm clock")},
+        {"name": N_("Traffic")},
+        {"name": N_("Phone ringing")},
+    ]},
+    {"name": N_("Calm"), "emoji": "\U0001f319", "sounds": [
+        {"name": N_("Soft music"), "emoji": "🎵", "description": N_("Calm instrumental music"),
+         "safe": True},
+        {"name": N_("Forest"), "emoji": "🌲", "description": N_("Birds and wind in trees"),
+         "safe": True},
+        {"name": N_("White noise"), "emoji": "⏰", "description": N_("Steady background sound"),
+         "safe": True},
+        {"name": N_("Bubbles"), "emoji": "🫧", "description": N_("Soft popping sounds"),
+         "safe": True},
+    ]},
+]
+
+
+def categories():
+    """``[{"name", "emoji", "sounds"}]`` with the sound names, untranslated."""
+    return [{"name": c["name"], "emoji": c["emoji"], "sounds": [s["name"] for s in c["sounds"]]}
+            for c in CATEGORIES]
+
+
+def safe_sounds():
+    """``(emoji, name, description)`` of the calming sounds, untranslated."""
+    return [(s["emoji"], s["name"], s["description"])
+            for c in CATEGORIES for s in c["sounds"] if s.get("safe")]
+
+
+def manifest():
+    """The library as ``(sounds, meta)``, in the form a pack manifest reads to."""
+    sounds, meta = [], {"categories": {}, "sounds": {}}
+    for cat in CATEGORIES:
+        meta["categories"][cat["name"]] = {"emoji": cat["emoji"]}
+        for sound in cat["sounds"]:
+            sounds.append((sound["name"], cat["name"], None))
+            info = {k: sound[k] for k in ("emoji", "description", "safe") if k in sound}
+            if info:
+                meta["sounds"][sound["name"]] = info
+    return sounds, meta
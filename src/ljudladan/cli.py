@@ -0,0 +1,173 @@
+"""Headless command line: export, stats, render, analyze and pack without GTK.
+
+Only the pure-Python core is imported, so ``python -m ljudladan stats``
+starts in milliseconds on machines without a display, and several runs
+can work side by side in a shell pipeline. Each subcommand imports what
+it needs when it runs.
+"""
+import argparse
+import json
+import os
+import sys
+
+from ljudladan.history import export_row, history_backend, open_history
+
+COMMANDS = ("export", "stats", "render", "analyze", "pack")
+FORMATS = ("csv", "json", "ndjson")
+
+
+def _open(args):
+    return open_history(args.backend or history_backend(args.config), args.config)
+
+
+def _records(args):
+    from ljudladan.store import query
+    filters = {k: getattr(args, k) for k in ("since", "until", "sound", "category")}
+    return query(_open(args), **filters)
+
+
+def _progress(done, total):
+    if total:
+        print(f"\r{done}/{total}", end="", file=sys.stderr, flush=True)
+
+
+def cmd_export(args):
+    from ljudladan import export
+    fmt = args.format or os.path.splitext(args.output or "")[1][1:].lower() or "ndjson"
+    if fmt not in FORMATS:
+        raise ValueError(f"unsupported export format: {fmt}")
+    records = _records(args)
+    if fmt == "csv":
+        records = map(export_row, records)
+    if args.output in (None, "-"):
+        writers = {"csv": export._write_csv, "json": export._write_json,
+                   "ndjson": export._write_ndjson}
+        writers[fmt](sys.stdout, records)
+        return 0
+    writers = {"csv": export.export_csv, "json": export.export_json, "ndjson": export.export_ndjson}
+    progress = _progress if sys.stderr.isatty() else None
+    writers[fmt](records, args.output, progress=progress)
+    if progress:
+        print(file=sys.stderr)
+    return 0
+
+
+def _line(key, agg):
+    parts = [f"{agg.plays} plays"]
+    if agg.rated:
+        parts.append(f"{agg.comfort:.0%} comfortable")
+    if agg.tolerated_n:
+        parts.append(f"tolerated {agg.tolerated_volume:.0f}%")
+    return f"{key}\t" + ", ".join(parts)
+
+
+def cmd_stats(args):
+    from ljudladan.stats import Stats
+    stats = Stats.from_history(_records(args))
+    if args.json:
+        groups = {g: {str(k): a.as_dict() for k, a in stats.top(g, args.top)}
+                  for g in Stats.GROUPS}
+        json.dump({"total": stats.total.as_dict(), "trend_per_day": stats.trend(),
+                   "groups": groups}, sys.stdout, ensure_ascii=False, indent=2)
+        print()
+        return 0
+    print(_line("total", stats.total))
+    trend = stats.trend()
+    if trend is not None:
+        print(f"trend\t{trend * 7:+.1f}% tolerated volume per week")
+    group = args.group
+    items = stats.days(args.top) if group == "day" else stats.top(group, args.top)
+    for key, agg in items:
+        print(_line(key, agg))
+    return 0
+
+
+def _layer(text):
+    name, _sep, gain = text.partition(":")
+    try:
+        return name, float(gain) / 100 if gain else 0.5
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"bad gain in {text!r}") from None
+
+
+def cmd_render(args):
+    from ljudladan.render import render_to_file
+    from ljudladan.synth import SOUNDS
+    for name, _gain in args.layers:
+        if name not in SOUNDS:
+            raise ValueError(f"unknown sound: {name} (choose from {', '.join(SOUNDS)})")
+    progress = None
+    if sys.stderr.isatty():
+        def progress(fraction):
+            print(f"\r{fraction:.0%}", end="", file=sys.stderr, flush=True)
+    ok = render_to_file(args.layers, args.minutes * 60, args.output, seed=args.seed,
+                        progress=progress)
+    if progress:
+        print(file=sys.stderr)
+    return 0 if ok else 1
+
+
+def cmd_analyze(args):
+    from ljudladan.analyze import main as analyze
+    return analyze(args.rest)
+
+
+def cmd_pack(args):
+    from ljudladan.pack import main as pack
+    return pack(args.rest)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="ljudladan",
+                                     description="Work with Sound Box data without the window.")
+    parser.add_argument("--config", help="config folder (default: ~/.config/ljudladan)")
+    parser.add_argument("--backend", choices=("journal", "sqlite"),
+                        help="history backend (default: from settings)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    filters = argparse.ArgumentParser(add_help=False)
+    filters.add_argument("--since", help="only sessions on or after this date (YYYY-MM-DD)")
+    filters.add_argument("--until", help="only sessions before this date")
+    filters.add_argument("--sound")
+    filters.add_argument("--category")
+
+    p = sub.add_parser("export", parents=[filters], help="write the session history")
+    p.add_argument("-o", "--output", help="file to write; '-' or nothing for stdout")
+    p.add_argument("-f", "--format", choices=FORMATS, help="default: from the file extension")
+    p.set_defaults(func=cmd_export)
+
+    p = sub.add_parser("stats", parents=[filters], help="comfort and volume statistics")
+    p.add_argument("-g", "--group", choices=("sound", "category", "bucket", "day"), default="sound")
+    p.add_argument("-n", "--top", type=int, default=10)
+    p.add_argument("--json", action="store_true", help="print every group as JSON")
+    p.set_defaults(func=cmd_stats)
+
+    p = sub.add_parser("render", help="render a soundscape to .wav or .flac")
+    p.add_argument("layers", nargs="+", type=_layer, metavar="SOUND[:GAIN]",
+                   help="library sound, gain in percent (default 50)")
+    p.add_argument("-o", "--output", required=True)
+    p.add_argument("-m", "--minutes", type=float, default=15)
+    p.add_argument("--seed", type=int, default=0)
+    p.set_defaults(func=cmd_render)
+
+    p = sub.add_parser("analyze", help="classify recordings by loudness", add_help=False)
+    p.add_argument("rest", nargs=argparse.REMAINDER)
+    p.set_defaults(func=cmd_analyze)
+
+    p = sub.add_parser("pack", help="build or list sound packs", add_help=False)
+    p.add_argument("rest", nargs=argparse.REMAINDER)
+    p.set_defaults(func=cmd_pack)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        return args.func(args)
+    except BrokenPipeError:
+        # The reader went away (e.g. ``| head``); keep the exit flush quiet.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 0
+    except (OSError, ValueError, KeyError) as e:
+        print(f"ljudladan {args.command}: {e}", file=sys.stderr)
+        return 1
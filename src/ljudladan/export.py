@@ -1,43 +1,127 @@
-"""Export functionality for ljudladan."""
+"""Export functionality for ljudladan.
+
+Every writer takes any iterable of records and streams it to disk, so a
+large history is never held in memory as one string. Output goes to a
+``.part`` file that is renamed into place when complete; ``progress`` is
+called as ``progress(done, total)`` every few hundred records and setting
+the ``cancel`` event abandons the file. Writers return True on success.
+"""
 import csv
+import io
 import json
 import gettext
 import os
 from datetime import datetime
 from ljudladan import __version__
+from ljudladan.trace import traced
 
 _ = gettext.gettext
 
 APP_LABEL = _("Sound Box")
 WEBSITE = "www.autismappar.se"
+BUFFER_SIZE = 64 * 1024
+PROGRESS_EVERY = 500
+ROTATE_BYTES = 8 * 1024 * 1024
 
 
 def _footer():
     return f"{APP_LABEL} v{__version__} — {WEBSITE}"
 
 
-def export_csv(data, filepath):
+class _Feed:
+    """Iterate records, reporting progress and stopping when cancelled."""
+
+    def __init__(self, records, progress=None, cancel=None, total=None):
+        self.records = records
+        self.progress, self.cancel = progress, cancel
+        self.total = total if total is not None else _len(records)
+        self.done = 0
+        self.cancelled = False
+
+    def __iter__(self):
+        for record in self.records:
+            if self.done % PROGRESS_EVERY == 0:
+                if self.cancel is not None and self.cancel.is_set():
+                    self.cancelled = True
+                    return
+                if self.progress is not None:
+                    self.progress(self.done, self.total)
+            yield record
+            self.done += 1
+        if self.progress is not None:
+            self.progress(self.done, self.total)
+
+
+def _len(records):
+    try:
+        return len(records)
+    except TypeError:
+        return None
+
+
+def _stream(filepath, write, data, progress, cancel, total):
+    feed = _Feed(data, progress, cancel, total)
+    tmp = filepath + ".part"
+    try:
+        with open(tmp, "w", newline="", encoding="utf-8", buffering=BUFFER_SIZE) as f:
+            write(f, feed)
+        if feed.cancelled:
+            os.remove(tmp)
+            return False
+        os.replace(tmp, filepath)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return True
+
+
+def _csv_row(entry):
+    return [entry.get("date", ""), entry.get("details", ""), entry.get("result", "")]
+
+
+def _write_csv(f, records):
+    writer = csv.writer(f)
+    writer.writerow([_("Date"), _("Details"), _("Result")])
+    for entry in records:
+        writer.writerow(_csv_row(entry))
+    writer.writerow([])
+    writer.writerow([_footer()])
+
+
+def _write_json(f, records):
+    head = json.dumps({"app": APP_LABEL, "version": __version__, "_website": WEBSITE,
+                       "exported": datetime.now().isoformat()}, ensure_ascii=False, indent=2)
+    f.write(head[:-2] + ',\n  "data": [')
+    sep = "\n    "
+    for entry in records:
+        f.write(sep + json.dumps(entry, ensure_ascii=False, indent=2).replace("\n", "\n    "))
+        sep = ",\n    "
+    f.write("\n  ]\n}" if sep != "\n    " else "]\n}")
+
+
+def _write_ndjson(f, records):
+    for entry in records:
+        f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")))
+        f.write("\n")
+
+
+@traced(cat="export")
+def export_csv(data, filepath, progress=None, cancel=None, total=None):
     """Export data to CSV with branding footer."""
-    with open(filepath, "w", newline="", encoding="utf-8") as f:
-        writer = csv.writer(f)
-        writer.writerow([_("Date"), _("Details"), _("Result")])
-        for entry in data:
-            writer.writerow([entry.get("date", ""), entry.get("details", ""), entry.get("result", "")])
-        writer.writerow([])
-        writer.writerow([_footer()])
+    return _stream(filepath, _write_csv, data, progress, cancel, total)
 
 
-def export_json(data, filepath):
+@traced(cat="export")
+def export_json(data, filepath, progress=None, cancel=None, total=None):
     """Export data to JSON with branding."""
-    out = {
-        "app": APP_LABEL,
-        "version": __version__,
-        "_website": WEBSITE,
-        "exported": datetime.now().isoformat(),
-        "data": data,
-    }
-    with open(filepath, "w", encoding="utf-8") as f:
-        json.dump(out, f, ensure_ascii=False, indent=2)
+    return _stream(filepath, _write_json, data, progress, cancel, total)
+
+
+@traced(cat="export")
+def export_ndjson(data, filepath, progress=None, cancel=None, total=None):
+    """Export data as newline-delimited JSON, one compact record per line."""
+    return _stream(filepath, _write_ndjson, data, progress, cancel, total)
 
 
 def export_pdf(data, filepath):
@@ -48,3 +132,132 @@ def export_pdf(data, filepath):
     lines.extend(["", _footer()])
     with open(filepath, "w", encoding="utf-8") as f:
         f.write("\n".join(lines))
+
+
+# ── Incremental export ───────────────────────────────────────
+
+
+class _Appender:
+    """Append rows to one target file, rotating it past ``max_bytes``."""
+
+    def __init__(self, path, fmt, max_bytes=None):
+        self.path, self.fmt, self.max_bytes = path, fmt, max_bytes
+        self._buf = io.StringIO()
+        self._csv = csv.writer(self._buf)
+        self._open()
+
+    def _open(self):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._f = open(self.path, "ab", buffering=BUFFER_SIZE)
+        self.size = self._f.tell()
+        if not self.size and self.fmt == "csv":
+            self._csv_line([_("Date"), _("Details"), _("Result")])
+
+    def _csv_line(self, values):
+        self._buf.seek(0)
+        self._buf.truncate()
+        self._csv.writerow(values)
+        self._emit(self._buf.getvalue())
+
+    def _emit(self, text):
+        data = text.encode("utf-8")
+        self._f.write(data)
+        self.size += len(data)
+
+    def write(self, entry):
+        if self.max_bytes and self.size >= self.max_bytes:
+            self._rotate()
+        if self.fmt == "csv":
+            self._csv_line(_csv_row(entry))
+        else:
+            self._emit(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    def _rotate(self):
+        self._f.close()
+        base, ext = os.path.splitext(self.path)
+        n = 1
+        while os.path.exists(f"{base}.{n}{ext}"):
+            n += 1
+        os.replace(self.path, f"{base}.{n}{ext}")
+        self._open()
+
+    def close(self):
+        self._f.flush()
+        os.fsync(self._f.fileno())
+        self._f.close()
+
+
+def _month_path(path, entry):
+    base, ext = os.path.splitext(path)
+    month = str(entry.get("date", ""))[:7] or datetime.now().strftime("%Y-%m")
+    return f"{base}-{month}{ext}"
+
+
+class IncrementalExport:
+    """Append only new history records to CSV or NDJSON targets.
+
+    A watermark (the history cursor of the last record written) is kept
+    per target in ``state_path``, so each run costs time proportional to
+    the records added since the previous one. ``rotate="size"`` moves a
+    target aside as ``name.N.ext`` once it reaches ``max_bytes``;
+    ``rotate="month"`` writes each record to ``name-YYYY-MM.ext`` by its
+    date. Incremental CSV has a header but no footer, since it never ends.
+    """
+
+    FORMATS = ("csv", "ndjson")
+
+    def __init__(self, state_path):
+        self.state_path = state_path
+        try:
+            with open(state_path, encoding="utf-8") as f:
+                self._state = json.load(f)
+        except (OSError, ValueError):
+            self._state = {}
+
+    def watermark(self, path):
+        return self._state.get(os.path.abspath(path))
+
+    def reset(self, path):
+        """Forget the watermark so the next run exports everything again."""
+        if self._state.pop(os.path.abspath(path), None) is not None:
+            self._save()
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.state_path) or ".", exist_ok=True)
+        tmp = self.state_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self._state, f)
+        os.replace(tmp, self.state_path)
+
+    @traced(cat="export")
+    def run(self, history, path, row=None, rotate=None, max_bytes=ROTATE_BYTES,
+            progress=None, cancel=None):
+        """Append records newer than the watermark; return how many.
+
+        ``history`` is any backend with ``changes(cursor)``; ``row`` maps
+        a record to what is written. A cancelled run keeps the records
+        already written and moves the watermark to the last of them.
+        """
+        fmt = os.path.splitext(path)[1][1:].lower()
+        if fmt not in self.FORMATS:
+            raise ValueError(f"unsupported incremental format: {fmt}")
+        if rotate not in (None, "size", "month"):
+            raise ValueError(f"unknown rotation: {rotate}")
+        key = os.path.abspath(path)
+        feed = _Feed(history.changes(self._state.get(key)), progress, cancel)
+        targets, last, written = {}, None, 0
+        try:
+            for cursor, record in feed:
+                dest = _month_path(path, record) if rotate == "month" else path
+                out = targets.get(dest)
+                if out is None:
+                    out = targets[dest] = _Appender(dest, fmt, max_bytes if rotate == "size" else None)
+                out.write(row(record) if row else record)
+                last, written = cursor, written + 1
+        finally:
+            for out in targets.values():
+                out.close()
+            if last is not None:
+                self._state[key] = last
+                self._save()
+        return written
@@ -0,0 +1,204 @@
+"""Gradual exposure programs and their sample-accurate scheduler."""
+import json
+import os
+from collections import deque
+
+import numpy as np
+
+N_ = lambda s: s
+
+# A program is plain data: a starting sound and a list of steps.
+#   {"ramp": [from, to], "seconds": s}  move the volume (percent) linearly
+#   {"hold": s}                         keep the current volume
+#   {"volume": v}                       jump to a volume
+#   {"swap": "Traffic"}                 continue with another sound
+# "stop_on" lists the comfort ratings that end the program early.
+BUILTIN_PROGRAMS = [
+    {"id": "gentle-rain", "name": N_("Gentle rain"), "sound": "Rain",
+     "stop_on": ["uncomfortable"], "steps": [
+         {"ramp": [5, 20], "seconds": 60}, {"hold": 60},
+         {"ramp": [20, 35], "seconds": 60}, {"hold": 120}]},
+    {"id": "household", "name": N_("Household sounds"), "sound": "Vacuum cleaner",
+     "stop_on": ["uncomfortable"], "steps": [
+         {"ramp": [5, 15], "seconds": 45}, {"hold": 45},
+         {"ramp": [15, 30], "seconds": 45}, {"hold": 60},
+         {"swap": "Doorbell"}, {"volume": 15}, {"hold": 30},
+         {"ramp": [15, 30], "seconds": 45}, {"hold": 60}]},
+    {"id": "street", "name": N_("Busy street"), "sound": "Traffic",
+     "stop_on": ["uncomfortable"], "steps": [
+         {"ramp": [5, 25], "seconds": 90}, {"hold": 90},
+         {"swap": "Phone ringing"}, {"volume": 10}, {"hold": 30},
+         {"swap": "Traffic"}, {"ramp": [25, 40], "seconds": 90}, {"hold": 120}]},
+]
+
+JUMP = 0.01
+FADE = 1.5
+
+
+def load_programs(directory=None):
+    """Return the built-in programs followed by valid user programs.
+
+    A user program without a name is shown under its id, which defaults
+    to the file name.
+    """
+    programs = list(BUILTIN_PROGRAMS)
+    if directory and os.path.isdir(directory):
+        for fname in sorted(os.listdir(directory)):
+            if not fname.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(directory, fname), encoding="utf-8") as f:
+                    data = json.load(f)
+                if not isinstance(data, dict):
+                    continue
+                Program(data)
+            except (OSError, ValueError, KeyError, TypeError):
+                continue
+            data.setdefault("id", fname[:-5])
+            if not isinstance(data.get("name"), str) or not data["name"]:
+                data["name"] = str(data["id"])
+            programs.append(data)
+    return programs
+
+
+class Program:
+    """A program compiled to frame positions at one sample rate."""
+
+    def __init__(self, data, sr=44100):
+        self.data, self.sr = data, sr
+        self.id = data.get("id", "")
+        self.stop_on = tuple(data.get("stop_on", ()))
+        frame, gain, sound = 0, 0.0, data["sound"]
+        xs, ys = [0], [0.0]
+        self.segments = []
+        self.marks = []
+        seg_start = 0
+        for index, step in enumerate(data["steps"]):
+            self.marks.append((frame, index))
+            if "swap" in step:
+                self.segments.append((seg_start, frame, sound))
+                seg_start, sound = frame, step["swap"]
+            if "ramp" in step:
+                a, b = (v / 100 for v in step["ramp"])
+                if a != gain:
+                    frame += int(JUMP * sr)
+                    xs.append(frame), ys.append(a)
+                frame += int(float(step["seconds"]) * sr)
+                xs.append(frame), ys.append(b)
+                gain = b
+            elif "volume" in step:
+                frame += int(JUMP * sr)
+                gain = step["volume"] / 100
+                xs.append(frame), ys.append(gain)
+            elif "hold" in step:
+                frame += int(float(step["hold"]) * sr)
+                xs.append(frame), ys.append(gain)
+        self.segments.append((seg_start, frame, sound))
+        self.length = frame
+        self._xs = np.asarray(xs, dtype=np.float64)
+        self._ys = np.asarray(ys, dtype=np.float64)
+
+    @property
+    def sounds(self):
+        return list(dict.fromkeys(s for _a, _b, s in self.segments))
+
+    def gain_at(self, frame):
+        return float(np.interp(frame, self._xs, self._ys))
+
+    def sound_at(self, frame):
+        for start, end, sound in self.segments:
+            if start <= frame < end:
+                return sound
+        return self.segments[-1][2]
+
+    def envelope(self, frames, out):
+        out[:] = np.interp(frames, self._xs, self._ys)
+
+
+class ExposureSession:
+    """Mixer source and gain automation that plays one program.
+
+    Add it to a mixer with ``mixer.add(session, automation=session.automation)``.
+    Step changes and stops are queued as ``(frame, kind, value)`` events
+    from the audio thread; ``drain_events`` hands them to the main loop,
+    and ``frame / sr`` gives the exact offset into the program.
+    """
+
+    def __init__(self, program, buffers):
+        self.program = program
+        self._buffers = buffers
+        self.frame = 0
+        self.stopped_at = None
+        self.stop_reason = None
+        self._events = deque([(0, "start", program.id)])
+        self._next_mark = 0
+        self._pos = None
+        self._fade = int(FADE * program.sr)
+
+    @property
+    def end(self):
+        if self.stopped_at is not None:
+            return min(self.program.length, self.stopped_at + self._fade)
+        return self.program.length
+
+    @property
+    def volume(self):
+        """Current program volume in percent."""
+        return round(self.program.gain_at(self.frame) * 100)
+
+    def stop(self, reason):
+        """Fade out from the current position and end the program."""
+        if self.stopped_at is None:
+            self.stopped_at = self.frame
+            self.stop_reason = reason
+            self._events.append((self.frame, "stop", reason))
+
+    def rating(self, rating):
+        """Apply a comfort rating; return True if it stopped the program."""
+        if rating in self.program.stop_on:
+            self.stop(rating)
+            return True
+        return False
+
+    def drain_events(self):
+        events = []
+        while self._events:
+            events.append(self._events.popleft())
+        return events
+
+    def read_into(self, out):
+        start = self.frame
+        n = max(0, min(len(out), self.end - start))
+        done = 0
+        for seg_start, seg_end, sound in self.program.segments:
+            lo, hi = max(seg_start, start), min(seg_end, start + n)
+            if lo >= hi:
+                continue
+            buf = self._buffers[sound]
+            pos = (lo - seg_start) % len(buf)
+            o = lo - start
+            while o < hi - start:
+                take = min(hi - start - o, len(buf) - pos)
+                out[o:o + take] = buf[pos:pos + take]
+                o += take
+                pos = 0
+            done = hi - start
+        marks = self.program.marks
+        while self._next_mark < len(marks) and marks[self._next_mark][0] < start + n:
+            frame, index = marks[self._next_mark]
+            self._events.append((frame, "step", index))
+            self._next_mark += 1
+        self.frame = start + done
+        if done < len(out) and self.stopped_at is None:
+            self._events.append((self.frame, "end", None))
+        return done
+
+    def automation(self, frame, gains):
+        if self._pos is None or len(self._pos) != len(gains):
+            self._pos = np.arange(len(gains), dtype=np.float64)
+            self._ramp = self._pos.copy()
+        np.add(self._ramp, frame, out=self._pos)
+        self.program.envelope(self._pos, gains)
+        if self.stopped_at is not None:
+            fade = np.clip((self.end - self._pos) / self._fade, 0.0, 1.0)
+            gains *= fade
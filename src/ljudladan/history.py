@@ -0,0 +1,35 @@
+"""Location and fields of the session history, without GLib."""
+import json
+import os
+
+from ljudladan.journal import Journal
+from ljudladan.paths import config_dir
+
+SESSION_FIELDS = ("date", "sound", "category", "volume", "comfort")
+
+
+def history_backend(directory=None):
+    """The backend chosen in settings.json: "journal" or "sqlite"."""
+    try:
+        with open(os.path.join(directory or config_dir(), "settings.json")) as f:
+            return json.load(f).get("history_backend", "journal")
+    except (OSError, ValueError, AttributeError):
+        return "journal"
+
+
+def open_history(backend="journal", directory=None):
+    """Open the session history in ``directory`` (default: the config dir)."""
+    directory = directory or config_dir()
+    journal = Journal(os.path.join(directory, "sessions.jsonl"), SESSION_FIELDS,
+                      legacy_path=os.path.join(directory, "sessions.json"))
+    if backend == "sqlite":
+        from ljudladan.store import HistoryStore
+        return HistoryStore(os.path.join(directory, "sessions.db"), SESSION_FIELDS,
+                            indexed=SESSION_FIELDS, table="sessions", migrate_from=journal)
+    return journal
+
+
+def export_row(record):
+    """Shape a session record for the date/details/result export columns."""
+    return {"date": record.get("date", ""), "details": record.get("comfort", record.get("sound", "")),
+            "result": f'vol:{record.get("volume", "")}'}
@@ -0,0 +1,166 @@
+"""Gapless looping of rendered clips with equal-power crossfades.
+
+A clip is analysed once into a :class:`LoopPlan`: the loop end is the
+point in its last seconds whose following samples best match its start,
+and the loop is cut into segments that all end with ``fade`` samples of
+tail. Wherever playback jumps, the tail of the segment just played fades
+out under the head of the next. The curves keep the power level: for
+uncorrelated material such as noise, rain or waves that is the usual
+equal-power fade, and where the plan measured the two sides to be alike
+it leans towards equal gain, which avoids a bump of up to 3 dB.
+
+:class:`LoopSource` plays a plan forever as a mixer source. Segments
+follow in order, or in random order with ``variations`` so a half-hour
+clip does not repeat audibly over a night. Playing only slices the clip
+and adds during fades, so CPU and memory stay constant however long it
+runs. :func:`seamless` bakes the single loop into a buffer for players
+that loop by wrapping around.
+"""
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+# Bump when the loop analysis changes so cached seamless buffers are redone.
+VERSION = 1
+FADE_SECONDS = 1.5
+SEGMENT_SECONDS = 6.0
+SEARCH_SECONDS = 2.0
+
+# ``bounds`` are the ``(start, end)`` sample ranges of the segments; the
+# ``fade`` samples after each end are its tail. ``similarity[i][j]`` is
+# the correlation of the tail of segment i with the head of segment j.
+LoopPlan = namedtuple("LoopPlan", "bounds fade similarity")
+
+
+@lru_cache(maxsize=32)
+def _fades(n, rho=0.0):
+    """Fade-in and fade-out curves keeping the power of signals correlated by ``rho``."""
+    t = (np.arange(n) + 0.5) * (np.pi / 2 / n)
+    a, b = np.sin(t) ** 2, np.cos(t) ** 2
+    norm = np.sqrt(a * a + b * b + 2 * rho * a * b)
+    fade_in, fade_out = (a / norm).astype(np.float32), (b / norm).astype(np.float32)
+    fade_in.flags.writeable = fade_out.flags.writeable = False
+    return fade_in, fade_out
+
+
+def _rho(similarity):
+    return round(min(1.0, max(0.0, similarity)), 1)
+
+
+def find_loop_end(data, fade, lo, hi):
+    """``(end, score)`` for the end in ``[lo, hi]`` whose next ``fade``
+    samples correlate best with the first ``fade``; score is in [-1, 1]."""
+    x = np.asarray(data[lo:hi + fade], dtype=np.float64)
+    head = np.asarray(data[:fade], dtype=np.float64)
+    count = hi - lo + 1
+    nfft = 1 << (len(x) + fade - 1).bit_length()
+    corr = np.fft.irfft(np.fft.rfft(x, nfft) * np.conj(np.fft.rfft(head, nfft)), nfft)[:count]
+    power = np.concatenate(([0.0], np.cumsum(x * x)))
+    energy = (power[fade:fade + count] - power[:count]) * head.dot(head)
+    score = corr / np.sqrt(np.maximum(energy, 1e-20))
+    k = int(np.argmax(score))
+    return lo + k, float(score[k])
+
+
+def plan_loop(data, sr, fade=FADE_SECONDS, segment=SEGMENT_SECONDS, search=SEARCH_SECONDS):
+    """Analyse ``data`` into loop segments of about ``segment`` seconds.
+
+    Pass ``segment=None`` for one segment spanning the whole loop.
+    """
+    fade = max(1, int(fade * sr))
+    last = len(data) - fade
+    if last < 3 * fade:
+        raise ValueError(f"clip of {len(data)} samples is too short to loop")
+    end, _score = find_loop_end(data, fade, max(2 * fade, last - int(search * sr)), last)
+    count = 1 if segment is None else max(1, min(round(end / (segment * sr)), end // (2 * fade)))
+    edges = np.linspace(0, end, count + 1).astype(int).tolist()
+    heads = np.stack([data[e:e + fade] for e in edges[:-1]]).astype(np.float64)
+    tails = np.stack([data[e:e + fade] for e in edges[1:]]).astype(np.float64)
+    norms = np.sqrt(np.maximum(np.outer((tails * tails).sum(1), (heads * heads).sum(1)), 1e-20))
+    similarity = (tails @ heads.T / norms).round(3).tolist()
+    return LoopPlan(tuple(zip(edges[:-1], edges[1:])), fade, tuple(map(tuple, similarity)))
+
+
+def seamless(data, sr, fade=FADE_SECONDS, plan=None):
+    """A copy of ``data`` cut to its loop, with the seam crossfaded in."""
+    plan = plan or plan_loop(data, sr, fade, None)
+    end, fade = plan.bounds[-1][1], plan.fade
+    fade_in, fade_out = _fades(fade, _rho(plan.similarity[-1][0]))
+    out = np.array(data[:end], dtype=np.float32)
+    out[:fade] *= fade_in
+    out[:fade] += data[end:end + fade] * fade_out
+    return out
+
+
+class LoopSource:
+    """Play ``data`` looped by ``plan``, forever, as a mixer source.
+
+    With ``variations`` each segment is followed by a random other one,
+    and ``jitter_db`` varies the level of each segment by up to that
+    much, both from ``seed``.
+    """
+
+    def __init__(self, data, plan, variations=False, jitter_db=0.0, seed=None):
+        self.data = data
+        self.plan = plan
+        self.variations = variations and len(plan.bounds) > 1
+        self.jitter_db = jitter_db
+        self._rng = np.random.default_rng(seed)
+        self._fade_in, self._fade_out = _fades(plan.fade)
+        self._scratch = np.zeros(0, dtype=np.float32)
+        self._seg = 0
+        self._pos = 0
+        self._gain = 1.0
+        self._tail = None
+        self._tail_gain = 1.0
+        self.frames = 0
+
+    def _next(self):
+        count = len(self.plan.bounds)
+        if self.variations:
+            seg = int(self._rng.integers(count - 1))
+            return seg + (seg >= self._seg)
+        return (self._seg + 1) % count
+
+    def _advance(self):
+        prev, end = self._seg, self.plan.bounds[self._seg][1]
+        self._seg = self._next()
+        # Running on into the next segment needs no crossfade.
+        self._tail = None if self.plan.bounds[self._seg][0] == end else end
+        if self._tail is not None:
+            rho = _rho(self.plan.similarity[prev][self._seg])
+            self._fade_in, self._fade_out = _fades(self.plan.fade, rho)
+        self._tail_gain = self._gain
+        if self.jitter_db:
+            self._gain = 10 ** (self._rng.uniform(-self.jitter_db, self.jitter_db) / 20)
+        self._pos = 0
+
+    def read_into(self, out):
+        n, data, fade = len(out), self.data, self.plan.fade
+        if len(self._scratch) < n:
+            self._scratch = np.zeros(n, dtype=np.float32)
+        done = 0
+        while done < n:
+            start, end = self.plan.bounds[self._seg]
+            pos = self._pos
+            take = min(n - done, end - start - pos)
+            dst = out[done:done + take]
+            dst[:] = data[start + pos:start + pos + take]
+            if self._gain != 1.0:
+                dst *= self._gain
+            if self._tail is not None and pos < fade:
+                k = min(take, fade - pos)
+                dst[:k] *= self._fade_in[pos:pos + k]
+                tail = self._scratch[:k]
+                np.multiply(data[self._tail + pos:self._tail + pos + k],
+                            self._fade_out[pos:pos + k], out=tail)
+                if self._tail_gain != 1.0:
+                    tail *= self._tail_gain
+                dst[:k] += tail
+            self._pos += take
+            done += take
+            if self._pos >= end - start:
+                self._advance()
+        self.frames += n
+        return n
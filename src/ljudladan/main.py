@@ -1,12 +1,16 @@
 import os
 """Ljudlådan - Sound sensitivity training."""
-import sys, os, json, gettext, locale
+import sys, os, gettext, locale, math, threading
 import gi
 gi.require_version('Gtk', '4.0')
 gi.require_version('Adw', '1')
 from gi.repository import Gtk, Adw, Gio, GLib, Gdk
 from ljudladan import __version__
 from ljudladan.accessibility import apply_large_text
+from ljudladan.history import export_row, open_history
+from ljudladan.persistence import PersistenceWorker
+from ljudladan.trace import instant, start_watchdog, traced
+from ljudladan.undo_redo import UndoRedoManager
 
 TEXTDOMAIN = "ljudladan"
 for p in [os.path.join(os.path.dirname(__file__), "locale"), "/usr/share/locale"]:
@@ -18,35 +22,132 @@ gettext.textdomain(TEXTDOMAIN)
 _ = gettext.gettext
 
 CONFIG_DIR = os.path.join(GLib.get_user_config_dir(), "ljudladan")
-SESSIONS_FILE = os.path.join(CONFIG_DIR, "sessions.json")
-
-SOUND_CATEGORIES = [
-    {"name": _("Nature"), "emoji": "\U0001f333", "sounds": [
-        _("Rain"), _("Wind"), _("Birds singing"), _("Thunder"), _("Ocean waves")]},
-    {"name": _("Animals"), "emoji": "\U0001f436", "sounds": [
-        _("Dog barking"), _("Cat meowing"), _("Cow mooing"), _("Horse neighing"), _("Rooster crowing")]},
-    {"name": _("Music"), "emoji": "\U0001f3b5", "sounds": [
-        _("Piano"), _("Guitar"), _("Drums"), _("Violin"), _("Flute")]},
-    {"name": _("Everyday"), "emoji": "\U0001f3e0", "sounds": [
-        _("Doorbell"), _("Vacuum cleaner"), _("Alarm clock"), _("Traffic"), _("Phone ringing")]},
-]
-
-def _load_sessions():
+SOUND_CACHE_DIR = os.path.join(GLib.get_user_cache_dir(), "ljudladan", "sounds")
+PROGRAMS_DIR = os.path.join(CONFIG_DIR, "programs")
+EXPORT_STATE_FILE = os.path.join(CONFIG_DIR, "export_state.json")
+UNDO_FILE = os.path.join(CONFIG_DIR, "undo.json")
+CLIP_SECONDS = 30
+METER_INTERVAL = 500
+RENDER_MINUTES = (15, 30, 60)
+RENDER_DEFAULT = ("Rain", "Ocean waves")
+AUDIO_CACHE_BUDGET = 64 * 1024 * 1024
+COMPACT_INTERVAL = 600
+LOAD_CHUNK = 5000
+LOOP_JITTER_DB = 1.0
+_UNSET = object()
+_sound_library = None
+
+def _open_history(backend="journal"):
+    return open_history(backend, CONFIG_DIR)
+
+def _audio_cache():
     try:
-        with open(SESSIONS_FILE) as f: return json.load(f)
-    except: return []
-
-def _save_sessions(s):
-    os.makedirs(CONFIG_DIR, exist_ok=True)
-    with open(SESSIONS_FILE, "w") as f: json.dump(s[-200:], f, ensure_ascii=False, indent=2)
+        from ljudladan.cache import AudioCache
+    except ImportError:
+        return None
+    from ljudladan import loop, resample, synth
+    # Spilled buffers are only valid for the code and packs that made them.
+    tag = f"s{synth.VERSION}-l{loop.VERSION}-r{resample.DEFAULT_QUALITY}-{_library().fingerprint()}"
+    cache = AudioCache(budget=AUDIO_CACHE_BUDGET, spill_dir=os.path.join(SOUND_CACHE_DIR, "buffers"),
+                       tag=tag)
+    threading.Thread(target=cache.prune, name="cache-prune", daemon=True).start()
+    return cache
+
+def _render_buffer(sound, cache):
+    """Return a looping clip of ``sound``, synthesizing it on a cache miss.
+
+    Recordings at the mixer rate are played straight from the pack;
+    others are resampled once and kept in ``cache``.
+    """
+    from ljudladan import synth
+    recorded = _library().recorded(sound)
+    if recorded is not None:
+        data, sr = recorded
+        if sr == synth.SAMPLE_RATE:
+            return data
+        from ljudladan.resample import resample
+        key = (sound, 1.0, len(data) / sr, synth.SAMPLE_RATE)
+        return cache.get_or_render(key, lambda: resample(data, sr, synth.SAMPLE_RATE))
+    key = (sound, 1.0, CLIP_SECONDS, synth.SAMPLE_RATE)
+    return cache.get_or_render(key, lambda: synth.render(sound, CLIP_SECONDS))
+
+def _loop_plan(sound, buf, plans):
+    """Loop points of ``buf``, analysed once per sound; None if it is too short."""
+    from ljudladan import synth
+    from ljudladan.loop import plan_loop
+    key = (sound, len(buf))
+    if key not in plans:
+        try:
+            plans[key] = plan_loop(buf, synth.SAMPLE_RATE)
+        except ValueError:
+            plans[key] = None
+    return plans[key]
+
+def _loop_buffer(sound, cache, plans):
+    """A clip of ``sound`` whose end runs seamlessly into its start."""
+    from ljudladan import synth
+    from ljudladan.loop import seamless
+    buf = _render_buffer(sound, cache)
+    plan = _loop_plan(sound, buf, plans)
+    if plan is None:
+        return buf
+    key = (sound, 1.0, plan.bounds[-1][1] / synth.SAMPLE_RATE, synth.SAMPLE_RATE)
+    return cache.get_or_render(key, lambda: seamless(buf, synth.SAMPLE_RATE, plan=plan))
+
+def _library():
+    """The base pack with the other installed packs over it, opened on first use."""
+    global _sound_library
+    if _sound_library is None:
+        from ljudladan.pack import load_library
+        _sound_library = load_library()
+    return _sound_library
+
+def _category_of(sound):
+    category = _library().category_of(sound)
+    return _(category) if category else ""
+
+def _read_history(history, progress=None):
+    """Read the history in chunks and build its statistics; runs off the main loop.
+
+    Read errors are raised so the callback can report them.
+    """
+    from itertools import islice
+    from ljudladan.stats import Stats
+    records, rows = [], iter(history)
+    while chunk := list(islice(rows, LOAD_CHUNK)):
+        records.extend(chunk)
+        if progress is not None:
+            progress(len(records))
+    return records, Stats.from_history(records)
+
+def _stats_line(agg):
+    parts = [_("%d plays") % agg.plays]
+    if agg.rated:
+        parts.append(_("%d%% comfortable") % (agg.comfort * 100))
+    if agg.tolerated_n:
+        parts.append(_("tolerated %d%%") % agg.tolerated_volume)
+    return " · ".join(parts)
+
+def _call_once(callback, args):
+    callback(*args)
+    return False
+
+def after_first_frame(widget, callback, *args):
+    """Run ``callback(*args)`` from the main loop once ``widget`` has painted."""
+    def on_map(_widget):
+        widget.disconnect(map_id)
+        clock = widget.get_frame_clock()
+        def on_paint(_clock):
+            clock.disconnect(paint_id)
+            GLib.idle_add(_call_once, callback, args)
+        paint_id = clock.connect("after-paint", on_paint)
+    map_id = widget.connect("map", on_map)
 
 
 
 def _settings_path():
     xdg = os.environ.get("XDG_CONFIG_HOME", os.path.expanduser("~/.config"))
-    d = os.path.join(xdg, "ljudladan")
-    os.makedirs(d, exist_ok=True)
-    return os.path.join(d, "settings.json")
+    return os.path.join(xdg, "ljudladan", "settings.json")
 
 def _load_settings():
     p = _settings_path()
@@ -56,36 +157,89 @@ def _load_settings():
             return json.load(f)
     return {}
 
+@traced(cat="persistence")
 def _save_settings(s):
     import json
-    with open(_settings_path(), "w") as f:
+    path = _settings_path()
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
         json.dump(s, f, indent=2)
 
 class SoundApp(Adw.Application):
+    """The application; settings and history are opened on first use.
+
+    Nothing touches the disk before the first window has painted: the
+    window asks for its history from an ``after_first_frame`` callback.
+    """
+
     def __init__(self):
         super().__init__(application_id="se.danielnylander.ljudladan",
                          flags=Gio.ApplicationFlags.DEFAULT_FLAGS)
+        self._settings = None
+        self._history = None
+        self.plugins = None
+
+    @property
+    def settings(self):
+        if self._settings is None:
+            self._settings = _load_settings()
+        return self._settings
+
+    @property
+    def history(self):
+        if self._history is None:
+            self._history = _open_history(self.settings.get("history_backend", "journal"))
+        return self._history
 
     def do_activate(self):
-        apply_large_text()
-        win = self.props.active_window or SoundWindow(application=self)
+        win = self.props.active_window
+        if win is None:
+            win = SoundWindow(application=self)
+            after_first_frame(win, self._on_first_frame, win)
         win.present()
+
+    def _on_first_frame(self, win):
+        win.load_data()
+        # The plugin folder is scanned on the persistence thread, like the
+        # history, so the main loop stays free right after the first paint.
+        self.persistence.read(lambda: _load_plugins("ljudladan"),
+                              lambda plugins, error: self._on_plugins_loaded(win, plugins, error))
         if not self.settings.get("welcome_shown"):
             self._show_welcome(win)
 
+    def _on_plugins_loaded(self, win, plugins, error):
+        if error is not None:
+            print(f"Plugins: {error}", file=sys.stderr)
+            return
+        self.plugins = plugins
+        plugins.call("on_window_ready", win)
 
     def do_startup(self):
         Adw.Application.do_startup(self)
+        apply_large_text()
+        self.persistence = PersistenceWorker(notify=GLib.idle_add)
+        start_watchdog(GLib.timeout_add)
         for name, cb, accel in [
             ("quit", lambda *_: self.quit(), "<Control>q"),
             ("about", self._on_about, None),
             ("export", self._on_export, "<Control>e"),
+            ("render", self._on_render, None),
+            ("undo", self._on_undo, "<Control>z"),
+            ("redo", self._on_redo, "<Control><Shift>z"),
         ]:
             a = Gio.SimpleAction.new(name, None)
             a.connect("activate", cb)
             self.add_action(a)
             if accel: self.set_accels_for_action(f"app.{name}", [accel])
 
+    def do_shutdown(self):
+        if self.plugins is not None:
+            instant("plugin timings", plugins=self.plugins.timings())
+        self.persistence.close()
+        if self._history is not None:
+            self._history.close()
+        Adw.Application.do_shutdown(self)
+
     def _on_about(self, *_args):
         d = Adw.AboutDialog(application_name=_("Sound Box"), application_icon="ljudladan",
             version=__version__, developer_name="Daniel Nylander", website="https://www.autismappar.se",
@@ -93,17 +247,193 @@ class SoundApp(Adw.Application):
             copyright="\u00a9 2026 Daniel Nylander")
         d.present(self.props.active_window)
 
+    @traced
     def _on_export(self, *_args):
         w = self.props.active_window
         if w: w.do_export()
 
+    def _on_render(self, *_args):
+        w = self.props.active_window
+        if w: w.do_render()
+
+    def _on_undo(self, *_args):
+        w = self.props.active_window
+        if w: w.undo.undo()
+
+    def _on_redo(self, *_args):
+        w = self.props.active_window
+        if w: w.undo.redo()
+
+    # ── Welcome Dialog ───────────────────────────────────────
+
+    def _show_welcome(self, win):
+        dialog = Adw.Dialog()
+        dialog.set_title(_("Welcome"))
+        dialog.set_content_width(420)
+        dialog.set_content_height(480)
+
+        page = Adw.StatusPage()
+        page.set_icon_name("ljudladan")
+        page.set_title(_("Welcome to Sound Box"))
+        page.set_description(_(
+            "Explore sounds and practice sound sensitivity.\n\n✓ Categorized sound library\n✓ Adjustable volume levels\n✓ Gradual exposure training\n✓ Safe, controlled environment"
+        ))
+
+        btn = Gtk.Button(label=_("Get Started"))
+        btn.add_css_class("suggested-action")
+        btn.add_css_class("pill")
+        btn.set_halign(Gtk.Align.CENTER)
+        btn.set_margin_top(12)
+        btn.connect("clicked", self._on_welcome_close, dialog)
+        page.set_child(btn)
+
+        box = Adw.ToolbarView()
+        hb = Adw.HeaderBar()
+        hb.set_show_title(False)
+        box.add_top_bar(hb)
+        box.set_content(page)
+        dialog.set_child(box)
+        dialog.present(win)
+
+    def _on_welcome_close(self, btn, dialog):
+        self.settings["welcome_shown"] = True
+        self.persistence.replace("settings", _save_settings, dict(self.settings))
+        dialog.close()
+
 
 class SoundWindow(Adw.ApplicationWindow):
     def __init__(self, **kwargs):
         super().__init__(**kwargs, default_width=500, default_height=650, title=_("Sound Box"))
-        self.sessions = _load_sessions()
+        self.sessions = []
+        self.stats = None
+        self.programs = []
         self.volume = 30
+        self.current_sound = None
+        self._audio_cache = _UNSET
+        self.mixer = None
+        self.output = None
+        self.layers = {}
+        self.loop_plans = {}
+        self.current_track = None
+        self.exposure = None
+        self.exposure_track = None
+        self.undo = UndoRedoManager(apply=self._apply_setting, path=UNDO_FILE)
+        self._applying = False
+        self._cancel = threading.Event()
         self._build_ui()
+        self.connect("close-request", self._on_close)
+
+    @property
+    def history(self):
+        return self.get_application().history
+
+    @property
+    def audio_cache(self):
+        """The sound buffer cache, or None without NumPy; imported on first use."""
+        if self._audio_cache is _UNSET:
+            self._audio_cache = _audio_cache()
+        return self._audio_cache
+
+    @traced
+    def load_data(self):
+        """Start loading history and training programs once the window is on screen.
+
+        The history is read on the persistence thread, behind any session
+        already queued for writing; sessions recorded while it loads are
+        kept and merged after it.
+        """
+        history, pending = self.history, len(self.sessions)
+        self.status_label.set_label(_("Loading history…"))
+        def progress(n):
+            GLib.idle_add(self._on_history_progress, n)
+        self.get_application().persistence.read(
+            lambda: _read_history(history, progress),
+            lambda result, error: self._on_history_loaded(pending, result, error))
+        self.get_application().persistence.read(_library, self._on_library_loaded)
+        # The volume is kept in settings so the restored undo steps still
+        # lead to it; steps that do not are dropped by load().
+        volume = self.get_application().settings.get("volume")
+        if isinstance(volume, int) and 0 <= volume <= 100:
+            self._apply_setting("volume", volume)
+        self.undo.load(current={"volume": self.volume})
+        self._load_programs()
+
+    def _on_library_loaded(self, library, error):
+        if error is not None:
+            print(f"Sound library: {error}", file=sys.stderr)
+            from ljudladan import catalog
+            categories = catalog.categories()
+        else:
+            categories = library.categories()
+        if categories != self._categories:
+            self._categories = categories
+            self._fill_categories()
+        return False
+
+    def _fill_categories(self):
+        while (child := self.cat_box.get_first_child()) is not None:
+            self.cat_box.remove(child)
+        for cat in self._categories:
+            frame = Gtk.Frame()
+            inner = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=4)
+
+            cat_label = Gtk.Label()
+            cat_label.set_markup(f'{cat["emoji"]} <b>{GLib.markup_escape_text(_(cat["name"]))}</b>')
+            cat_label.add_css_class("title-3")
+            cat_label.set_margin_top(8)
+            inner.append(cat_label)
+
+            flow = Gtk.FlowBox(max_children_per_line=3, selection_mode=Gtk.SelectionMode.NONE,
+                                homogeneous=True, row_spacing=4, column_spacing=4)
+            flow.set_margin_start(8)
+            flow.set_margin_end(8)
+            flow.set_margin_bottom(8)
+            for sound in cat["sounds"]:
+                btn = Gtk.Button(label=_(sound))
+                btn.add_css_class("pill")
+                btn.connect("clicked", self._on_play_sound, sound, _(cat["name"]))
+                flow.append(btn)
+            inner.append(flow)
+            frame.set_child(inner)
+            self.cat_box.append(frame)
+
+    def _on_history_progress(self, n):
+        if self.stats is None:
+            self.status_label.set_label(_("Loading history: %d sessions") % n)
+        return False
+
+    @traced
+    def _on_history_loaded(self, pending, result, error):
+        from ljudladan.stats import Stats
+        records, stats = result if error is None else ([], Stats())
+        recent = self.sessions[pending:]
+        self.sessions[:] = records + recent
+        for entry in recent:
+            stats.add(entry)
+        self.stats = stats
+        self.status_label.set_label(_("Could not read history: %s") % error if error else "")
+        self._refresh_dashboard()
+        if error is not None:
+            # Leave a history that could not be read as it is on disk.
+            return
+        self._compact_history()
+        GLib.timeout_add_seconds(COMPACT_INTERVAL, self._compact_history)
+
+    def _load_programs(self):
+        try:
+            from ljudladan.exposure import load_programs
+            self.programs = load_programs(PROGRAMS_DIR)
+        except ImportError:
+            self.programs = []
+        if not self.programs:
+            return
+        self.program_dd = Gtk.DropDown.new_from_strings([_(p["name"]) for p in self.programs])
+        self.prog_box.append(self.program_dd)
+        self.program_btn = Gtk.Button(label=_("Start training"))
+        self.program_btn.add_css_class("pill")
+        self.program_btn.connect("clicked", self._on_program_toggle)
+        self.prog_box.append(self.program_btn)
+        self.prog_box.set_visible(True)
 
     def _build_ui(self):
         box = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
@@ -113,15 +443,38 @@ class SoundWindow(Adw.ApplicationWindow):
 
         menu = Gio.Menu()
         menu.append(_("Export"), "app.export")
+        menu.append(_("Render Calm Track…"), "app.render")
         menu.append(_("About Sound Box"), "app.about")
         menu.append(_("Quit"), "app.quit")
         header.pack_end(Gtk.MenuButton(icon_name="open-menu-symbolic", menu_model=menu))
 
+        self.cancel_btn = Gtk.Button(icon_name="process-stop-symbolic",
+                                     tooltip_text=_("Cancel"), visible=False)
+        self.cancel_btn.connect("clicked", lambda *_: self._cancel.set())
+        header.pack_start(self.cancel_btn)
+
+        stop_btn = Gtk.Button(icon_name="media-playback-stop-symbolic",
+                              tooltip_text=_("Stop all sounds"))
+        stop_btn.connect("clicked", self._on_stop)
+        header.pack_end(stop_btn)
+
         theme_btn = Gtk.Button(icon_name="weather-clear-night-symbolic",
                                tooltip_text=_("Toggle dark/light theme"))
         theme_btn.connect("clicked", self._toggle_theme)
         header.pack_end(theme_btn)
 
+        stack = Adw.ViewStack(vexpand=True)
+        page = Gtk.Box(orientation=Gtk.Orientation.VERTICAL)
+        stack.add_titled_with_icon(page, "sounds", _("Sounds"), "audio-volume-high-symbolic")
+        self.dashboard = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=12)
+        self.dashboard.set_margin_top(16); self.dashboard.set_margin_bottom(16)
+        self.dashboard.set_margin_start(16); self.dashboard.set_margin_end(16)
+        dash_scroll = Gtk.ScrolledWindow(vexpand=True, child=self.dashboard)
+        stack.add_titled_with_icon(dash_scroll, "dashboard", _("Progress"), "view-list-symbolic")
+        stack.connect("notify::visible-child-name", self._on_page_changed)
+        self.stack = stack
+        switcher = Adw.ViewSwitcherBar(stack=stack, reveal=True)
+
         # Volume control
         vol_box = Gtk.Box(spacing=8, halign=Gtk.Align.CENTER)
         vol_box.set_margin_top(12)
@@ -136,7 +489,7 @@ class SoundWindow(Adw.ApplicationWindow):
         self.vol_value = Gtk.Label(label=f"{self.volume}%")
         self.vol_value.add_css_class("title-4")
         vol_box.append(self.vol_value)
-        box.append(vol_box)
+        page.append(vol_box)
 
         # Comfort rating
         comfort_box = Gtk.Box(spacing=8, halign=Gtk.Align.CENTER)
@@ -149,12 +502,21 @@ class SoundWindow(Adw.ApplicationWindow):
             btn.add_css_class("flat")
             btn.connect("clicked", self._on_comfort, rating)
             comfort_box.append(btn)
-        box.append(comfort_box)
+        page.append(comfort_box)
 
         self.comfort_label = Gtk.Label(label="")
         self.comfort_label.add_css_class("dim-label")
         self.comfort_label.set_margin_top(4)
-        box.append(self.comfort_label)
+        page.append(self.comfort_label)
+
+        self.level_label = Gtk.Label(label="")
+        self.level_label.add_css_class("dim-label")
+        page.append(self.level_label)
+
+        # Gradual exposure programs, filled in by _load_programs
+        self.prog_box = Gtk.Box(spacing=8, halign=Gtk.Align.CENTER, visible=False)
+        self.prog_box.set_margin_top(8)
+        page.append(self.prog_box)
 
         # Sound categories
         scroll = Gtk.ScrolledWindow(vexpand=True)
@@ -163,32 +525,15 @@ class SoundWindow(Adw.ApplicationWindow):
         cat_box.set_margin_start(16)
         cat_box.set_margin_end(16)
 
-        for cat in SOUND_CATEGORIES:
-            frame = Gtk.Frame()
-            inner = Gtk.Box(orientation=Gtk.Orientation.VERTICAL, spacing=4)
-
-            cat_label = Gtk.Label()
-            cat_label.set_markup(f'{cat["emoji"]} <b>{cat["name"]}</b>')
-            cat_label.add_css_class("title-3")
-            cat_label.set_margin_top(8)
-            inner.append(cat_label)
-
-            flow = Gtk.FlowBox(max_children_per_line=3, selection_mode=Gtk.SelectionMode.NONE,
-                                homogeneous=True, row_spacing=4, column_spacing=4)
-            flow.set_margin_start(8)
-            flow.set_margin_end(8)
-            flow.set_margin_bottom(8)
-            for sound in cat["sounds"]:
-                btn = Gtk.Button(label=sound)
-                btn.add_css_class("pill")
-                btn.connect("clicked", self._on_play_sound, sound, cat["name"])
-                flow.append(btn)
-            inner.append(flow)
-            frame.set_child(inner)
-            cat_box.append(frame)
+        # Filled from the sound library once it has loaded after first paint.
+        self.cat_box = cat_box
+        self._categories = []
 
         scroll.set_child(cat_box)
-        box.append(scroll)
+        page.append(scroll)
+
+        box.append(stack)
+        box.append(switcher)
 
         self.status_label = Gtk.Label(label="", xalign=0)
         self.status_label.add_css_class("dim-label")
@@ -197,33 +542,378 @@ class SoundWindow(Adw.ApplicationWindow):
         box.append(self.status_label)
         GLib.timeout_add_seconds(1, self._update_clock)
 
+    @traced
     def _on_volume_change(self, scale):
-        self.volume = int(scale.get_value())
+        old, self.volume = self.volume, int(scale.get_value())
+        if not self._applying:
+            self.undo.set_value("volume", old, self.volume, _("Volume"))
         self.vol_value.set_label(f"{self.volume}%")
+        if self.current_track:
+            self.current_track.set_gain(self.volume / 100)
 
+    @traced
     def _on_comfort(self, btn, rating):
         labels = {"good": _("Feels good!"), "okay": _("It is okay."), "uncomfortable": _("Too much!")}
         self.comfort_label.set_label(labels.get(rating, ""))
         from datetime import datetime
-        self.sessions.append({"date": datetime.now().isoformat(), "volume": self.volume,
-                               "comfort": rating})
-        _save_sessions(self.sessions)
-
+        entry = {"date": datetime.now().isoformat(), "volume": self.volume, "comfort": rating}
+        if self.mixer is not None and self.mixer.tracks:
+            # Momentary loudness needs 400 ms of audio; -inf is not valid JSON.
+            lufs = self.mixer.meter.momentary
+            if math.isfinite(lufs):
+                entry["lufs"] = round(lufs, 1)
+        if self.current_sound:
+            entry["sound"], entry["category"] = self.current_sound
+        if self.exposure is not None:
+            session = self.exposure
+            entry.update(volume=session.volume, program=session.program.id,
+                         offset=round(session.frame / session.program.sr, 4))
+            if session.rating(rating):
+                self.status_label.set_label(_("Training stopped"))
+        self.sessions.append(entry)
+        self._record(entry)
+        self._plugin_hook("on_comfort_rated", rating, dict(entry))
+
+    @traced
     def _on_play_sound(self, btn, sound, category):
-        self.status_label.set_label(_("Playing: %s (volume: %d%%)") % (sound, self.volume))
+        if sound in self.layers:
+            self.mixer.remove(self.layers.pop(sound))
+            self.status_label.set_label(self._layers_label())
+            return
+        self.status_label.set_label(_("Playing: %s (volume: %d%%)") % (_(sound), self.volume))
+        self.current_sound = (_(sound), category)
+        self._play(sound)
         from datetime import datetime
-        self.sessions.append({"date": datetime.now().isoformat(), "sound": sound,
-                               "category": category, "volume": self.volume})
-        _save_sessions(self.sessions)
+        entry = {"date": datetime.now().isoformat(), "sound": _(sound),
+                 "category": category, "volume": self.volume}
+        self.sessions.append(entry)
+        self._record(entry)
+        self._plugin_hook("on_sound_played", sound, category)
+
+    def _plugin_hook(self, hook, *args):
+        plugins = self.get_application().plugins
+        if plugins is not None:
+            plugins.call(hook, *args)
+
+    def _ensure_output(self):
+        if self.output is not None:
+            return True
+        if self.audio_cache is None:
+            self.status_label.set_label(_("Sound unavailable: %s") % _("NumPy is not installed"))
+            return False
+        from ljudladan.meter import LoudnessMeter
+        from ljudladan.mixer import AudioOutput, Mixer
+        from ljudladan.sinks import device_sink
+        self.mixer = Mixer()
+        self.mixer.meter = LoudnessMeter(self.mixer.sr)
+        sink = device_sink(self.mixer.sr)
+        if sink is None:
+            self.status_label.set_label(_("Sound unavailable: %s") % _("no audio player found"))
+            return False
+        # The player pipe blocks when full, which paces playback by itself.
+        self.output = AudioOutput(self.mixer, sink, realtime=False)
+        self.output.start()
+        GLib.timeout_add(METER_INTERVAL, self._update_meter)
+        return True
+
+    def _update_meter(self):
+        if self.output is None:
+            return False
+        meter = self.mixer.meter
+        if not self.mixer.tracks:
+            self.level_label.set_label("")
+        else:
+            lufs = meter.momentary
+            self.level_label.set_label(_("Measured: %s (%s LUFS, peak %.0f dB)")
+                                       % (_(meter.level), f"{lufs:.0f}" if math.isfinite(lufs) else "—",
+                                          meter.true_peak_db))
+            meter.reset_peaks()
+        return True
+
+    def _play(self, sound):
+        if not self._ensure_output():
+            return
+        def work():
+            try:
+                buf, error = _render_buffer(sound, self.audio_cache), None
+                plan = _loop_plan(sound, buf, self.loop_plans)
+            except OSError as e:
+                buf, plan, error = None, None, e
+            GLib.idle_add(self._on_buffer_ready, sound, buf, plan, error)
+        threading.Thread(target=work, name="render", daemon=True).start()
+
+    @traced
+    def _on_buffer_ready(self, sound, buf, plan, error):
+        if error is not None:
+            self.status_label.set_label(_("Sound unavailable: %s") % error)
+        elif sound not in self.layers:
+            if plan is not None:
+                from ljudladan.loop import LoopSource
+                buf = LoopSource(buf, plan, variations=True, jitter_db=LOOP_JITTER_DB)
+            self.layers[sound] = self.current_track = self.mixer.add(
+                buf, gain=self.volume / 100, loop=True, name=sound)
+            self.status_label.set_label(self._layers_label())
+        return False
+
+    def _layers_label(self):
+        if not self.layers:
+            return _("Stopped")
+        names = " + ".join(_(s) for s in self.layers)
+        return _("Playing: %s (volume: %d%%)") % (names, self.volume)
+
+    @traced
+    def _on_program_toggle(self, btn):
+        if self.exposure is not None:
+            self.exposure.stop("user")
+            return
+        if not self._ensure_output():
+            return
+        from ljudladan.exposure import Program
+        program = Program(self.programs[self.program_dd.get_selected()], self.mixer.sr)
+        btn.set_sensitive(False)
+        def work():
+            try:
+                bufs = {s: _loop_buffer(s, self.audio_cache, self.loop_plans)
+                        for s in program.sounds}
+                error = None
+            except (OSError, KeyError) as e:
+                bufs, error = None, e
+            GLib.idle_add(self._on_program_ready, program, bufs, error)
+        threading.Thread(target=work, name="render", daemon=True).start()
+
+    @traced
+    def _on_program_ready(self, program, bufs, error):
+        self.program_btn.set_sensitive(True)
+        if error is not None:
+            self.status_label.set_label(_("Sound unavailable: %s") % error)
+            return False
+        from datetime import datetime
+        from ljudladan.exposure import ExposureSession
+        self.exposure = ExposureSession(program, bufs)
+        self._exposure_started = datetime.now()
+        self.exposure_track = self.mixer.add(self.exposure, name=program.id,
+                                             automation=self.exposure.automation)
+        self.current_sound = (_(program.sounds[0]), _category_of(program.sounds[0]))
+        self.program_btn.set_label(_("Stop training"))
+        GLib.timeout_add(250, self._poll_exposure)
+        return False
+
+    def _poll_exposure(self):
+        from datetime import timedelta
+        session, program = self.exposure, self.exposure.program
+        for frame, kind, value in session.drain_events():
+            offset = frame / program.sr
+            sound = program.sound_at(frame)
+            entry = {"date": (self._exposure_started + timedelta(seconds=offset)).isoformat(),
+                     "sound": _(sound), "category": _category_of(sound),
+                     "volume": round(program.gain_at(frame) * 100),
+                     "program": program.id, "event": kind, "offset": round(offset, 4)}
+            if kind == "step":
+                entry["step"] = value
+            elif kind == "stop":
+                entry["reason"] = value
+            self.current_sound = (entry["sound"], entry["category"])
+            self.sessions.append(entry)
+            self._record(entry)
+        if self.exposure_track in self.mixer.tracks:
+            self.status_label.set_label(_("Training: %s (volume: %d%%)")
+                                        % (_(program.data["name"]), session.volume))
+            return True
+        self.exposure = self.exposure_track = None
+        self.program_btn.set_label(_("Start training"))
+        self.status_label.set_label(self._layers_label())
+        return False
+
+    @traced
+    def _on_stop(self, *_args):
+        if self.exposure is not None:
+            self.exposure.stop("user")
+        if self.mixer:
+            self.mixer.clear()
+        self.layers.clear()
+        self.current_track = None
+        self.status_label.set_label(self._layers_label())
+
+    def _apply_setting(self, key, value):
+        if key == "volume":
+            self._applying = True
+            try:
+                self.vol_scale.set_value(value)
+            finally:
+                self._applying = False
+
+    def _on_close(self, *_args):
+        if self.output:
+            self.output.stop()
+            self.output = None
+        app = self.get_application()
+        app.settings["volume"] = self.volume
+        app.persistence.replace("settings", _save_settings, dict(app.settings))
+        app.persistence.replace("undo", self.undo.save, UNDO_FILE)
+        return False
+
+    def _record(self, entry):
+        self.get_application().persistence.append(self.history, entry, self._on_saved)
+        if self.stats is not None:
+            self.stats.add(entry)
+            self._refresh_dashboard()
+
+    def _on_page_changed(self, *_args):
+        self._refresh_dashboard()
+
+    @traced
+    def _refresh_dashboard(self):
+        if self.stack.get_visible_child_name() != "dashboard":
+            return
+        while (child := self.dashboard.get_first_child()) is not None:
+            self.dashboard.remove(child)
+        if self.stats is None:
+            loading = Adw.PreferencesGroup(title=_("Overview"))
+            loading.add(Adw.ActionRow(title=_("Loading history…")))
+            self.dashboard.append(loading)
+            return
+        stats, total = self.stats, self.stats.total
+        summary = Adw.PreferencesGroup(title=_("Overview"))
+        summary.add(Adw.ActionRow(title=_("Sounds played"), subtitle=str(total.plays)))
+        if total.rated:
+            summary.add(Adw.ActionRow(title=_("Felt good or okay"),
+                                      subtitle=_("%d%% of %d ratings") % (total.comfort * 100, total.rated)))
+        if total.tolerated_n:
+            row = Adw.ActionRow(title=_("Tolerated volume"),
+                                subtitle=_("Average %d%%, highest %d%%")
+                                % (total.tolerated_volume, total.tolerated_max))
+            slope = stats.trend()
+            if slope is not None:
+                row.add_suffix(Gtk.Label(label=_("%+.1f%% per week") % (slope * 7)))
+            summary.add(row)
+        self.dashboard.append(summary)
+        for title, items in ((_("By category"), stats.top("category", 8)),
+                             (_("Most played sounds"), stats.top("sound", 5)),
+                             (_("Last 7 days"), stats.days(7)),
+                             (_("By volume"), sorted(stats.groups["bucket"].items()))):
+            if not items:
+                continue
+            group = Adw.PreferencesGroup(title=title)
+            for key, agg in items:
+                name = _("%d–%d%%") % (key, key + 9) if isinstance(key, int) else _(str(key))
+                group.add(Adw.ActionRow(title=name, subtitle=_stats_line(agg)))
+            self.dashboard.append(group)
+
+    def _compact_history(self):
+        self.history.compact_async()
+        return True
+
+    @traced
+    def _on_saved(self, error):
+        if error is not None:
+            self.status_label.set_label(_("Could not save history: %s") % error)
+
+    def _start_job(self):
+        """Claim the cancel button for a background job; False if one runs."""
+        if self.cancel_btn.get_visible():
+            return False
+        self._cancel.clear()
+        self.cancel_btn.set_visible(True)
+        return True
 
     def do_export(self):
-        from ljudladan.export import export_csv, export_json
-        os.makedirs(CONFIG_DIR, exist_ok=True)
-        ts = GLib.DateTime.new_now_local().format("%Y%m%d_%H%M%S")
-        data = [{"date": s.get("date", ""), "details": s.get("sound", s.get("comfort", "")),
-                 "result": f'vol:{s.get("volume", "")}'} for s in self.sessions]
-        export_csv(data, os.path.join(CONFIG_DIR, f"export_{ts}.csv"))
-        export_json(data, os.path.join(CONFIG_DIR, f"export_{ts}.json"))
+        """Append sessions recorded since the last export to the export files."""
+        if not self._start_job():
+            return
+        app = self.get_application()
+        persistence, history = app.persistence, self.history
+        rotate = app.settings.get("export_rotate")
+        def progress(done, _total):
+            GLib.idle_add(self.status_label.set_label, _("Exporting: %d records") % done)
+        def work():
+            from ljudladan.export import IncrementalExport
+            persistence.flush()
+            exporter = IncrementalExport(EXPORT_STATE_FILE)
+            try:
+                count = exporter.run(history, os.path.join(CONFIG_DIR, "history.csv"),
+                                     row=export_row, rotate=rotate, progress=progress, cancel=self._cancel)
+                exporter.run(history, os.path.join(CONFIG_DIR, "history.ndjson"),
+                             rotate=rotate, cancel=self._cancel)
+                error = None
+            except (OSError, ValueError) as e:
+                count, error = 0, e
+            GLib.idle_add(self._on_export_done, count, error)
+        threading.Thread(target=work, name="export", daemon=True).start()
+
+    @traced
+    def _on_export_done(self, count, error):
+        self.cancel_btn.set_visible(False)
+        if error is not None:
+            self.status_label.set_label(_("Export error: %s") % error)
+        elif self._cancel.is_set():
+            self.status_label.set_label(_("Export cancelled"))
+        else:
+            self.status_label.set_label(_("Exported %d new records to %s") % (count, CONFIG_DIR))
+        return False
+
+    def do_render(self):
+        if self.audio_cache is None:
+            self.status_label.set_label(_("Sound unavailable: %s") % _("NumPy is not installed"))
+            return
+        if self.cancel_btn.get_visible():
+            return
+        dialog = Adw.AlertDialog.new(_("Render Calm Track"), _("How long should the track be?"))
+        dialog.add_response("cancel", _("Cancel"))
+        for minutes in RENDER_MINUTES:
+            dialog.add_response(str(minutes), _("%d min") % minutes)
+        dialog.set_default_response(str(RENDER_MINUTES[1]))
+        dialog.set_close_response("cancel")
+        dialog.connect("response", self._on_render_length)
+        dialog.present(self)
+
+    def _on_render_length(self, dialog, response):
+        if response == "cancel":
+            return
+        from ljudladan.render import flac_available
+        fd = Gtk.FileDialog.new()
+        fd.set_title(_("Save Calm Track"))
+        ext = "flac" if flac_available() else "wav"
+        fd.set_initial_name(f"ljudladan_{response}min.{ext}")
+        fd.save(self, None, self._on_render_save, int(response) * 60)
+
+    @traced
+    def _on_render_save(self, dialog, result, seconds):
+        try:
+            path = dialog.save_finish(result).get_path()
+        except GLib.Error:
+            return
+        layers = [(t.name, t.target) for t in self.mixer.tracks if t.automation is None] \
+            if self.mixer else []
+        if not self._start_job():
+            return
+        def progress(fraction):
+            GLib.idle_add(self.status_label.set_label, _("Rendering: %d%%") % (fraction * 100))
+        def work():
+            try:
+                from ljudladan.render import render_to_file
+                from ljudladan.synth import SOUNDS
+                # Recordings from packs cannot be rendered; keep what can.
+                playable = [(n, g) for n, g in layers if n in SOUNDS] \
+                    or [(n, 0.5) for n in RENDER_DEFAULT]
+                ok, error = render_to_file(playable, seconds, path, progress=progress,
+                                           cancel=self._cancel), None
+            except Exception as e:
+                # Anything left unreported would keep the cancel button, and
+                # with it every later job, blocked.
+                ok, error = False, e
+            GLib.idle_add(self._on_render_done, path, ok, error)
+        threading.Thread(target=work, name="render-file", daemon=True).start()
+
+    @traced
+    def _on_render_done(self, path, ok, error):
+        self.cancel_btn.set_visible(False)
+        if error is not None:
+            self.status_label.set_label(_("Render error: %s") % error)
+        elif ok:
+            self.status_label.set_label(_("Saved %s") % os.path.basename(path))
+        else:
+            self.status_label.set_label(_("Rendering cancelled"))
+        return False
 
     def _toggle_theme(self, *_args):
         mgr = Adw.StyleManager.get_default()
@@ -238,45 +928,6 @@ def main():
     app = SoundApp()
     app.run(sys.argv)
 
-if __name__ == "__main__":
-    main()
-
-    # ── Welcome Dialog ───────────────────────────────────────
-
-    def _show_welcome(self, win):
-        dialog = Adw.Dialog()
-        dialog.set_title(_("Welcome"))
-        dialog.set_content_width(420)
-        dialog.set_content_height(480)
-
-        page = Adw.StatusPage()
-        page.set_icon_name("ljudladan")
-        page.set_title(_("Welcome to Sound Box"))
-        page.set_description(_(
-            "Explore sounds and practice sound sensitivity.\n\n✓ Categorized sound library\n✓ Adjustable volume levels\n✓ Gradual exposure training\n✓ Safe, controlled environment"
-        ))
-
-        btn = Gtk.Button(label=_("Get Started"))
-        btn.add_css_class("suggested-action")
-        btn.add_css_class("pill")
-        btn.set_halign(Gtk.Align.CENTER)
-        btn.set_margin_top(12)
-        btn.connect("clicked", self._on_welcome_close, dialog)
-        page.set_child(btn)
-
-        box = Adw.ToolbarView()
-        hb = Adw.HeaderBar()
-        hb.set_show_title(False)
-        box.add_top_bar(hb)
-        box.set_content(page)
-        dialog.present(win)
-
-    def _on_welcome_close(self, btn, dialog):
-        self.settings["welcome_shown"] = True
-        _save_settings(self.settings)
-        dialog.close()
-
-
 
 # --- Fullscreen toggle (F11) ---
 def _setup_fullscreen(window, app):
@@ -292,23 +943,17 @@ def _setup_fullscreen(window, app):
 
 
 # --- Plugin system ---
-import importlib.util
 import os as _pos
 
 def _load_plugins(app_name):
-    """Load plugins from ~/.config/<app>/plugins/."""
+    """Index plugins in ~/.config/<app>/plugins/; they are imported on first use."""
+    from ljudladan.plugins import PluginManager
     plugin_dir = _pos.path.join(_pos.path.expanduser('~'), '.config', app_name, 'plugins')
-    plugins = []
-    if not _pos.path.isdir(plugin_dir):
-        return plugins
-    for fname in sorted(_pos.listdir(plugin_dir)):
-        if fname.endswith('.py') and not fname.startswith('_'):
-            path = _pos.path.join(plugin_dir, fname)
-            try:
-                spec = importlib.util.spec_from_file_location(fname[:-3], path)
-                mod = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(mod)
-                plugins.append(mod)
-            except Exception as e:
-                print(f"Plugin {fname}: {e}")
+    index = _pos.path.join(GLib.get_user_cache_dir(), app_name, 'plugins.json')
+    plugins = PluginManager(plugin_dir, index)
+    plugins.scan()
     return plugins
+
+
+if __name__ == "__main__":
+    main()
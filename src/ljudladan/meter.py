@@ -0,0 +1,220 @@
+"""Streaming loudness metering: RMS, true peak and BS.1770 LUFS."""
+from collections import deque
+from functools import lru_cache
+
+import numpy as np
+
+# Names of the SOUND_LEVELS buckets, quietest first, and the momentary
+# loudness (LUFS) at which each bucket above "Silent" begins. Digital
+# loudness says nothing about the listener's speakers, so the scale
+# assumes a typical setup where -23 LUFS is ordinary talking volume.
+LEVELS = ("Silent", "Whisper", "Normal", "Loud", "Very loud", "Overwhelming")
+LEVEL_THRESHOLDS = (-65.0, -45.0, -20.0, -12.0, -6.0)
+
+_K_TAPS = 2048
+_OVERSAMPLE = 4
+_PEAK_TAPS = 12
+# Integrated loudness keeps a histogram of gating-block loudness in
+# 0.1 LU bins from the absolute gate up, so memory stays constant.
+_GATE = -70.0
+_BIN = 0.1
+_BINS = 800
+
+
+def _biquad_response(b, a, w):
+    z = np.exp(-1j * w)
+    return (b[0] + b[1] * z + b[2] * z * z) / (a[0] + a[1] * z + a[2] * z * z)
+
+
+def _k_biquads(sr):
+    """BS.1770 pre-filter and RLB high-pass, re-derived for ``sr``."""
+    f0, gain, q = 1681.974450955533, 3.999843853973347, 0.7071752369554196
+    k = np.tan(np.pi * f0 / sr)
+    vh = 10 ** (gain / 20)
+    vb = vh ** 0.4996667741545416
+    a0 = 1 + k / q + k * k
+    shelf = ([(vh + vb * k / q + k * k) / a0, 2 * (k * k - vh) / a0, (vh - vb * k / q + k * k) / a0],
+             [1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0])
+    f0, q = 38.13547087602444, 0.5003270373238773
+    k = np.tan(np.pi * f0 / sr)
+    a0 = 1 + k / q + k * k
+    highpass = ([1.0, -2.0, 1.0], [1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0])
+    return shelf, highpass
+
+
+@lru_cache(maxsize=8)
+def k_weighting(sr, taps=_K_TAPS):
+    """Impulse response of the K-weighting filter, truncated to ``taps``.
+
+    The two biquads are sampled in the frequency domain and applied as one
+    FIR through FFT convolution, which keeps the work per block vectorized
+    instead of running a recursive filter sample by sample.
+    """
+    n = 2 * taps
+    w = 2 * np.pi * np.fft.rfftfreq(n)
+    h = np.ones_like(w, dtype=complex)
+    for b, a in _k_biquads(sr):
+        h *= _biquad_response(b, a, w)
+    ir = np.fft.irfft(h, n)[:taps]
+    return ir
+
+
+@lru_cache(maxsize=4)
+def _peak_filter(factor=_OVERSAMPLE, taps=_PEAK_TAPS):
+    """Polyphase interpolation filter for true-peak estimation."""
+    n = factor * taps
+    t = np.arange(n) - (n - 1) / 2
+    h = np.sinc(t / factor) * np.kaiser(n, 8.0)
+    h *= factor / h.sum()
+    return h.reshape(taps, factor).T[:, ::-1].copy()
+
+
+def level_index(lufs):
+    """Map a loudness reading onto an index into ``LEVELS``."""
+    return int(np.searchsorted(LEVEL_THRESHOLDS, lufs, side="right"))
+
+
+def level_name(lufs):
+    return LEVELS[level_index(lufs)]
+
+
+def _db(x, floor=-120.0):
+    return float(10 * np.log10(x)) if x > 0 else floor
+
+
+class LoudnessMeter:
+    """Meter that is fed consecutive blocks of one mono stream.
+
+    Per block it costs one FFT convolution for the K-weighting and one
+    small polyphase product for the 4x oversampled true peak; momentary
+    (400 ms) and short-term (3 s) loudness come from running sums of
+    100 ms sub-block energies. Gated integrated loudness accumulates over
+    everything fed since construction.
+    """
+
+    def __init__(self, sr=44100):
+        self.sr = sr
+        ir = k_weighting(sr)
+        self._ir = ir
+        self._taps = len(ir)
+        self._kspecs = {}
+        self._history = np.zeros(self._taps - 1)
+        self._phases = _peak_filter()
+        self._peak_hist = np.zeros(self._phases.shape[1] - 1)
+        self._sub = int(0.1 * sr)
+        self._sub_sum = 0.0
+        self._sub_n = 0
+        self._subs = deque(maxlen=30)
+        self._hist_n = np.zeros(_BINS)
+        self._hist_e = np.zeros(_BINS)
+        self.frames = 0
+        self.reset_peaks()
+
+    def reset_peaks(self):
+        self.peak = 0.0
+        self.true_peak = 0.0
+        self.max_momentary = float("-inf")
+
+    def _kspec(self, n):
+        nfft = 1 << int(np.ceil(np.log2(self._taps + min(n, 4 * self._taps) - 1)))
+        spec = self._kspecs.get(nfft)
+        if spec is None:
+            spec = self._kspecs[nfft] = np.fft.rfft(self._ir, nfft)
+        return nfft, nfft - self._taps + 1, spec
+
+    def _weighted(self, x):
+        out = np.empty(len(x))
+        nfft, hop, kspec = self._kspec(len(x))
+        for start in range(0, len(x), hop):
+            seg = x[start:start + hop]
+            buf = np.concatenate((self._history, seg))
+            y = np.fft.irfft(np.fft.rfft(buf, nfft) * kspec, nfft)
+            out[start:start + len(seg)] = y[self._taps - 1:self._taps - 1 + len(seg)]
+            self._history = buf[len(buf) - (self._taps - 1):]
+        return out
+
+    def _true_peak(self, x):
+        buf = np.concatenate((self._peak_hist, x))
+        self._peak_hist = buf[len(buf) - len(self._peak_hist):]
+        taps = self._phases.shape[1]
+        frames = np.lib.stride_tricks.sliding_window_view(buf, taps)
+        return float(np.abs(frames @ self._phases.T).max()) if len(frames) else 0.0
+
+    def process(self, block):
+        """Feed the next block; returns ``self`` for chaining."""
+        x = np.asarray(block, dtype=np.float64)
+        if not len(x):
+            return self
+        self.frames += len(x)
+        self.rms = float(np.sqrt(np.mean(x * x)))
+        self.peak = max(self.peak, float(np.abs(x).max()))
+        self.true_peak = max(self.true_peak, self._true_peak(x))
+        power = self._weighted(x) ** 2
+        pos = 0
+        while pos < len(power):
+            take = min(self._sub - self._sub_n, len(power) - pos)
+            self._sub_sum += float(power[pos:pos + take].sum())
+            self._sub_n += take
+            pos += take
+            if self._sub_n == self._sub:
+                self._subs.append(self._sub_sum / self._sub)
+                self._sub_sum, self._sub_n = 0.0, 0
+                if len(self._subs) >= 4:
+                    self._gate_block(self.momentary)
+        return self
+
+    def _gate_block(self, lufs):
+        self.max_momentary = max(self.max_momentary, lufs)
+        if lufs >= _GATE:
+            i = min(_BINS - 1, int((lufs - _GATE) / _BIN))
+            self._hist_n[i] += 1
+            self._hist_e[i] += 10 ** ((lufs + 0.691) / 10)
+
+    @staticmethod
+    def _lufs(energies):
+        if not energies:
+            return float("-inf")
+        mean = sum(energies) / len(energies)
+        return float(-0.691 + 10 * np.log10(mean)) if mean > 0 else float("-inf")
+
+    @property
+    def momentary(self):
+        return self._lufs(list(self._subs)[-4:])
+
+    @property
+    def short_term(self):
+        return self._lufs(list(self._subs))
+
+    @property
+    def integrated(self):
+        """BS.1770 gated loudness of everything measured so far."""
+        n = self._hist_n.sum()
+        if not n:
+            return float("-inf")
+        relative = self._lufs([self._hist_e.sum() / n]) - 10.0
+        start = max(0, int(np.ceil((relative - _GATE) / _BIN)))
+        n = self._hist_n[start:].sum()
+        return self._lufs([self._hist_e[start:].sum() / n]) if n else float("-inf")
+
+    @property
+    def rms_db(self):
+        return _db(getattr(self, "rms", 0.0) ** 2)
+
+    @property
+    def peak_db(self):
+        return _db(self.peak ** 2)
+
+    @property
+    def true_peak_db(self):
+        return _db(self.true_peak ** 2)
+
+    @property
+    def level(self):
+        """Name of the ``LEVELS`` bucket for the momentary loudness."""
+        return level_name(self.momentary)
+
+    def reading(self):
+        return {"rms_db": round(self.rms_db, 1), "peak_db": round(self.peak_db, 1),
+                "true_peak_db": round(self.true_peak_db, 1),
+                "momentary_lufs": round(self.momentary, 1), "short_term_lufs": round(self.short_term, 1),
+                "level": self.level}
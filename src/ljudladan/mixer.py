@@ -0,0 +1,258 @@
+"""Block-based multi-track mixer and ring-buffered audio output."""
+import threading
+import time
+
+import numpy as np
+
+from ljudladan.synth import BLOCK_SIZE, SAMPLE_RATE
+
+
+class RingBuffer:
+    """Single-producer/single-consumer ring of float32 samples.
+
+    The producer only advances ``_write`` and the consumer only ``_read``;
+    both counters grow monotonically and each is published after its data
+    has been copied, so no lock is needed between the two threads.
+    """
+
+    def __init__(self, capacity):
+        self._buf = np.zeros(capacity, dtype=np.float32)
+        self.capacity = capacity
+        self._write = 0
+        self._read = 0
+
+    def available(self):
+        return self._write - self._read
+
+    def space(self):
+        return self.capacity - (self._write - self._read)
+
+    def write(self, data):
+        """Copy as much of ``data`` as fits; return the number of samples."""
+        n = min(len(data), self.space())
+        start = self._write % self.capacity
+        first = min(n, self.capacity - start)
+        self._buf[start:start + first] = data[:first]
+        self._buf[:n - first] = data[first:n]
+        self._write += n
+        return n
+
+    def read_into(self, out):
+        """Fill ``out`` from the ring; return the number of samples copied."""
+        n = min(len(out), self.available())
+        start = self._read % self.capacity
+        first = min(n, self.capacity - start)
+        out[:first] = self._buf[start:start + first]
+        out[first:n] = self._buf[:n - first]
+        self._read += n
+        return n
+
+
+class BufferSource:
+    """Play a rendered buffer once or looped, copying slices into the mixer."""
+
+    def __init__(self, data, loop=False):
+        self.data = data
+        self.loop = loop
+        self.pos = 0
+
+    def read_into(self, out):
+        n, total = len(out), len(self.data)
+        done = 0
+        while done < n and total:
+            take = min(n - done, total - self.pos)
+            out[done:done + take] = self.data[self.pos:self.pos + take]
+            done += take
+            self.pos += take
+            if self.pos >= total:
+                if not self.loop:
+                    break
+                self.pos = 0
+        return done
+
+
+class Track:
+    """One layer of the mix with its own smoothed gain.
+
+    ``automation``, when set, is called as ``automation(frame, gains)``
+    with the track's first frame of the block and a float32 array to
+    fill with per-sample gains; it overrides ``gain`` for that block.
+    """
+
+    def __init__(self, source, gain=1.0, name=None, automation=None):
+        self.source = source
+        self.name = name
+        self.gain = gain
+        self.target = gain
+        self.automation = automation
+        self.frame = 0
+        self.done = False
+
+    def set_gain(self, gain):
+        self.target = gain
+
+
+class Mixer:
+    """Sum any number of tracks into one preallocated output block.
+
+    Gain changes are ramped linearly over at most ``smoothing`` seconds so
+    moving the volume slider does not produce zipper noise. Mixing a block
+    allocates nothing: sources write into a scratch buffer that is scaled
+    and accumulated in place. A ``meter`` with a ``process(block)`` method
+    is fed every finished block.
+    """
+
+    def __init__(self, sr=SAMPLE_RATE, block=BLOCK_SIZE, smoothing=0.05):
+        self.sr = sr
+        self.block = block
+        self.master = 1.0
+        self.out = np.zeros(block, dtype=np.float32)
+        self._scratch = np.zeros(block, dtype=np.float32)
+        self._gains = np.zeros(block, dtype=np.float32)
+        self._ramp = np.arange(1, block + 1, dtype=np.float32) / block
+        self._max_step = block / (smoothing * sr) if smoothing > 0 else float("inf")
+        self._lock = threading.Lock()
+        self._tracks = ()
+        self.meter = None
+
+    @property
+    def tracks(self):
+        return self._tracks
+
+    def add(self, source, gain=1.0, loop=False, name=None, automation=None):
+        """Start a layer from a buffer or an object with ``read_into``."""
+        if isinstance(source, np.ndarray):
+            source = BufferSource(source, loop)
+        track = Track(source, gain, name, automation)
+        with self._lock:
+            self._tracks = self._tracks + (track,)
+        return track
+
+    def remove(self, track):
+        with self._lock:
+            self._tracks = tuple(t for t in self._tracks if t is not track)
+
+    def clear(self):
+        with self._lock:
+            self._tracks = ()
+
+    def mix(self):
+        """Render the next block of the mix into ``self.out`` and return it."""
+        out, scratch, gains = self.out, self._scratch, self._gains
+        out.fill(0.0)
+        finished = False
+        for track in self._tracks:
+            n = track.source.read_into(scratch)
+            if n < self.block:
+                scratch[n:] = 0.0
+                track.done = finished = True
+            if track.automation is not None:
+                track.automation(track.frame, gains)
+                np.multiply(scratch, gains, out=scratch)
+            elif track.gain != track.target:
+                delta = max(-self._max_step, min(self._max_step, track.target - track.gain))
+                np.multiply(self._ramp, delta, out=gains)
+                gains += track.gain
+                np.multiply(scratch, gains, out=scratch)
+                track.gain += delta
+            elif track.gain != 1.0:
+                scratch *= track.gain
+            track.frame += self.block
+            out += scratch
+        if self.master != 1.0:
+            out *= self.master
+        np.clip(out, -1.0, 1.0, out=out)
+        if self.meter is not None:
+            self.meter.process(out)
+        if finished:
+            with self._lock:
+                self._tracks = tuple(t for t in self._tracks if not t.done)
+        return out
+
+    def render(self, sink, seconds):
+        """Mix offline into ``sink`` as fast as possible."""
+        for _i in range(int(np.ceil(seconds * self.sr / self.block))):
+            sink.write(self.mix())
+        return sink
+
+
+class AudioOutput:
+    """Feed a mixer to a sink through a ring buffer on two threads.
+
+    The producer mixes blocks whenever the ring has room; the consumer
+    hands fixed-size blocks to the sink. A sink that blocks (an audio
+    device pipe) paces playback itself; otherwise ``realtime`` makes the
+    consumer sleep to wall-clock time, and with ``realtime=False`` the
+    pair runs flat out so throughput and underruns can be measured.
+    """
+
+    def __init__(self, mixer, sink, latency=0.1, realtime=True):
+        self.mixer, self.sink, self.realtime = mixer, sink, realtime
+        blocks = max(2, int(np.ceil(latency * mixer.sr / mixer.block)))
+        self.ring = RingBuffer(blocks * mixer.block)
+        self._device = np.zeros(mixer.block, dtype=np.float32)
+        self._running = False
+        self._threads = ()
+        # Set by the producer after each block, so a consumer that is not
+        # paced by the clock waits for data instead of spinning.
+        self._written = threading.Event()
+        self.underruns = 0
+        self.blocks = 0
+
+    def start(self):
+        if self._running:
+            return
+        self._running = True
+        self._threads = (threading.Thread(target=self._produce, name="mixer", daemon=True),
+                         threading.Thread(target=self._consume, name="audio-out", daemon=True))
+        for t in self._threads:
+            t.start()
+
+    def stop(self):
+        self._running = False
+        self._written.set()
+        for t in self._threads:
+            t.join(1.0)
+        self._threads = ()
+        self.sink.close()
+
+    @property
+    def running(self):
+        return self._running
+
+    def _produce(self):
+        block = self.mixer.block
+        wait = block / self.mixer.sr / 4
+        while self._running:
+            if self.ring.space() >= block:
+                self.ring.write(self.mixer.mix())
+                self._written.set()
+            else:
+                time.sleep(wait)
+
+    def _consume(self):
+        period = self.mixer.block / self.mixer.sr
+        deadline = time.monotonic()
+        while self._running:
+            if not self.realtime:
+                self._written.clear()
+                if self.ring.available() < len(self._device):
+                    self._written.wait(period)
+                    continue
+            n = self.ring.read_into(self._device)
+            if n < len(self._device):
+                self._device[n:] = 0.0
+                self.underruns += 1
+            try:
+                self.sink.write(self._device)
+            except (OSError, ValueError):
+                self._running = False
+                return
+            self.blocks += 1
+            if self.realtime:
+                deadline += period
+                delay = deadline - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    deadline = time.monotonic()
@@ -0,0 +1,366 @@
+"""Single-file sound packs: an indexed header followed by raw PCM.
+
+Layout, all little-endian::
+
+    header   magic "LJPK", version, count, index size, metadata size
+    index    one entry per sound: offset, frames, sample rate, loudness,
+             channels, sample format, then the name and category (UTF-8)
+    meta     JSON with display data (emoji, descriptions, safe sounds)
+    data     interleaved PCM per sound, each block aligned to 64 bytes
+
+A pack is memory-mapped once; :meth:`AssetPack.samples` returns NumPy
+views straight into the mapping, so playing a sound neither opens a file
+nor copies its samples. Sounds the app synthesizes may be listed as
+index entries without data.
+
+The library is read from the base pack, which the package build makes
+from :mod:`ljudladan.catalog` and installs as ``sounds.pack``; other
+installed packs add to it. Without a base pack, as in a source
+checkout, the catalogue itself is the base.
+
+    python -m ljudladan.pack build -o sounds.pack
+    python -m ljudladan.pack build recordings.json -o recordings.pack
+    python -m ljudladan.pack list sounds.pack
+"""
+import argparse
+import hashlib
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+from collections import namedtuple
+
+from ljudladan import catalog, paths
+
+MAGIC = b"LJPK"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIII")
+ENTRY = struct.Struct("<QQIfBBHH")
+ALIGN = 64
+# Sample formats; SYNTH entries have no data and are rendered by the app.
+SYNTH, FLOAT32, INT16 = 0, 1, 2
+DTYPES = {FLOAT32: "<f4", INT16: "<i2"}
+PACK_SUFFIX = ".pack"
+
+Asset = namedtuple("Asset", "name category sample_rate channels format offset frames loudness")
+
+
+class AssetPack:
+    """Read-only view of one pack file."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            head = f.read(HEADER.size)
+            if len(head) < HEADER.size:
+                raise ValueError(f"{path}: not a sound pack")
+            magic, version, _reserved, count, index_size, meta_size = HEADER.unpack(head)
+            if magic != MAGIC:
+                raise ValueError(f"{path}: not a sound pack")
+            if version != VERSION:
+                raise ValueError(f"{path}: unsupported pack version {version}")
+            index = f.read(index_size)
+            meta = f.read(meta_size)
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) \
+                if os.fstat(f.fileno()).st_size else None
+        self.assets = {}
+        pos = 0
+        for _i in range(count):
+            offset, frames, sr, loudness, channels, fmt, name_len, cat_len = \
+                ENTRY.unpack_from(index, pos)
+            pos += ENTRY.size
+            name = index[pos:pos + name_len].decode("utf-8")
+            pos += name_len
+            category = index[pos:pos + cat_len].decode("utf-8")
+            pos += cat_len
+            self.assets[name] = Asset(name, category, sr, channels, fmt, offset, frames,
+                                      None if math.isnan(loudness) else loudness)
+        self.meta = json.loads(meta) if meta else {}
+
+    def __len__(self):
+        return len(self.assets)
+
+    def __contains__(self, name):
+        return name in self.assets
+
+    def __iter__(self):
+        return iter(self.assets.values())
+
+    def samples(self, name):
+        """Sample data of ``name`` as a read-only ``(frames, channels)`` view."""
+        import numpy as np
+        a = self.assets[name]
+        if a.format == SYNTH:
+            raise ValueError(f"{name} is synthesized, not stored")
+        data = np.frombuffer(self._map, DTYPES[a.format], a.frames * a.channels, a.offset)
+        return data.reshape(a.frames, a.channels)
+
+    def mono(self, name):
+        """Float32 mono samples; a view when stored that way, else converted."""
+        import numpy as np
+        a = self.assets[name]
+        data = self.samples(name)
+        if a.format == FLOAT32 and a.channels == 1:
+            return data[:, 0]
+        data = data.astype(np.float32) / 32768 if a.format == INT16 else data
+        return data.mean(axis=1, dtype=np.float32) if a.channels > 1 else data[:, 0]
+
+    def close(self):
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                # Views handed out are still alive; the mapping is released
+                # with the last of them.
+                pass
+            self._map = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_exc):
+        self.close()
+
+
+# ── Building ─────────────────────────────────────────────────
+
+
+def _align(n):
+    return -(-n // ALIGN) * ALIGN
+
+
+def _read_audio(path):
+    """Sample rate and a float32 mono array for an audio file."""
+    import numpy as np
+    from ljudladan.analyze import _soundfile_chunks, _wav_chunks
+    reader = _wav_chunks if path.lower().endswith(".wav") else _soundfile_chunks
+    chunks = reader(path, 10.0)
+    sr = next(chunks)
+    return sr, np.concatenate([np.asarray(c, np.float32) for c in chunks] or [np.zeros(0, np.float32)])
+
+
+def _loudness(data, sr):
+    from ljudladan.meter import LoudnessMeter
+    meter = LoudnessMeter(sr)
+    meter.process(data)
+    value = meter.integrated
+    return value if math.isfinite(value) else float("nan")
+
+
+def read_manifest(path):
+    """Sounds and display metadata from a JSON manifest.
+
+    The manifest lists categories, each with an emoji and its sounds;
+    a sound has a name and optionally ``file`` (relative to the
+    manifest), ``emoji``, ``description`` and ``safe``.
+    """
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    base = os.path.dirname(os.path.abspath(path))
+    sounds, meta = [], {"categories": {}, "sounds": {}}
+    for cat in data["categories"]:
+        meta["categories"][cat["name"]] = {"emoji": cat.get("emoji", "")}
+        for sound in cat["sounds"]:
+            source = sound.get("file")
+            sounds.append((sound["name"], cat["name"], os.path.join(base, source) if source else None))
+            info = {k: sound[k] for k in ("emoji", "description", "safe") if k in sound}
+            if info:
+                meta["sounds"][sound["name"]] = info
+    return sounds, meta
+
+
+def build(sounds, out_path, meta=None, fmt=FLOAT32, progress=None, rate=None):
+    """Write a pack of ``(name, category, file or None)`` entries.
+
+    Files are decoded to mono one at a time and written straight to the
+    pack, so memory use is bounded by the largest sound; with ``rate``
+    they are converted to that sample rate first. Entries without a file
+    are synthesized by the app. Returns the number of sounds.
+    """
+    names = [n for n, _c, _f in sounds]
+    if len(set(names)) != len(names):
+        raise ValueError("sound names must be unique")
+    meta_bytes = json.dumps(meta or {}, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    encoded = [(n.encode("utf-8"), c.encode("utf-8")) for n, c, _f in sounds]
+    index_size = sum(ENTRY.size + len(n) + len(c) for n, c in encoded)
+    offset = _align(HEADER.size + index_size + len(meta_bytes))
+    entries = []
+    tmp = out_path + ".part"
+    try:
+        with open(tmp, "wb") as f:
+            f.seek(offset)
+            for i, (name, category, source) in enumerate(sounds):
+                if source is None:
+                    entries.append((0, 0, 0, float("nan"), 1, SYNTH))
+                else:
+                    sr, data = _read_audio(source)
+                    if rate and sr != rate:
+                        from ljudladan.resample import resample
+                        data, sr = resample(data, sr, rate), rate
+                    loudness = _loudness(data, sr)
+                    if fmt == INT16:
+                        import numpy as np
+                        data = np.clip(np.round(data * 32768), -32768, 32767)
+                    raw = data.astype(DTYPES[fmt]).tobytes()
+                    f.seek(offset)
+                    f.write(raw)
+                    entries.append((offset, len(data), sr, loudness, 1, fmt))
+                    offset = _align(offset + len(raw))
+                if progress is not None:
+                    progress(i + 1, len(sounds))
+            f.truncate(max(offset, f.tell()))
+            f.seek(0)
+            f.write(HEADER.pack(MAGIC, VERSION, 0, len(sounds), index_size, len(meta_bytes)))
+            for (name, category), entry in zip(encoded, entries):
+                f.write(ENTRY.pack(*entry, len(name), len(category)) + name + category)
+            f.write(meta_bytes)
+        os.replace(tmp, out_path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return len(sounds)
+
+
+# ── The sound library ────────────────────────────────────────
+
+
+def _data_dirs():
+    home = os.environ.get("XDG_DATA_HOME") or os.path.expanduser("~/.local/share")
+    system = os.environ.get("XDG_DATA_DIRS") or "/usr/local/share:/usr/share"
+    return [os.path.join(d, paths.APP_DIR) for d in [home] + system.split(":") if d]
+
+
+def find_packs():
+    """Installed packs, user packs first; a name in an earlier pack wins."""
+    found = []
+    for d in _data_dirs():
+        try:
+            found.extend(os.path.join(d, f) for f in sorted(os.listdir(d)) if f.endswith(PACK_SUFFIX))
+        except OSError:
+            continue
+    return found
+
+
+class Library:
+    """The sounds of several packs, with ``builtin`` over the catalogue.
+
+    A sound listed in an earlier pack wins; categories keep the order in
+    which they are first seen, packs before the catalogue.
+    """
+
+    def __init__(self, packs, builtin=False):
+        self.packs = packs
+        self._where = {}
+        self._category = {}
+        self._order = {}
+        self.meta = {"categories": {}, "sounds": {}}
+        metas = [pack.meta for pack in packs]
+        entries = [(asset.name, asset.category, (pack, asset)) for pack in packs for asset in pack]
+        if builtin:
+            sounds, meta = catalog.manifest()
+            metas.append(meta)
+            entries.extend((name, category, None) for name, category, _f in sounds)
+        for meta in metas:
+            for group in ("categories", "sounds"):
+                for key, value in meta.get(group, {}).items():
+                    self.meta[group].setdefault(key, value)
+        for name, category, hit in entries:
+            if name not in self._category:
+                self._category[name] = category
+                self._order.setdefault(category, []).append(name)
+                if hit is not None:
+                    self._where[name] = hit
+
+    def __contains__(self, name):
+        return name in self._category
+
+    def fingerprint(self):
+        """Short digest of the packs' paths, sizes and mtimes."""
+        digest = hashlib.sha1()
+        for pack in self.packs:
+            try:
+                st = os.stat(pack.path)
+            except OSError:
+                continue
+            digest.update(f"{pack.path}\0{st.st_size}\0{st.st_mtime_ns}\n".encode("utf-8"))
+        return digest.hexdigest()[:12]
+
+    def find(self, name):
+        """``(pack, asset)`` for ``name``, or None."""
+        return self._where.get(name)
+
+    def category_of(self, name):
+        return self._category.get(name, "")
+
+    def categories(self):
+        """``[{"name", "emoji", "sounds"}]`` in library order."""
+        return [{"name": name, "emoji": self.meta["categories"].get(name, {}).get("emoji", ""),
+                 "sounds": sounds} for name, sounds in self._order.items()]
+
+    def safe_sounds(self):
+        """``(emoji, name, description)`` of the sounds marked safe."""
+        return [(info.get("emoji", ""), name, info.get("description", ""))
+                for name, info in self.meta["sounds"].items() if info.get("safe") and name in self]
+
+    def recorded(self, name):
+        """``(mono samples, sample rate)`` of a stored recording, or None."""
+        hit = self._where.get(name)
+        if hit is None or hit[1].format == SYNTH:
+            return None
+        return hit[0].mono(name), hit[1].sample_rate
+
+
+def build_base(out_path):
+    """Write the base pack of the built-in catalogue; returns the number of sounds."""
+    sounds, meta = catalog.manifest()
+    return build(sounds, out_path, dict(meta, base=True))
+
+
+def load_library(extra=()):
+    """Open ``extra`` and the installed packs; the catalogue stands in for a missing base pack."""
+    packs = []
+    for path in list(extra) + find_packs():
+        try:
+            packs.append(AssetPack(path))
+        except (OSError, ValueError) as e:
+            print(f"Sound pack {path}: {e}", file=sys.stderr)
+    return Library(packs, builtin=not any(pack.meta.get("base") for pack in packs))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="ljudladan-pack", description="Build and inspect sound packs.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p = sub.add_parser("build", help="build a pack from a JSON manifest, or the base pack")
+    p.add_argument("manifest", nargs="?", help="omit to build the base pack from the catalogue")
+    p.add_argument("-o", "--output", required=True)
+    p.add_argument("--int16", action="store_true", help="store 16-bit samples (half the size)")
+    p.add_argument("--rate", type=int, help="convert recordings to this sample rate")
+    p = sub.add_parser("list", help="show the index of a pack")
+    p.add_argument("pack")
+    args = parser.parse_args(argv)
+    try:
+        if args.command == "build":
+            if args.manifest is None:
+                n = build_base(args.output)
+            else:
+                sounds, meta = read_manifest(args.manifest)
+                n = build(sounds, args.output, meta, INT16 if args.int16 else FLOAT32, rate=args.rate)
+            print(f"{n} sounds written to {args.output}", file=sys.stderr)
+            return 0
+        with AssetPack(args.pack) as pack:
+            for a in pack:
+                kind = "synth" if a.format == SYNTH else DTYPES[a.format]
+                length = f"{a.frames / a.sample_rate:.1f}s" if a.frames else ""
+                lufs = "" if a.loudness is None else f"{a.loudness:.1f} LUFS"
+                print(f"{a.category}\t{a.name}\t{kind}\t{length}\t{lufs}")
+        return 0
+    except (OSError, ValueError, KeyError) as e:
+        print(f"ljudladan-pack: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,14 @@
+"""User directories resolved from the XDG environment, without GLib."""
+import os
+
+APP_DIR = "ljudladan"
+
+
+def config_dir():
+    xdg = os.environ.get("XDG_CONFIG_HOME") or os.path.expanduser("~/.config")
+    return os.path.join(xdg, APP_DIR)
+
+
+def cache_dir():
+    xdg = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(xdg, APP_DIR)
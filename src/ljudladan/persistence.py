@@ -0,0 +1,143 @@
+"""Background persistence worker that keeps disk I/O off the main loop."""
+import queue
+import threading
+import time
+
+
+class PersistenceWorker:
+    """Run history appends and file rewrites on a dedicated thread.
+
+    Mutations are queued from the main loop and applied in bursts: every
+    record queued within ``coalesce_delay`` seconds goes to its journal in
+    a single write, and of several rewrites queued under the same key only
+    the newest is performed. Completion callbacks receive ``None`` or the
+    exception that occurred, and are delivered through ``notify`` (pass
+    ``GLib.idle_add`` to get them on the main loop).
+    """
+
+    def __init__(self, notify=None, coalesce_delay=0.05, on_error=None):
+        self._queue = queue.Queue()
+        self._notify = notify
+        self._delay = coalesce_delay
+        self._on_error = on_error
+        self._journals = set()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="persistence", daemon=True)
+        self._thread.start()
+
+    def append(self, journal, record, callback=None):
+        """Queue one record for ``journal``."""
+        self._put(("append", journal, record, callback))
+
+    def replace(self, key, write_fn, value, callback=None):
+        """Queue ``write_fn(value)``; pending rewrites of ``key`` are dropped."""
+        self._put(("replace", key, write_fn, value, callback))
+
+    def read(self, fn, callback):
+        """Queue ``fn()`` behind pending writes; ``callback(result, error)`` gets its outcome.
+
+        Nothing queued afterwards is written until ``fn`` returns, so it
+        reads a history that no record is added to halfway through.
+        """
+        self._put(("read", fn, callback))
+
+    def flush(self, timeout=None):
+        """Block until everything queued so far has been written."""
+        if self._closed:
+            return True
+        done = threading.Event()
+        self._queue.put(("barrier", done))
+        return done.wait(timeout)
+
+    def close(self, timeout=5.0):
+        """Write pending mutations, sync journals and stop the worker."""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(("stop",))
+        self._thread.join(timeout)
+
+    def _put(self, op):
+        if self._closed:
+            raise RuntimeError("persistence worker is closed")
+        self._queue.put(op)
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self._delay
+            while batch[-1][0] not in ("barrier", "read", "stop"):
+                remaining = deadline - time.monotonic()
+                try:
+                    batch.append(self._queue.get(timeout=remaining) if remaining > 0
+                                 else self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._apply(batch)
+            if batch[-1][0] == "stop":
+                self._sync_all()
+                return
+
+    def _apply(self, batch):
+        appends = {}
+        replaces = {}
+        barriers = []
+        reads = []
+        for op in batch:
+            if op[0] == "append":
+                _kind, journal, record, callback = op
+                records, callbacks = appends.setdefault(journal, ([], []))
+                records.append(record)
+                if callback:
+                    callbacks.append(callback)
+            elif op[0] == "replace":
+                _kind, key, write_fn, value, callback = op
+                callbacks = replaces.pop(key, (None, None, []))[2]
+                if callback:
+                    callbacks.append(callback)
+                replaces[key] = (write_fn, value, callbacks)
+            elif op[0] == "barrier":
+                barriers.append(op[1])
+            elif op[0] == "read":
+                reads.append(op[1:])
+        for journal, (records, callbacks) in appends.items():
+            self._journals.add(journal)
+            self._finish(callbacks, self._attempt(journal.extend, records))
+        for write_fn, value, callbacks in replaces.values():
+            self._finish(callbacks, self._attempt(write_fn, value))
+        for done in barriers:
+            done.set()
+        for fn, callback in reads:
+            try:
+                result, error = fn(), None
+            except Exception as e:
+                result, error = None, e
+            self._send(callback, result, error)
+
+    def _attempt(self, fn, arg):
+        try:
+            fn(arg)
+        except Exception as e:
+            return e
+        return None
+
+    def _finish(self, callbacks, error):
+        if error is not None and self._on_error:
+            callbacks = [self._on_error, *callbacks]
+        for callback in callbacks:
+            self._send(callback, error)
+
+    def _send(self, callback, *args):
+        if self._notify:
+            self._notify(_deliver, callback, *args)
+        else:
+            callback(*args)
+
+    def _sync_all(self):
+        for journal in self._journals:
+            self._attempt(lambda j: j.sync(), journal)
+
+
+def _deliver(callback, *args):
+    callback(*args)
+    return False
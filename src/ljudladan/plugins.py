@@ -0,0 +1,202 @@
+"""Plugins indexed by manifest and imported on first use.
+
+A plugin is a ``.py`` file in the plugins folder that declares itself
+with a literal manifest::
+
+    PLUGIN = {"name": "Night mode", "version": "1.0", "hooks": ["on_sound_played"]}
+
+    def on_sound_played(sound, category):
+        ...
+
+Manifests are read with :mod:`ast` without running the plugin and kept
+in an index keyed by file size and mtime, so startup only parses new or
+edited files. Files without ``PLUGIN`` offer their top-level ``on_*``
+functions as hooks. A plugin is imported the first time one of its
+hooks is called.
+"""
+import ast
+import json
+import os
+import sys
+import time
+
+from ljudladan.trace import span
+
+INDEX_VERSION = 1
+HOOK_PREFIX = "on_"
+
+
+def read_manifest(path):
+    """Return the manifest of the plugin at ``path`` without importing it."""
+    with open(path, "rb") as f:
+        tree = ast.parse(f.read(), path)
+    stem = os.path.splitext(os.path.basename(path))[0]
+    manifest, version, functions = None, None, []
+    for node in tree.body:
+        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef)):
+            functions.append(node.name)
+        elif isinstance(node, ast.Assign) and len(node.targets) == 1 \
+                and isinstance(node.targets[0], ast.Name):
+            target = node.targets[0].id
+            try:
+                if target == "PLUGIN":
+                    manifest = ast.literal_eval(node.value)
+                elif target == "__version__":
+                    version = ast.literal_eval(node.value)
+            except (ValueError, TypeError, SyntaxError, MemoryError, RecursionError):
+                raise ValueError(f"{target} must be a literal") from None
+    if manifest is None:
+        manifest = {"hooks": [f for f in functions if f.startswith(HOOK_PREFIX)]}
+    if not isinstance(manifest, dict):
+        raise ValueError("PLUGIN must be a dict")
+    hooks = manifest.get("hooks", [])
+    if not isinstance(hooks, (list, tuple)) or not all(isinstance(h, str) for h in hooks):
+        raise ValueError("hooks must be a list of names")
+    version = manifest.get("version", version)
+    return {"name": str(manifest.get("name", stem)),
+            "version": None if version is None else str(version), "hooks": list(hooks)}
+
+
+class _Plugin:
+    __slots__ = ("path", "manifest", "module", "error", "load_ms", "calls", "call_ms")
+
+    def __init__(self, path, manifest):
+        self.path, self.manifest = path, manifest
+        self.module = self.error = None
+        self.load_ms, self.calls, self.call_ms = 0.0, 0, 0.0
+
+
+class PluginManager:
+    """Index plugins in ``plugin_dir`` and dispatch hooks to them.
+
+    ``index_path`` caches parsed manifests between runs; pass None to
+    parse every file each time. Errors in one plugin are printed to
+    stderr and disable that plugin only.
+    """
+
+    def __init__(self, plugin_dir, index_path=None):
+        self.plugin_dir = plugin_dir
+        self.index_path = index_path
+        self.plugins = {}
+        self._table = {}
+        self._dispatch = {}
+        self.parsed = 0
+
+    def scan(self):
+        """Rebuild the index and the hook table; return the plugin count."""
+        cached = self._load_index()
+        files, plugins = {}, {}
+        try:
+            names = sorted(os.listdir(self.plugin_dir))
+        except OSError:
+            names = []
+        for fname in names:
+            if not fname.endswith(".py") or fname.startswith("_"):
+                continue
+            path = os.path.join(self.plugin_dir, fname)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            key = {"size": st.st_size, "mtime_ns": st.st_mtime_ns}
+            entry = cached.get(fname)
+            if not (entry and all(entry.get(k) == v for k, v in key.items())):
+                try:
+                    entry = dict(key, manifest=read_manifest(path))
+                except (SyntaxError, ValueError, OSError, MemoryError, RecursionError) as e:
+                    print(f"Plugin {fname}: {e}", file=sys.stderr)
+                    entry = dict(key, manifest=None)
+                self.parsed += 1
+            files[fname] = entry
+            if entry["manifest"] is not None:
+                old = self.plugins.get(fname)
+                same = old is not None and old.manifest == entry["manifest"]
+                plugins[fname] = old if same else _Plugin(path, entry["manifest"])
+        if self.index_path and (self.parsed or files.keys() != cached.keys()):
+            self._save_index(files)
+        self.plugins = plugins
+        self._table = {}
+        for fname, plugin in plugins.items():
+            for hook in plugin.manifest["hooks"]:
+                self._table.setdefault(hook, []).append(fname)
+        self._dispatch = {}
+        return len(plugins)
+
+    def _load_index(self):
+        if not self.index_path:
+            return {}
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if data.get("version") != INDEX_VERSION or data.get("dir") != self.plugin_dir:
+            return {}
+        return data.get("files", {})
+
+    def _save_index(self, files):
+        os.makedirs(os.path.dirname(self.index_path) or ".", exist_ok=True)
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"version": INDEX_VERSION, "dir": self.plugin_dir, "files": files}, f)
+        os.replace(tmp, self.index_path)
+
+    def has(self, hook):
+        return hook in self._table
+
+    def _import(self, fname, plugin):
+        import importlib.util
+        t = time.perf_counter()
+        try:
+            spec = importlib.util.spec_from_file_location(fname[:-3], plugin.path)
+            module = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(module)
+        except Exception as e:
+            plugin.error = e
+            print(f"Plugin {fname}: {e}", file=sys.stderr)
+        else:
+            plugin.module = module
+        plugin.load_ms += (time.perf_counter() - t) * 1000
+
+    def _resolve(self, hook):
+        handlers = []
+        for fname in self._table.get(hook, ()):
+            plugin = self.plugins[fname]
+            if plugin.module is None and plugin.error is None:
+                with span(f"load {fname}", "plugin"):
+                    self._import(fname, plugin)
+            fn = getattr(plugin.module, hook, None) if plugin.module is not None else None
+            if callable(fn):
+                handlers.append((fname, plugin, fn))
+        self._dispatch[hook] = handlers
+        return handlers
+
+    def call(self, hook, *args, **kwargs):
+        """Call ``hook`` on every plugin declaring it; return their results."""
+        handlers = self._dispatch.get(hook)
+        if handlers is None:
+            if hook not in self._table:
+                return []
+            handlers = self._resolve(hook)
+        results = []
+        for fname, plugin, fn in handlers:
+            if plugin.error is not None:
+                continue
+            t = time.perf_counter()
+            try:
+                with span(f"{fname}:{hook}", "plugin"):
+                    results.append(fn(*args, **kwargs))
+            except Exception as e:
+                plugin.error = e
+                print(f"Plugin {fname}: {hook}: {e}", file=sys.stderr)
+            plugin.calls += 1
+            plugin.call_ms += (time.perf_counter() - t) * 1000
+        return results
+
+    def timings(self):
+        """Load and call times per plugin, slowest first."""
+        rows = [{"file": fname, "name": p.manifest["name"], "version": p.manifest["version"],
+                 "loaded": p.module is not None, "load_ms": round(p.load_ms, 3), "calls": p.calls,
+                 "call_ms": round(p.call_ms, 3), "error": str(p.error) if p.error else None}
+                for fname, p in self.plugins.items()]
+        return sorted(rows, key=lambda r: r["load_ms"] + r["call_ms"], reverse=True)
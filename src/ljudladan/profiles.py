@@ -1,16 +1,45 @@
 
 # --- User profiles ---
+import copy as _pcopy
 import json as _pjson
 import os as _pos2
+import threading as _pthreading
 
 class ProfileManager:
-    """Simple user profile management for barn-appar."""
+    """Simple user profile management for barn-appar.
 
-    def __init__(self, app_name):
+    Parsed profiles are kept in memory and loaded on a background thread
+    when the manager is created, so switching between even hundreds of
+    profiles does not touch the disk. After ``watch()`` a Gio file monitor
+    drops entries that change on disk; without one, cached entries are
+    checked against the file's modification time. Writes go through a
+    temporary file and a rename, so a crash leaves either the old or the
+    new profile, never half of one. With a ``persistence`` worker the
+    current-profile marker is written in the background, so ``switch``
+    does no I/O at all.
+    """
+
+    def __init__(self, app_name, preload=True, persistence=None):
         self._app_name = app_name
         self._dir = _pos2.path.join(_pos2.path.expanduser('~'), '.config', app_name, 'profiles')
         _pos2.makedirs(self._dir, exist_ok=True)
+        self._cache = {}
+        self._names = None
+        self._dir_mtime = None
+        self._gen = 0
+        self._lock = _pthreading.Lock()
+        self._monitor = None
+        self._persistence = persistence
+        # Switches made and the last one written; the monitor leaves
+        # ``.current`` alone while they differ, so our own writes arriving
+        # late cannot undo a newer switch.
+        self._switches = self._written = 0
         self._current = self._load_current()
+        if preload:
+            self.preload()
+
+    def _path(self, name):
+        return _pos2.path.join(self._dir, f'{name}.json')
 
     def _load_current(self):
         try:
@@ -25,23 +54,115 @@ class ProfileManager:
 
     def switch(self, name):
         self._current = name
-        with open(_pos2.path.join(self._dir, '.current'), 'w') as f:
-            f.write(name)
+        self._switches += 1
+        if self._persistence is not None:
+            self._persistence.replace(('profile', self._dir), self._write_current,
+                                      (name, self._switches))
+        else:
+            self._write_current((name, self._switches))
+        if name not in self._cache:
+            self.preload([name])
 
     def list_profiles(self):
-        profiles = ['default']
-        for f in sorted(_pos2.listdir(self._dir)):
-            if f.endswith('.json') and f != '.current':
-                profiles.append(f[:-5])
-        return list(set(profiles))
+        """Profile names in order, ``default`` first."""
+        if self._monitor is None:
+            try:
+                mtime = _pos2.stat(self._dir).st_mtime_ns
+            except OSError:
+                mtime = None
+            if mtime != self._dir_mtime:
+                self._names, self._dir_mtime = None, mtime
+        if self._names is None:
+            found = {e.name[:-5] for e in _pos2.scandir(self._dir)
+                     if e.name.endswith('.json') and not e.name.startswith('.')}
+            found.discard('default')
+            self._names = ['default'] + sorted(found)
+        return list(self._names)
 
     def save_data(self, data):
-        with open(_pos2.path.join(self._dir, f'{self._current}.json'), 'w') as f:
-            _pjson.dump(data, f, ensure_ascii=False, indent=2)
+        name = self._current
+        self._write(self._path(name), _pjson.dumps(data, ensure_ascii=False, indent=2))
+        with self._lock:
+            self._gen += 1
+            self._cache[name] = (self._mtime(name), _pcopy.deepcopy(data))
+        if self._names is not None and name not in self._names:
+            self._names = ['default'] + sorted(self._names[1:] + [name])
 
     def load_data(self):
+        name = self._current
+        entry = self._cache.get(name)
+        if entry is not None and (self._monitor is not None or entry[0] == self._mtime(name)):
+            return _pcopy.deepcopy(entry[1])
+        return _pcopy.deepcopy(self._read(name, self._gen))
+
+    def preload(self, names=None):
+        """Parse ``names`` (default: every profile) on a background thread."""
+        names = self.list_profiles() if names is None else list(names)
+        t = _pthreading.Thread(target=self._preload, args=(names, self._gen),
+                               name='profile-preload', daemon=True)
+        t.start()
+        return t
+
+    def _preload(self, names, gen):
+        for name in names:
+            if name not in self._cache:
+                self._read(name, gen)
+
+    def _read(self, name, gen):
+        mtime = self._mtime(name)
         try:
-            with open(_pos2.path.join(self._dir, f'{self._current}.json')) as f:
-                return _pjson.load(f)
+            with open(self._path(name)) as f:
+                data = _pjson.load(f)
         except (FileNotFoundError, _pjson.JSONDecodeError):
-            return {}
+            data = {}
+        with self._lock:
+            # Skip storing if the profile was written or invalidated meanwhile.
+            if gen == self._gen:
+                self._cache[name] = (mtime, data)
+        return data
+
+    def _mtime(self, name):
+        try:
+            return _pos2.stat(self._path(name)).st_mtime_ns
+        except OSError:
+            return None
+
+    def _write_current(self, switch):
+        name, n = switch
+        # Losing the last switch in a crash is harmless, so skip the fsync.
+        self._write(_pos2.path.join(self._dir, '.current'), name, sync=False)
+        self._written = n
+
+    def _write(self, path, text, sync=True):
+        tmp = _pos2.path.join(self._dir, f'.{_pos2.path.basename(path)}.tmp')
+        with open(tmp, 'w') as f:
+            f.write(text)
+            if sync:
+                f.flush()
+                _pos2.fsync(f.fileno())
+        _pos2.replace(tmp, path)
+
+    def watch(self):
+        """Invalidate cached profiles on outside changes; needs Gio."""
+        if self._monitor is not None:
+            return True
+        try:
+            from gi.repository import Gio
+        except (ImportError, ValueError):
+            return False
+        self._monitor = Gio.File.new_for_path(self._dir).monitor_directory(
+            Gio.FileMonitorFlags.WATCH_MOVES, None)
+        self._monitor.connect('changed', self._on_changed)
+        return True
+
+    def _on_changed(self, _monitor, file, other, _event):
+        for f in (file, other):
+            base = f.get_basename() if f is not None else None
+            if base == '.current':
+                if self._written == self._switches:
+                    self._current = self._load_current()
+            elif base and base.endswith('.json') and not base.startswith('.'):
+                with self._lock:
+                    self._gen += 1
+                    self._cache.pop(base[:-5], None)
+                self._names = None
@@ -0,0 +1,103 @@
+"""Constant-memory rendering of long soundscapes to audio files."""
+import os
+
+import numpy as np
+
+from ljudladan.mixer import Mixer
+from ljudladan.sinks import NullSink, WavSink
+from ljudladan.synth import SAMPLE_RATE, Voice
+
+FADE_SECONDS = 5.0
+
+
+class FlacSink(NullSink):
+    """Write FLAC through the optional ``soundfile`` package."""
+
+    def __init__(self, path, sr=44100, channels=1):
+        import soundfile
+        super().__init__(sr, channels)
+        self._file = soundfile.SoundFile(path, "w", sr, channels, format="FLAC", subtype="PCM_16")
+
+    def write(self, block):
+        self._file.write(block)
+        self.frames += len(block)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def flac_available():
+    try:
+        import soundfile  # noqa: F401
+    except (ImportError, OSError):
+        return False
+    return True
+
+
+def open_sink(path, sr=SAMPLE_RATE, channels=1):
+    """Return a sink for ``path`` chosen by its extension."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".wav":
+        return WavSink(path, sr, channels)
+    if ext == ".flac":
+        return FlacSink(path, sr, channels)
+    raise ValueError(f"unsupported format: {ext}")
+
+
+def render_soundscape(layers, seconds, sink, sr=SAMPLE_RATE, seed=0,
+                      progress=None, cancel=None, fade=FADE_SECONDS):
+    """Stream ``seconds`` of mixed voices into ``sink`` block by block.
+
+    ``layers`` is a list of ``(sound, gain)`` pairs. Voices are synthesized
+    as they play, so memory use does not depend on the duration.
+    ``progress(fraction)`` is called about every percent; setting the
+    ``cancel`` event stops early. Returns True when the render completed.
+    """
+    mixer = Mixer(sr)
+    for i, (sound, gain) in enumerate(layers):
+        mixer.add(Voice(sound, sr, seed + i), gain=gain)
+    total = int(seconds * sr)
+    fade_len = max(1, int(min(fade, seconds / 4) * sr))
+    ramp = np.arange(mixer.block, dtype=np.float32)
+    env = np.empty(mixer.block, dtype=np.float32)
+    step = max(1, total // 100)
+    done = next_report = 0
+    while done < total:
+        if cancel is not None and cancel.is_set():
+            return False
+        block = mixer.mix()
+        n = min(mixer.block, total - done)
+        if done < fade_len or done + n > total - fade_len:
+            np.add(ramp, done, out=env)
+            np.minimum(env / fade_len, (total - env) / fade_len, out=env)
+            np.clip(env, 0.0, 1.0, out=env)
+            block *= env
+        sink.write(block[:n])
+        done += n
+        if progress is not None and done >= next_report:
+            progress(done / total)
+            next_report += step
+    return True
+
+
+def render_to_file(layers, seconds, path, sr=SAMPLE_RATE, seed=0, progress=None, cancel=None):
+    """Render into ``path`` atomically; a cancelled or failed render leaves no file."""
+    ext = os.path.splitext(path)[1]
+    tmp = path + ".part" + ext
+    sink = open_sink(tmp, sr)
+    try:
+        try:
+            ok = render_soundscape(layers, seconds, sink, sr, seed, progress, cancel)
+        finally:
+            sink.close()
+        if ok:
+            os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    if not ok:
+        os.remove(tmp)
+    return ok
@@ -0,0 +1,91 @@
+"""Audio sinks that consume float sample blocks."""
+import shutil
+import subprocess
+import wave
+
+import numpy as np
+
+
+class NullSink:
+    """Discard audio, only counting frames; for headless runs and benchmarks."""
+
+    def __init__(self, sr=44100, channels=1):
+        self.sr, self.channels = sr, channels
+        self.frames = 0
+
+    def write(self, block):
+        self.frames += len(block)
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class WavSink(NullSink):
+    """Write 16-bit PCM WAV, converting each block as it arrives."""
+
+    def __init__(self, path, sr=44100, channels=1):
+        super().__init__(sr, channels)
+        self.path = path
+        self._wav = wave.open(path, "wb")
+        self._wav.setnchannels(channels)
+        self._wav.setsampwidth(2)
+        self._wav.setframerate(sr)
+
+    def write(self, block):
+        pcm = np.clip(block, -1.0, 1.0) * 32767.0
+        self._wav.writeframesraw(pcm.astype("<i2").tobytes())
+        self.frames += len(block)
+
+    def close(self):
+        if self._wav is not None:
+            self._wav.close()
+            self._wav = None
+
+
+_PLAYERS = (
+    ("pw-cat", ["--playback", "--format", "f32", "--rate", "{sr}", "--channels", "{ch}", "-"]),
+    ("paplay", ["--raw", "--format=float32le", "--rate={sr}", "--channels={ch}"]),
+    ("aplay", ["-q", "-t", "raw", "-f", "FLOAT_LE", "-r", "{sr}", "-c", "{ch}", "-"]),
+)
+
+
+class PipeSink(NullSink):
+    """Stream raw float32 samples to a command-line audio player.
+
+    Writes block once the player's buffer is full, which paces the
+    caller to the sound card.
+    """
+
+    def __init__(self, command, sr=44100, channels=1):
+        super().__init__(sr, channels)
+        self._proc = subprocess.Popen(command, stdin=subprocess.PIPE,
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    def write(self, block):
+        self._proc.stdin.write(memoryview(np.ascontiguousarray(block, dtype="<f4")).cast("B"))
+        self.frames += len(block)
+
+    def close(self):
+        if self._proc is not None:
+            try:
+                self._proc.stdin.close()
+            except OSError:
+                pass
+            self._proc.terminate()
+            self._proc.wait()
+            self._proc = None
+
+
+def device_sink(sr=44100, channels=1):
+    """Return a PipeSink for the first audio player found, or ``None``."""
+    for name, args in _PLAYERS:
+        path = shutil.which(name)
+        if path:
+            return PipeSink([path] + [a.format(sr=sr, ch=channels) for a in args], sr, channels)
+    return None
@@ -0,0 +1,248 @@
+"""Running comfort and volume statistics over the session history."""
+from datetime import date
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+RATINGS = ("good", "okay", "uncomfortable")
+# Ratings that mean the volume was tolerated.
+TOLERATED = ("good", "okay")
+BUCKET = 10
+
+
+def volume_bucket(volume):
+    """Lower edge of the BUCKET-wide volume range ``volume`` falls in."""
+    return min(100, max(0, int(volume))) // BUCKET * BUCKET
+
+
+class Aggregate:
+    """Counts and sums for one group of sessions."""
+
+    __slots__ = ("plays", "ratings", "volume_sum", "volume_n", "tolerated_sum", "tolerated_n",
+                 "tolerated_max")
+
+    def __init__(self):
+        self.plays = 0
+        self.ratings = [0] * len(RATINGS)
+        self.volume_sum = 0.0
+        self.volume_n = 0
+        self.tolerated_sum = 0.0
+        self.tolerated_n = 0
+        self.tolerated_max = None
+
+    def add_play(self, volume):
+        self.plays += 1
+        if volume is not None:
+            self.volume_sum += volume
+            self.volume_n += 1
+
+    def add_rating(self, index, volume):
+        self.ratings[index] += 1
+        if volume is not None and RATINGS[index] in TOLERATED:
+            self.tolerated_sum += volume
+            self.tolerated_n += 1
+            if self.tolerated_max is None or volume > self.tolerated_max:
+                self.tolerated_max = volume
+
+    @property
+    def rated(self):
+        return sum(self.ratings)
+
+    @property
+    def comfort(self):
+        """Share of ratings that were not uncomfortable, or None."""
+        n = self.rated
+        return (n - self.ratings[RATINGS.index("uncomfortable")]) / n if n else None
+
+    @property
+    def mean_volume(self):
+        return self.volume_sum / self.volume_n if self.volume_n else None
+
+    @property
+    def tolerated_volume(self):
+        """Mean volume of ratings in TOLERATED, or None."""
+        return self.tolerated_sum / self.tolerated_n if self.tolerated_n else None
+
+    def as_dict(self):
+        return {"plays": self.plays, "ratings": dict(zip(RATINGS, self.ratings)),
+                "mean_volume": self.mean_volume, "tolerated_volume": self.tolerated_volume,
+                "tolerated_max": self.tolerated_max, "comfort": self.comfort}
+
+
+class Stats:
+    """Aggregates per sound, category, volume bucket and day.
+
+    ``add`` folds one history record in constant time; ``from_history``
+    builds the same result from a whole history, grouping with NumPy
+    when it is available. Ratings without a sound are credited to the
+    sound played last, as in :func:`ljudladan.store.query`. The
+    tolerated-volume trend is a least-squares line through the volumes
+    of tolerated ratings against their day, kept as running sums.
+    """
+
+    GROUPS = ("sound", "category", "bucket", "day")
+
+    def __init__(self):
+        self.total = Aggregate()
+        self.groups = {g: {} for g in self.GROUPS}
+        self._trend = [0, 0.0, 0.0, 0.0, 0.0]
+        self._last = (None, None)
+        self._days = {}
+
+    def _ordinal(self, day):
+        n = self._days.get(day)
+        if n is None:
+            try:
+                n = date.fromisoformat(day).toordinal()
+            except ValueError:
+                n = None
+            self._days[day] = n
+        return n
+
+    def _group(self, group, key):
+        agg = self.groups[group].get(key)
+        if agg is None:
+            agg = self.groups[group][key] = Aggregate()
+        return agg
+
+    def _keys(self, record, sound, category):
+        volume = record.get("volume")
+        return (("sound", sound), ("category", category),
+                ("bucket", volume_bucket(volume) if volume is not None else None),
+                ("day", str(record.get("date", ""))[:10] or None))
+
+    def add(self, record):
+        """Fold one history record into the aggregates."""
+        if "event" in record:
+            return
+        volume = record.get("volume")
+        comfort = record.get("comfort")
+        if comfort is None:
+            sound, category = record.get("sound"), record.get("category")
+            self._last = (sound, category)
+            targets = [self.total] + [self._group(g, k) for g, k in self._keys(record, sound, category)
+                                      if k is not None]
+            for agg in targets:
+                agg.add_play(volume)
+            return
+        if comfort not in RATINGS:
+            return
+        sound = record.get("sound", self._last[0])
+        category = record.get("category", self._last[1])
+        index = RATINGS.index(comfort)
+        for agg in [self.total] + [self._group(g, k) for g, k in self._keys(record, sound, category)
+                                   if k is not None]:
+            agg.add_rating(index, volume)
+        if volume is not None and comfort in TOLERATED:
+            x = self._ordinal(str(record.get("date", ""))[:10])
+            if x is not None:
+                t = self._trend
+                t[0] += 1
+                t[1] += x
+                t[2] += volume
+                t[3] += x * volume
+                t[4] += x * x
+
+    def extend(self, records):
+        for record in records:
+            self.add(record)
+
+    @classmethod
+    def from_history(cls, records):
+        """Build statistics for a whole history in one pass."""
+        stats = cls()
+        if np is None:
+            stats.extend(records)
+            return stats
+        tables = {g: {} for g in cls.GROUPS}
+        codes = {g: [] for g in cls.GROUPS}
+        volumes, kinds = [], []
+        last = (None, None)
+        for record in records:
+            if "event" in record:
+                continue
+            comfort = record.get("comfort")
+            if comfort is None:
+                kind = -1
+                last = sound, category = record.get("sound"), record.get("category")
+            elif comfort in RATINGS:
+                kind = RATINGS.index(comfort)
+                sound = record.get("sound", last[0])
+                category = record.get("category", last[1])
+            else:
+                continue
+            for group, key in stats._keys(record, sound, category):
+                table = tables[group]
+                codes[group].append(-1 if key is None else table.setdefault(key, len(table)))
+            volume = record.get("volume")
+            volumes.append(np.nan if volume is None else volume)
+            kinds.append(kind)
+        stats._last = last
+        if not kinds:
+            return stats
+        kinds = np.asarray(kinds)
+        volumes = np.asarray(volumes, dtype=np.float64)
+        stats.total = cls._fill_groups(1, np.zeros(len(kinds), dtype=np.intp), kinds, volumes)[0]
+        for group, table in tables.items():
+            code = np.asarray(codes[group], dtype=np.intp)
+            present = code >= 0
+            aggs = cls._fill_groups(len(table), code[present], kinds[present], volumes[present])
+            stats.groups[group] = dict(zip(table, aggs))
+        day = np.asarray(codes["day"], dtype=np.intp)
+        tol = np.isin(kinds, [RATINGS.index(r) for r in TOLERATED]) & ~np.isnan(volumes) & (day >= 0)
+        if tol.any():
+            ordinals = np.asarray([stats._ordinal(d) for d in tables["day"]], dtype=np.float64)
+            x = ordinals[day[tol]]
+            ok = ~np.isnan(x)
+            x, y = x[ok], volumes[tol][ok]
+            stats._trend = [int(ok.sum()), float(x.sum()), float(y.sum()),
+                            float((x * y).sum()), float((x * x).sum())]
+        return stats
+
+    @staticmethod
+    def _fill_groups(n, inverse, kinds, volumes):
+        has_volume = ~np.isnan(volumes)
+        vol = np.where(has_volume, volumes, 0.0)
+        plays = kinds < 0
+        play_n = np.bincount(inverse[plays], minlength=n)
+        play_vn = np.bincount(inverse[plays & has_volume], minlength=n)
+        play_vs = np.bincount(inverse[plays], weights=vol[plays], minlength=n)
+        ratings = [np.bincount(inverse[kinds == i], minlength=n) for i in range(len(RATINGS))]
+        tol = np.isin(kinds, [RATINGS.index(r) for r in TOLERATED]) & has_volume
+        tol_n = np.bincount(inverse[tol], minlength=n)
+        tol_s = np.bincount(inverse[tol], weights=vol[tol], minlength=n)
+        tol_max = np.full(n, -np.inf)
+        np.maximum.at(tol_max, inverse[tol], vol[tol])
+        aggs = []
+        for i in range(n):
+            agg = Aggregate()
+            agg.plays = int(play_n[i])
+            agg.volume_n = int(play_vn[i])
+            agg.volume_sum = float(play_vs[i])
+            agg.ratings = [int(r[i]) for r in ratings]
+            agg.tolerated_n = int(tol_n[i])
+            agg.tolerated_sum = float(tol_s[i])
+            if tol_n[i]:
+                m = tol_max[i]
+                agg.tolerated_max = int(m) if float(m).is_integer() else float(m)
+            aggs.append(agg)
+        return aggs
+
+    def trend(self):
+        """Tolerated-volume change per day, or None with too little data."""
+        n, sx, sy, sxy, sxx = self._trend
+        denom = n * sxx - sx * sx
+        if n < 2 or denom == 0:
+            return None
+        return (n * sxy - sx * sy) / denom
+
+    def top(self, group, n=5, key=lambda a: a.plays):
+        """The ``n`` largest groups of one kind as ``(key, Aggregate)``."""
+        return sorted(self.groups[group].items(), key=lambda kv: key(kv[1]), reverse=True)[:n]
+
+    def days(self, last=None):
+        """Per-day aggregates in date order, optionally only the ``last`` days."""
+        items = sorted(self.groups["day"].items())
+        return items[-last:] if last else items
@@ -0,0 +1,276 @@
+"""Indexed SQLite history store and history queries."""
+import json
+import os
+import sqlite3
+import threading
+
+from ljudladan.trace import traced
+
+SCHEMA_VERSION = 2
+
+
+class HistoryStore:
+    """SQLite table with one indexed column per history field.
+
+    Offers the same ``load``/``append``/``extend`` interface as
+    :class:`ljudladan.journal.Journal`. On first use the table is filled
+    from ``migrate_from``, any iterable of records such as the journal
+    the store replaces. A source with ``changes(cursor)`` is followed
+    further: its cursor is kept in a metadata table and each open takes
+    in only what was added since, so sessions recorded while the journal
+    was in use again are not lost. Keys outside ``fields`` are kept as
+    JSON.
+    """
+
+    def __init__(self, path, fields, indexed=(), table="history", migrate_from=None):
+        self.path = path
+        self.fields = tuple(fields)
+        self.table = table
+        self._indexed = tuple(indexed)
+        self._migrate_from = migrate_from
+        self._lock = threading.Lock()
+        self._db = None
+
+    def _connect(self):
+        if self._db is not None:
+            return self._db
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        db = sqlite3.connect(self.path, check_same_thread=False)
+        db.execute("PRAGMA journal_mode=WAL")
+        db.execute("PRAGMA synchronous=NORMAL")
+        version = db.execute("PRAGMA user_version").fetchone()[0]
+        if version < SCHEMA_VERSION:
+            self._create(db)
+            db.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        if self._migrate_from is not None:
+            self._catch_up(db, version)
+        db.commit()
+        self._db = db
+        return db
+
+    def _catch_up(self, db, version):
+        source = self._migrate_from
+        if not hasattr(source, "changes"):
+            if version == 0:
+                self._insert(db, _link_comfort(source))
+            return
+        row = db.execute(f'SELECT value FROM "{self.table}_meta" WHERE key = ?',
+                         ("source_cursor",)).fetchone()
+        cursor = json.loads(row[0]) if row else None
+        last = [cursor]
+
+        def records():
+            for position, record in source.changes(cursor):
+                last[0] = position
+                yield record
+
+        linked = _link_comfort(records(), *self._last_sound(db))
+        if cursor is None and version:
+            # A store from before cursors were kept: skip what it already holds.
+            newest = db.execute(f'SELECT MAX("date") FROM "{self.table}"').fetchone()[0]
+            if newest is not None:
+                linked = (r for r in linked if r.get("date", "") > newest)
+        self._insert(db, linked)
+        if last[0] != cursor:
+            db.execute(f'INSERT OR REPLACE INTO "{self.table}_meta" (key, value) VALUES (?, ?)',
+                       ("source_cursor", json.dumps(last[0])))
+
+    def _last_sound(self, db):
+        if "sound" not in self.fields or "category" not in self.fields:
+            return None, None
+        row = db.execute(f'SELECT "sound", "category" FROM "{self.table}" '
+                         f'WHERE "sound" IS NOT NULL ORDER BY id DESC LIMIT 1').fetchone()
+        return row or (None, None)
+
+    def _create(self, db):
+        cols = ", ".join(f'"{f}"' for f in self.fields)
+        db.execute(f'CREATE TABLE IF NOT EXISTS "{self.table}" '
+                   f'(id INTEGER PRIMARY KEY, {cols}, extra TEXT)')
+        for f in self._indexed:
+            db.execute(f'CREATE INDEX IF NOT EXISTS "idx_{self.table}_{f}" ON "{self.table}"("{f}")')
+        db.execute(f'CREATE TABLE IF NOT EXISTS "{self.table}_meta" (key TEXT PRIMARY KEY, value TEXT)')
+
+    def _row(self, record):
+        extra = {k: v for k, v in record.items() if k not in self.fields}
+        return [record.get(f) for f in self.fields] + [json.dumps(extra, ensure_ascii=False) if extra else None]
+
+    def _insert(self, db, records):
+        marks = ", ".join("?" * (len(self.fields) + 1))
+        cols = ", ".join(f'"{f}"' for f in self.fields)
+        db.executemany(f'INSERT INTO "{self.table}" ({cols}, extra) VALUES ({marks})',
+                       (self._row(r) for r in records))
+
+    def _record(self, row):
+        record = {f: v for f, v in zip(self.fields, row) if v is not None}
+        if row[-1]:
+            record.update(json.loads(row[-1]))
+        return record
+
+    # ── Journal-compatible interface ─────────────────────────
+
+    def __iter__(self):
+        return self.select()
+
+    @traced(cat="persistence")
+    def load(self):
+        return list(self)
+
+    def append(self, record):
+        self.extend((record,))
+
+    @traced(cat="persistence")
+    def extend(self, records):
+        with self._lock:
+            db = self._connect()
+            self._insert(db, records)
+            db.commit()
+
+    def sync(self):
+        pass
+
+    def close(self):
+        with self._lock:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    needs_compaction = False
+
+    def compact_async(self):
+        return False
+
+    # ── Queries ──────────────────────────────────────────────
+
+    def _reader(self):
+        with self._lock:
+            self._connect()
+        return sqlite3.connect(self.path)
+
+    def _where(self, filters):
+        clauses, args = [], []
+        for key, value in filters.items():
+            if value is None:
+                continue
+            if key == "since":
+                clauses.append('"date" >= ?')
+            elif key == "until":
+                clauses.append('"date" < ?')
+            elif key == "min_volume":
+                clauses.append('"volume" >= ?')
+            elif key == "max_volume":
+                clauses.append('"volume" <= ?')
+            elif key in self.fields:
+                clauses.append(f'"{key}" = ?')
+            else:
+                raise ValueError(f"unknown filter: {key}")
+            args.append(value)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), args
+
+    @traced(cat="persistence")
+    def select(self, **filters):
+        """Yield matching records in insertion order without loading them all."""
+        where, args = self._where(filters)
+        cols = ", ".join(f'"{f}"' for f in self.fields)
+        db = self._reader()
+        try:
+            cur = db.execute(f'SELECT {cols}, extra FROM "{self.table}"{where} ORDER BY id', args)
+            while True:
+                rows = cur.fetchmany(1024)
+                if not rows:
+                    break
+                for row in rows:
+                    yield self._record(row)
+        finally:
+            db.close()
+
+    def changes(self, cursor=None):
+        """Yield ``(cursor, record)`` for every row after ``cursor``.
+
+        Cursors carry the row id, so resuming is an index range scan; a
+        cursor from another backend falls back to its record count.
+        """
+        cols = ", ".join(f'"{f}"' for f in self.fields)
+        cursor = cursor or {}
+        count = cursor.get("count", 0)
+        if "id" in cursor:
+            sql, args = f'SELECT id, {cols}, extra FROM "{self.table}" WHERE id > ? ORDER BY id', (cursor["id"],)
+        else:
+            sql, args = f'SELECT id, {cols}, extra FROM "{self.table}" ORDER BY id LIMIT -1 OFFSET ?', (count,)
+        db = self._reader()
+        try:
+            cur = db.execute(sql, args)
+            while True:
+                rows = cur.fetchmany(1024)
+                if not rows:
+                    break
+                for row in rows:
+                    count += 1
+                    yield {"id": row[0], "count": count}, self._record(row[1:])
+        finally:
+            db.close()
+
+    @traced(cat="persistence")
+    def count(self, **filters):
+        where, args = self._where(filters)
+        db = self._reader()
+        try:
+            return db.execute(f'SELECT COUNT(*) FROM "{self.table}"{where}', args).fetchone()[0]
+        finally:
+            db.close()
+
+    @traced(cat="persistence")
+    def group(self, by, **filters):
+        """Return ``{key: (count, average volume)}`` grouped by a field."""
+        if by not in self.fields:
+            raise ValueError(f"unknown field: {by}")
+        where, args = self._where(filters)
+        volume = 'AVG("volume")' if "volume" in self.fields else "NULL"
+        db = self._reader()
+        try:
+            rows = db.execute(f'SELECT "{by}", COUNT(*), {volume} FROM "{self.table}"{where} '
+                              f'GROUP BY "{by}"', args).fetchall()
+        finally:
+            db.close()
+        return {key: (n, avg) for key, n, avg in rows}
+
+
+def _link_comfort(records, sound=None, category=None):
+    """Attach the last played sound to comfort ratings that lack one."""
+    for record in records:
+        if "comfort" in record and "sound" not in record and sound is not None:
+            record = dict(record, sound=sound, category=category)
+        elif "sound" in record:
+            sound, category = record.get("sound"), record.get("category")
+        yield record
+
+
+def _matches(record, filters):
+    for key, value in filters.items():
+        if value is None:
+            continue
+        if key == "since":
+            ok = record.get("date", "") >= value
+        elif key == "until":
+            ok = record.get("date", "") < value
+        elif key == "min_volume":
+            ok = record.get("volume") is not None and record["volume"] >= value
+        elif key == "max_volume":
+            ok = record.get("volume") is not None and record["volume"] <= value
+        else:
+            ok = record.get(key) == value
+        if not ok:
+            return False
+    return True
+
+
+def query(history, **filters):
+    """Yield records of any history backend matching ``filters``.
+
+    Supported filters are field equality plus ``since``/``until`` on the
+    date and ``min_volume``/``max_volume``. The SQLite store answers from
+    its indexes; other backends are scanned as a stream.
+    """
+    if isinstance(history, HistoryStore):
+        return history.select(**filters)
+    return (r for r in _link_comfort(history) if _matches(r, filters))
+
@@ -0,0 +1,448 @@
+"""Procedural synthesis of the built-in sound library with NumPy."""
+import zlib
+
+import numpy as np
+
+# Bump when a recipe changes so buffers cached on disk are rendered again.
+VERSION = 1
+SAMPLE_RATE = 44100
+BLOCK_SIZE = 1024
+HEADROOM = 0.5
+TAU = 2 * np.pi
+
+
+# ── Modulators: functions of the block's time axis ──────────
+
+def _lfo(rate, depth, phase=0.0):
+    """Sine swell between ``1 - depth`` and 1."""
+    return lambda t: 1 - depth * (0.5 + 0.5 * np.sin(TAU * rate * t + phase))
+
+
+def _drift(rng, rates, depth):
+    """Slow irregular movement made from a few unrelated sines."""
+    rates = np.asarray(rates, dtype=float)[:, None]
+    phases = rng.uniform(0, TAU, len(rates))[:, None]
+
+    def mod(t):
+        s = np.sin(TAU * rates * t + phases).mean(axis=0)
+        return 1 - depth * (0.5 + 0.5 * s)
+    return mod
+
+
+def _gate(on, period, ramp=0.01, offset=0.0):
+    """Repeating on/off cadence with short ramps to avoid clicks."""
+    def mod(t):
+        x = (t + offset) % period
+        return np.clip(np.minimum(x, on - x) / ramp, 0, 1)
+    return mod
+
+
+def _mul(*mods):
+    def mod(t):
+        out = mods[0](t)
+        for m in mods[1:]:
+            out = out * m(t)
+        return out
+    return mod
+
+
+# ── Spectral shapes for filtered noise ───────────────────────
+
+def _pink(f):
+    return 1 / np.sqrt(np.maximum(f, 20.0))
+
+
+def _brown(f):
+    return 1 / np.maximum(f, 20.0)
+
+
+def _band(lo, hi, color=None):
+    """Smooth band-pass in log frequency, optionally over a coloured base."""
+    centre, width = np.sqrt(lo * hi), np.log2(hi / lo) / 2
+
+    def shape(f):
+        octaves = np.log2(np.maximum(f, 1.0) / centre)
+        s = np.exp(-0.5 * (octaves / width) ** 4)
+        return s * color(f) if color else s
+    return shape
+
+
+# ── Layers ───────────────────────────────────────────────────
+
+class _Noise:
+    """Stationary coloured noise built by overlap-adding shaped spectra.
+
+    Each block is one inverse real FFT of random phases under a fixed
+    magnitude shape; a sine window at 50 % overlap keeps the power flat
+    across block boundaries.
+    """
+
+    def __init__(self, rng, sr, shape, level, mod=None):
+        n = 2 * BLOCK_SIZE
+        s = shape(np.fft.rfftfreq(n, 1 / sr)) if shape else np.ones(n // 2 + 1)
+        s[0] = 0.0
+        self._shape = s * (n / np.sqrt(2 * np.sum(s ** 2))) / np.sqrt(2)
+        self._window = np.sin(np.pi * (np.arange(n) + 0.5) / n)
+        self._tail = np.zeros(BLOCK_SIZE)
+        self._rng, self.level, self.mod = rng, level, mod
+
+    def add(self, out, t):
+        k = len(self._shape)
+        spec = (self._rng.standard_normal(k) + 1j * self._rng.standard_normal(k)) * self._shape
+        frame = np.fft.irfft(spec, 2 * BLOCK_SIZE) * self._window
+        block = frame[:BLOCK_SIZE] + self._tail
+        self._tail = frame[BLOCK_SIZE:]
+        out += block * (self.level * self.mod(t) if self.mod else self.level)
+
+
+class _Tone:
+    """Oscillator with harmonic partials, optional vibrato and modulation."""
+
+    def __init__(self, sr, freq, level, partials=(1.0,), vibrato=None, mod=None):
+        self._sr, self.freq, self.level, self.mod = sr, freq, level, mod
+        self._partials = np.asarray(partials, dtype=float)
+        self._k = np.arange(1, len(partials) + 1)[:, None]
+        self._vibrato = vibrato
+        self._phase = 0.0
+
+    def add(self, out, t):
+        if self._vibrato:
+            rate, semitones = self._vibrato
+            f = self.freq * 2 ** (semitones / 12 * np.sin(TAU * rate * t))
+            phase = self._phase + TAU * np.cumsum(f) / self._sr
+        else:
+            phase = self._phase + TAU * self.freq * np.arange(1, len(t) + 1) / self._sr
+        self._phase = phase[-1] % TAU
+        wave = self._partials @ np.sin(self._k * phase)
+        out += wave * (self.level * self.mod(t) if self.mod else self.level)
+
+
+class _Events:
+    """Granular layer: short sounds started at random intervals.
+
+    ``every`` is the (min, max) spacing in seconds between onsets. Grains
+    longer than one block are carried over into the following blocks.
+    """
+
+    def __init__(self, rng, sr, grain, every, level, max_len=4.0):
+        self._rng, self._sr, self._grain, self._every, self.level = rng, sr, grain, every, level
+        self._max = int(max_len * sr)
+        self._acc = np.zeros(BLOCK_SIZE + self._max)
+        self._next = int(rng.uniform(0, every[1]) * sr)
+
+    def add(self, out, t):
+        while self._next < BLOCK_SIZE:
+            g = self._grain(self._rng, self._sr)[:self._max]
+            self._acc[self._next:self._next + len(g)] += g
+            self._next += max(1, int(self._rng.uniform(*self._every) * self._sr))
+        self._next -= BLOCK_SIZE
+        out += self._acc[:BLOCK_SIZE] * self.level
+        self._acc[:-BLOCK_SIZE] = self._acc[BLOCK_SIZE:]
+        self._acc[-BLOCK_SIZE:] = 0.0
+
+
+# ── Grains ───────────────────────────────────────────────────
+
+def _envelope(n, sr, attack=0.005, decay=None, release=0.01):
+    t = np.arange(n) / sr
+    env = np.minimum(1.0, t / attack) * np.clip((n / sr - t) / release, 0, 1)
+    if decay:
+        env *= np.exp(-t / decay)
+    return env
+
+
+def _chirp(sr, f0, f1, dur, decay=None):
+    n = int(dur * sr)
+    t = np.arange(n) / sr
+    f = f0 * (f1 / f0) ** (t / dur)
+    return np.sin(TAU * np.cumsum(f) / sr) * _envelope(n, sr, decay=decay)
+
+
+def _voiced(sr, dur, times, freqs, partials=(1.0, 0.5, 0.3, 0.2), vibrato=None,
+            attack=0.03, release=0.1, noise=0.0, rng=None):
+    """Harmonic tone following a pitch contour, for calls and bowed notes."""
+    n = int(dur * sr)
+    t = np.arange(n) / sr
+    f = np.interp(t, np.asarray(times) * dur, freqs)
+    if vibrato:
+        f = f * 2 ** (vibrato[1] / 12 * np.sin(TAU * vibrato[0] * t))
+    phase = TAU * np.cumsum(f) / sr
+    k = np.arange(1, len(partials) + 1)[:, None]
+    wave = np.asarray(partials) @ np.sin(k * phase)
+    if noise:
+        wave += noise * rng.standard_normal(n)
+    return wave * _envelope(n, sr, attack=attack, release=release)
+
+
+def _note(sr, freq, dur, decay, partials):
+    """Struck or plucked note whose upper partials fade faster."""
+    n = int(dur * sr)
+    t = np.arange(n) / sr
+    k = np.arange(1, len(partials) + 1)[:, None]
+    amps = np.asarray(partials)[:, None] * np.exp(-t * k / decay)
+    return (amps * np.sin(TAU * freq * k * t)).sum(axis=0) * _envelope(n, sr, attack=0.003)
+
+
+def _burst(rng, sr, dur, smooth, attack=0.005, decay=None):
+    """Noise burst; ``smooth`` samples of moving average act as a low-pass."""
+    n = int(dur * sr)
+    x = rng.standard_normal(n + smooth)
+    c = np.cumsum(x)
+    x = (c[smooth:] - c[:-smooth]) / np.sqrt(smooth)
+    return x * _envelope(n, sr, attack=attack, decay=decay, release=min(0.3, dur / 3))
+
+
+_PENTATONIC = 261.63 * 2 ** (np.array([0, 2, 4, 7, 9, 12, 14, 16]) / 12)
+
+
+def _droplet(rng, sr):
+    return _chirp(sr, rng.uniform(2000, 5000), rng.uniform(1500, 3000), 0.01, decay=0.003) * rng.uniform(0.2, 1)
+
+
+def _bird_phrase(rng, sr):
+    parts = []
+    for _i in range(rng.integers(2, 6)):
+        f0 = rng.uniform(2500, 6000)
+        parts.append(_chirp(sr, f0, f0 * rng.uniform(0.5, 0.9), rng.uniform(0.05, 0.12)))
+        parts.append(np.zeros(int(rng.uniform(0.02, 0.08) * sr)))
+    return np.concatenate(parts) * 0.5
+
+
+def _bubble(rng, sr):
+    f0 = rng.uniform(250, 700)
+    return _chirp(sr, f0, f0 * rng.uniform(1.5, 2.5), rng.uniform(0.03, 0.07), decay=0.02)
+
+
+def _rumble(rng, sr):
+    return _burst(rng, sr, rng.uniform(2.0, 3.5), 200, attack=0.05, decay=0.8)
+
+
+def _passing_car(rng, sr):
+    dur = rng.uniform(2.5, 4.5)
+    x = _burst(rng, sr, dur, 40, attack=0.01)
+    t = np.arange(len(x)) / sr
+    return x * np.exp(-((t - dur / 2) / (dur / 5)) ** 2)
+
+
+def _piano(rng, sr):
+    return _note(sr, rng.choice(_PENTATONIC), 2.0, 1.2, (1.0, 0.6, 0.3, 0.2, 0.1)) * 0.5
+
+
+def _guitar(rng, sr):
+    return _note(sr, rng.choice(_PENTATONIC) / 2, 1.5, 0.5, (1.0, 0.8, 0.5, 0.4, 0.3, 0.2)) * 0.4
+
+
+def _pad(rng, sr):
+    f = rng.choice(_PENTATONIC) / 2
+    return _voiced(sr, 3.0, (0, 1), (f, f), partials=(1.0, 0.3, 0.1), attack=0.8, release=1.5) * 0.3
+
+
+def _bowed(rng, sr):
+    f = rng.choice(_PENTATONIC)
+    return _voiced(sr, rng.uniform(0.8, 1.6), (0, 1), (f, f), partials=1 / np.arange(1, 9),
+                   vibrato=(5.5, 0.15), attack=0.15, release=0.2) * 0.35
+
+
+def _flute_note(rng, sr):
+    f = rng.choice(_PENTATONIC) * 2
+    return _voiced(sr, rng.uniform(0.5, 1.2), (0, 1), (f, f), partials=(1.0, 0.2, 0.05),
+                   vibrato=(5.0, 0.1), attack=0.08, release=0.15, noise=0.03, rng=rng) * 0.4
+
+
+def _drum(rng, sr):
+    if rng.random() < 0.6:
+        return _chirp(sr, 150, 45, 0.25, decay=0.12)
+    return _burst(rng, sr, 0.15, 2, decay=0.05) * 0.6 + _chirp(sr, 220, 180, 0.15, decay=0.04) * 0.3
+
+
+def _bark(rng, sr):
+    f = rng.uniform(450, 650)
+    return _voiced(sr, rng.uniform(0.12, 0.2), (0, 0.3, 1), (f * 0.8, f, f * 0.6),
+                   partials=(1.0, 0.8, 0.6, 0.4, 0.3), attack=0.01, release=0.05, noise=0.4, rng=rng) * 0.5
+
+
+def _meow(rng, sr):
+    f = rng.uniform(450, 600)
+    return _voiced(sr, rng.uniform(0.6, 1.0), (0, 0.4, 1), (f, f * 1.5, f * 0.8),
+                   partials=(1.0, 0.6, 0.4, 0.2)) * 0.4
+
+
+def _moo(rng, sr):
+    f = rng.uniform(120, 160)
+    return _voiced(sr, rng.uniform(1.2, 2.0), (0, 0.2, 1), (f, f * 1.1, f * 0.8),
+                   partials=(1.0, 0.9, 0.7, 0.6, 0.5, 0.4, 0.3), attack=0.2, release=0.4) * 0.3
+
+
+def _neigh(rng, sr):
+    f = rng.uniform(600, 800)
+    return _voiced(sr, rng.uniform(1.0, 1.5), (0, 0.2, 1), (f, f * 1.6, f * 0.7),
+                   partials=(1.0, 0.5, 0.3), vibrato=(12, 1.0), noise=0.1, rng=rng) * 0.4
+
+
+def _crow(rng, sr):
+    f = rng.uniform(450, 550)
+    return _voiced(sr, 1.6, (0, 0.1, 0.3, 0.7, 1), (f, f * 1.6, f * 1.8, f * 1.5, f),
+                   partials=(1.0, 0.7, 0.5, 0.3), noise=0.05, rng=rng) * 0.4
+
+
+def _ding_dong(rng, sr):
+    ding = _note(sr, 659.3, 1.2, 0.8, (1.0, 0.3, 0.1))
+    dong = _note(sr, 523.3, 1.6, 1.0, (1.0, 0.3, 0.1))
+    out = np.zeros(int(0.6 * sr) + len(dong))
+    out[:len(ding)] += ding
+    out[int(0.6 * sr):] += dong
+    return out * 0.5
+
+
+# ── Library ──────────────────────────────────────────────────
+
+def _white_noise(rng, sr):
+    return [_Noise(rng, sr, None, 0.2)]
+
+
+def _rain(rng, sr):
+    return [_Noise(rng, sr, _band(400, 8000, _pink), 0.25, _drift(rng, (0.05, 0.13), 0.3)),
+            _Events(rng, sr, _droplet, (0.005, 0.04), 0.15, max_len=0.02)]
+
+
+def _wind(rng, sr):
+    return [_Noise(rng, sr, _band(150, 1200, _pink), 0.5, _drift(rng, (0.04, 0.11, 0.23), 0.8))]
+
+
+def _ocean(rng, sr):
+    return [_Noise(rng, sr, _band(80, 2500, _pink), 0.45, _lfo(0.09, 0.85, rng.uniform(0, TAU))),
+            _Noise(rng, sr, _brown, 0.1)]
+
+
+def _thunder(rng, sr):
+    return [_Noise(rng, sr, _brown, 0.1), _Events(rng, sr, _rumble, (4.0, 10.0), 0.5)]
+
+
+def _birds(rng, sr):
+    return [_Noise(rng, sr, _band(200, 1500, _pink), 0.08, _drift(rng, (0.07, 0.19), 0.6)),
+            _Events(rng, sr, _bird_phrase, (0.3, 1.8), 0.8, max_len=1.5)]
+
+
+def _forest(rng, sr):
+    return _wind(rng, sr)[:1] + _birds(rng, sr)[1:]
+
+
+def _bubbles(rng, sr):
+    return [_Noise(rng, sr, _brown, 0.04), _Events(rng, sr, _bubble, (0.04, 0.4), 0.8, max_len=0.1)]
+
+
+def _events(grain, every, level=1.0, max_len=4.0):
+    return lambda rng, sr: [_Events(rng, sr, grain, every, level, max_len)]
+
+
+def _vacuum(rng, sr):
+    return [_Noise(rng, sr, _band(300, 5000), 0.3),
+            _Tone(sr, 118, 0.06, partials=(1.0, 0.5, 0.4, 0.3), vibrato=(0.3, 0.05))]
+
+
+def _alarm(rng, sr):
+    return [_Tone(sr, 2000, 0.5, partials=(1.0, 0.2), mod=_mul(_gate(0.08, 0.16), _gate(0.8, 1.6)))]
+
+
+def _traffic(rng, sr):
+    return [_Noise(rng, sr, _brown, 0.25, _drift(rng, (0.03, 0.08), 0.5)),
+            _Events(rng, sr, _passing_car, (1.0, 4.0), 0.3, max_len=5.0)]
+
+
+def _phone(rng, sr):
+    ring = _mul(_gate(2.0, 6.0), _lfo(20, 0.5))
+    return [_Tone(sr, 440, 0.3, mod=ring), _Tone(sr, 480, 0.3, mod=ring)]
+
+
+SOUNDS = {
+    "Rain": _rain,
+    "Wind": _wind,
+    "Birds singing": _birds,
+    "Thunder": _thunder,
+    "Ocean waves": _ocean,
+    "Dog barking": _events(_bark, (0.25, 2.0)),
+    "Cat meowing": _events(_meow, (1.5, 4.0)),
+    "Cow mooing": _events(_moo, (3.0, 7.0)),
+    "Horse neighing": _events(_neigh, (3.0, 7.0)),
+    "Rooster crowing": _events(_crow, (4.0, 9.0)),
+    "Piano": _events(_piano, (0.25, 0.6)),
+    "Guitar": _events(_guitar, (0.2, 0.5)),
+    "Drums": _events(_drum, (0.25, 0.25), max_len=0.3),
+    "Violin": _events(_bowed, (0.8, 1.6)),
+    "Flute": _events(_flute_note, (0.5, 1.2)),
+    "Doorbell": _events(_ding_dong, (3.0, 6.0)),
+    "Vacuum cleaner": _vacuum,
+    "Alarm clock": _alarm,
+    "Traffic": _traffic,
+    "Phone ringing": _phone,
+    "Soft music": _events(_pad, (0.8, 1.8)),
+    "Forest": _forest,
+    "White noise": _white_noise,
+    "Bubbles": _bubbles,
+}
+
+
+class Voice:
+    """One sound being generated in fixed-size blocks."""
+
+    def __init__(self, name, sr=SAMPLE_RATE, seed=0):
+        try:
+            recipe = SOUNDS[name]
+        except KeyError:
+            raise KeyError(f"unknown sound: {name}") from None
+        self.name, self.sr = name, sr
+        rng = np.random.default_rng((zlib.crc32(name.encode("utf-8")), seed))
+        self._layers = recipe(rng, sr)
+        self._pos = 0
+        self._ticks = np.arange(BLOCK_SIZE) / sr
+        self._pending = np.zeros(0, dtype=np.float32)
+
+    def render_block(self):
+        """Return the next ``BLOCK_SIZE`` samples as float32."""
+        t = self._pos / self.sr + self._ticks
+        out = np.zeros(BLOCK_SIZE)
+        for layer in self._layers:
+            layer.add(out, t)
+        self._pos += BLOCK_SIZE
+        out *= HEADROOM
+        return np.clip(out, -1.0, 1.0).astype(np.float32)
+
+    def read(self, n):
+        """Return the next ``n`` samples, whatever the block size."""
+        parts, have = [self._pending], len(self._pending)
+        while have < n:
+            block = self.render_block()
+            parts.append(block)
+            have += len(block)
+        data = np.concatenate(parts)
+        self._pending = data[n:]
+        return data[:n]
+
+    def read_into(self, out):
+        """Mixer source interface: fill ``out``; a voice never runs dry."""
+        if len(out) == BLOCK_SIZE and not len(self._pending):
+            out[:] = self.render_block()
+        else:
+            out[:] = self.read(len(out))
+        return len(out)
+
+
+def render(name, seconds, sr=SAMPLE_RATE, seed=0, volume=1.0):
+    """Render ``seconds`` of a library sound as a float32 array."""
+    out = Voice(name, sr, seed).read(int(seconds * sr))
+    if volume != 1.0:
+        out *= volume
+    return out
+
+
+def render_to(sink, name, seconds, sr=SAMPLE_RATE, seed=0, volume=1.0):
+    """Stream a library sound into ``sink`` block by block."""
+    voice = Voice(name, sr, seed)
+    remaining = int(seconds * sr)
+    while remaining > 0:
+        block = voice.render_block()[:remaining]
+        if volume != 1.0:
+            block *= volume
+        sink.write(block)
+        remaining -= len(block)
+    return sink
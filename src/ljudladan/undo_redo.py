@@ -0,0 +1,263 @@
+"""Undo/Redo stack for application state changes.
+
+History entries are command objects. :class:`SetValue` records one
+setting changing from an old to a new value; it is small, can be saved
+as JSON, and merges with a following edit of the same key made within
+``merge_window`` seconds, so dragging a slider becomes one step. Plain
+undo/redo callables are still accepted through ``push`` but are not
+saved. The history is bounded both by entry count and by an estimate of
+its size in bytes, oldest entries going first.
+"""
+import json
+import os
+from abc import ABC, abstractmethod
+import sys
+import time
+from collections import deque
+
+FORMAT_VERSION = 1
+MAX_BYTES = 256 * 1024
+MERGE_WINDOW = 1.0
+
+
+class Command(ABC):
+    """One undoable step; ``apply(key, value)`` performs value changes."""
+
+    __slots__ = ()
+    kind = None
+    description = ""
+    size = 200
+
+    @abstractmethod
+    def undo(self, apply):
+        pass
+
+    @abstractmethod
+    def redo(self, apply):
+        pass
+
+    def merge(self, other, window):
+        """Absorb ``other`` into this command; return True if it did."""
+        return False
+
+    def to_dict(self):
+        """Serializable form, or None for commands that cannot be saved."""
+        return None
+
+
+def _nbytes(value):
+    if isinstance(value, (list, tuple, dict)):
+        return len(json.dumps(value, ensure_ascii=False, default=str))
+    return sys.getsizeof(value)
+
+
+class SetValue(Command):
+    """``key`` changed from ``old`` to ``new``."""
+
+    kind = "set"
+    __slots__ = ("key", "old", "new", "description", "stamp", "size")
+
+    def __init__(self, key, old, new, description="", stamp=None):
+        self.key, self.old, self.new = key, old, new
+        self.description = description
+        self.stamp = time.monotonic() if stamp is None else stamp
+        self.size = self._size()
+
+    def _size(self):
+        return 64 + _nbytes(self.key) + _nbytes(self.old) + _nbytes(self.new) \
+            + _nbytes(self.description)
+
+    def undo(self, apply):
+        apply(self.key, self.old)
+
+    def redo(self, apply):
+        apply(self.key, self.new)
+
+    def merge(self, other, window):
+        if type(other) is not SetValue or other.key != self.key \
+                or other.stamp - self.stamp > window:
+            return False
+        self.new, self.stamp = other.new, other.stamp
+        self.size = self._size()
+        return True
+
+    def to_dict(self):
+        return {"kind": self.kind, "key": self.key, "old": self.old, "new": self.new,
+                "description": self.description}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["key"], data["old"], data["new"], data.get("description", ""), stamp=0.0)
+
+
+class _Callbacks(Command):
+    __slots__ = ("undo_fn", "redo_fn", "description")
+
+    def __init__(self, undo_fn, redo_fn, description):
+        self.undo_fn, self.redo_fn, self.description = undo_fn, redo_fn, description
+
+    def undo(self, apply):
+        self.undo_fn()
+
+    def redo(self, apply):
+        self.redo_fn()
+
+
+COMMANDS = {SetValue.kind: SetValue}
+
+
+class UndoRedoManager:
+    """Undo/redo manager bounded by ``max_size`` entries and ``max_bytes``.
+
+    ``apply(key, value)`` is called to undo or redo a :class:`SetValue`.
+    With ``path`` the history can be kept across restarts with ``save``
+    and ``load``.
+    """
+
+    def __init__(self, max_size=50, max_bytes=MAX_BYTES, merge_window=MERGE_WINDOW,
+                 apply=None, path=None):
+        self._undo_stack = deque()
+        self._redo_stack = deque()
+        self._max_size = max_size
+        self._max_bytes = max_bytes
+        self._merge_window = merge_window
+        self._bytes = 0
+        self._sealed = True
+        self.apply = apply
+        self.path = path
+
+    def push(self, undo_fn, redo_fn, description=""):
+        """Push an undoable action."""
+        self.record(_Callbacks(undo_fn, redo_fn, description))
+
+    def set_value(self, key, old, new, description=""):
+        """Record ``key`` changing from ``old`` to ``new``."""
+        if old != new:
+            self.record(SetValue(key, old, new, description))
+
+    def record(self, command):
+        """Add a command, merging it into the previous one where possible."""
+        top = self._undo_stack[-1] if self._undo_stack and not self._sealed else None
+        if top is not None:
+            size = top.size
+            if top.merge(command, self._merge_window):
+                self._bytes += top.size - size
+                self._redo_clear()
+                self._trim()
+                return
+        self._undo_stack.append(command)
+        self._bytes += command.size
+        self._sealed = False
+        self._redo_clear()
+        self._trim()
+
+    def seal(self):
+        """End the current edit so the next one is not merged into it."""
+        self._sealed = True
+
+    def _trim(self):
+        stack = self._undo_stack
+        while len(stack) > 1 and (len(stack) > self._max_size or self._bytes > self._max_bytes):
+            self._bytes -= stack.popleft().size
+        # Redo entries count too; the ones furthest from the present go first.
+        stack = self._redo_stack
+        while stack and (len(stack) > self._max_size or self._bytes > self._max_bytes):
+            self._bytes -= stack.popleft().size
+
+    def _redo_clear(self):
+        for command in self._redo_stack:
+            self._bytes -= command.size
+        self._redo_stack.clear()
+
+    def undo(self):
+        """Undo the last action. Returns True if successful."""
+        if not self._undo_stack:
+            return False
+        command = self._undo_stack.pop()
+        command.undo(self.apply)
+        self._redo_stack.append(command)
+        self._sealed = True
+        return True
+
+    def redo(self):
+        """Redo the last undone action. Returns True if successful."""
+        if not self._redo_stack:
+            return False
+        command = self._redo_stack.pop()
+        command.redo(self.apply)
+        self._undo_stack.append(command)
+        self._sealed = True
+        return True
+
+    def can_undo(self):
+        return bool(self._undo_stack)
+
+    def can_redo(self):
+        return bool(self._redo_stack)
+
+    @property
+    def undo_description(self):
+        return self._undo_stack[-1].description if self._undo_stack else ""
+
+    @property
+    def redo_description(self):
+        return self._redo_stack[-1].description if self._redo_stack else ""
+
+    @property
+    def nbytes(self):
+        """Estimated size of the history in bytes."""
+        return self._bytes
+
+    def clear(self):
+        self._undo_stack.clear()
+        self._redo_stack.clear()
+        self._bytes = 0
+        self._sealed = True
+
+    def save(self, path=None):
+        """Write the serializable part of the history; callbacks are skipped."""
+        path = path or self.path
+        data = {"version": FORMAT_VERSION,
+                "undo": [d for d in (c.to_dict() for c in self._undo_stack) if d is not None],
+                "redo": [d for d in (c.to_dict() for c in self._redo_stack) if d is not None]}
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def load(self, path=None, current=None):
+        """Replace the history with a saved one; return False if there is none.
+
+        ``current`` maps keys to their values now. Where the saved history
+        for a key does not lead to that value, as when the setting itself
+        was not kept, its commands are dropped rather than applied stale.
+        """
+        path = path or self.path
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if not isinstance(data, dict) or data.get("version") != FORMAT_VERSION:
+            return False
+        self.clear()
+        for name, stack in (("undo", self._undo_stack), ("redo", self._redo_stack)):
+            for item in data.get(name, []):
+                cls = COMMANDS.get(item.get("kind")) if isinstance(item, dict) else None
+                if cls is None:
+                    continue
+                try:
+                    command = cls.from_dict(item)
+                except (KeyError, TypeError):
+                    continue
+                stack.append(command)
+        for key, value in (current or {}).items():
+            undo = [c for c in self._undo_stack if getattr(c, "key", None) == key]
+            redo = [c for c in self._redo_stack if getattr(c, "key", None) == key]
+            if (undo and undo[-1].new != value) or (redo and redo[-1].old != value):
+                self._undo_stack = deque(c for c in self._undo_stack if c not in undo)
+                self._redo_stack = deque(c for c in self._redo_stack if c not in redo)
+        self._bytes = sum(c.size for c in self._undo_stack) + sum(c.size for c in self._redo_stack)
+        self._trim()
+        return True
@@ -0,0 +1,48 @@
+import os
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from ljudladan.cache import AudioCache  # noqa: E402
+
+
+def _buffer(value, n=1000):
+    return np.full(n, value, dtype=np.float32)
+
+
+def test_evicted_buffers_come_back_from_disk(tmp_path):
+    cache = AudioCache(budget=6000, spill_dir=str(tmp_path), tag="v1")
+    for i in range(3):
+        cache.put(("Rain", i), _buffer(i))
+    assert cache.evictions == 2 and cache.nbytes == 4000
+    again = cache.get(("Rain", 0))
+    assert again is not None and not again.flags.writeable
+    assert np.array_equal(again, _buffer(0)) and cache.spill_hits == 1
+    fresh = AudioCache(budget=6000, spill_dir=str(tmp_path), tag="v1")
+    assert np.array_equal(fresh.get(("Rain", 1)), _buffer(1))
+    assert fresh.get(("Rain", 9)) is None and fresh.misses == 1
+
+
+def test_other_tags_are_neither_read_nor_kept(tmp_path):
+    old = AudioCache(budget=0, spill_dir=str(tmp_path), tag="v1")
+    old.put(("Rain", 0), _buffer(1))
+    old.put(("Rain", 1), _buffer(2))
+    (tmp_path / "loose.npy").write_bytes(b"")
+    (tmp_path / "notes.txt").write_text("kept")
+    new = AudioCache(budget=0, spill_dir=str(tmp_path), tag="v2")
+    assert new.get(("Rain", 0)) is None
+    new.put(("Rain", 0), _buffer(3))
+    new.put(("Rain", 1), _buffer(4))
+    new.prune()
+    assert sorted(os.listdir(tmp_path)) == ["notes.txt", "v2"]
+    assert np.array_equal(new.get(("Rain", 0)), _buffer(3))
+
+
+def test_clear_removes_spilled_files(tmp_path):
+    cache = AudioCache(budget=0, spill_dir=str(tmp_path), tag="v1")
+    cache.put(("Rain", 0), _buffer(1))
+    cache.put(("Rain", 1), _buffer(2))
+    cache.clear(spilled=True)
+    assert cache.nbytes == 0 and os.listdir(tmp_path / "v1") == []
+    assert cache.get(("Rain", 0)) is None
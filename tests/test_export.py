@@ -0,0 +1,47 @@
+import json
+
+from ljudladan.export import IncrementalExport
+from ljudladan.journal import Journal
+
+
+def _lines(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f]
+
+
+def test_watermark_exports_only_new_records(tmp_path):
+    history = Journal(str(tmp_path / "sessions.jsonl"), ("date", "sound"))
+    history.extend([{"date": "2026-01-01", "sound": "Rain"}, {"date": "2026-01-02", "sound": "Wind"}])
+    state, out = str(tmp_path / "export-state.json"), str(tmp_path / "out.ndjson")
+    assert IncrementalExport(state).run(history, out) == 2
+    assert IncrementalExport(state).run(history, out) == 0
+    history.append({"date": "2026-01-03", "sound": "Forest"})
+    export = IncrementalExport(state)
+    assert export.run(history, out) == 1
+    assert [r["sound"] for r in _lines(out)] == ["Rain", "Wind", "Forest"]
+    export.reset(out)
+    assert export.run(history, out) == 3
+    history.close()
+
+
+def test_watermark_survives_compaction(tmp_path):
+    history = Journal(str(tmp_path / "sessions.jsonl"), ("date", "sound"))
+    history.extend([{"date": "2026-01-01", "sound": "Rain"}])
+    state, out = str(tmp_path / "export-state.json"), str(tmp_path / "out.csv")
+    assert IncrementalExport(state).run(history, out) == 1
+    history.compact()
+    history.append({"date": "2026-01-02", "sound": "Wind"})
+    assert IncrementalExport(state).run(history, out, row=lambda r: {"date": r["date"]}) == 1
+    with open(out, encoding="utf-8") as f:
+        assert f.read().splitlines()[1:] == ["2026-01-01,,", "2026-01-02,,"]
+    history.close()
+
+
+def test_month_rotation_splits_by_date(tmp_path):
+    history = Journal(str(tmp_path / "sessions.jsonl"), ("date", "sound"))
+    history.extend([{"date": "2026-01-31", "sound": "Rain"}, {"date": "2026-02-01", "sound": "Wind"}])
+    out = str(tmp_path / "out.ndjson")
+    assert IncrementalExport(str(tmp_path / "state.json")).run(history, out, rotate="month") == 2
+    assert _lines(str(tmp_path / "out-2026-01.ndjson")) == [{"date": "2026-01-31", "sound": "Rain"}]
+    assert _lines(str(tmp_path / "out-2026-02.ndjson")) == [{"date": "2026-02-01", "sound": "Wind"}]
+    history.close()
@@ -0,0 +1,91 @@
+import json
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from ljudladan.exposure import BUILTIN_PROGRAMS, FADE, JUMP, ExposureSession, Program, load_programs  # noqa: E402
+from ljudladan.mixer import Mixer  # noqa: E402
+
+SR = 1000
+PROGRAM = {"id": "test", "name": "Test", "sound": "A", "stop_on": ["uncomfortable"], "steps": [
+    {"ramp": [10, 50], "seconds": 2}, {"hold": 1}, {"swap": "B"}, {"volume": 20}, {"hold": 1}]}
+
+
+def _session(program=PROGRAM):
+    prog = Program(program, SR)
+    buffers = {s: np.full(300, i + 1, dtype=np.float32) for i, s in enumerate(prog.sounds)}
+    return prog, ExposureSession(prog, buffers)
+
+
+def _play(session, block=128):
+    mixer = Mixer(sr=SR, block=block)
+    mixer.master = 0.1
+    mixer.add(session, automation=session.automation)
+    blocks = []
+    while session.frame < session.end:
+        blocks.append(mixer.mix().copy())
+    return np.concatenate(blocks)
+
+
+def test_program_compiles_to_frames():
+    prog = Program(PROGRAM, SR)
+    jump = int(JUMP * SR)
+    assert prog.marks == [(0, 0), (jump + 2000, 1), (jump + 3000, 2), (jump + 3000, 3),
+                          (2 * jump + 3000, 4)]
+    assert prog.segments == [(0, jump + 3000, "A"), (jump + 3000, 2 * jump + 4000, "B")]
+    assert prog.length == 2 * jump + 4000
+    assert prog.gain_at(jump) == pytest.approx(0.1)
+    assert prog.gain_at(jump + 1000) == pytest.approx(0.3)
+    assert prog.gain_at(prog.length) == pytest.approx(0.2)
+
+
+def test_session_plays_segments_with_the_envelope():
+    prog, session = _session()
+    out = _play(session)
+    frames = np.arange(prog.length, dtype=np.float64)
+    gains = np.empty(prog.length)
+    prog.envelope(frames, gains)
+    level = np.where(frames < prog.segments[1][0], 1.0, 2.0)
+    assert np.allclose(out[:prog.length], 0.1 * level * gains, atol=1e-6)
+
+
+def test_events_are_sample_accurate_whatever_the_block_size():
+    expected = None
+    for block in (64, 100, 1024):
+        prog, session = _session()
+        _play(session, block)
+        events = session.drain_events()
+        assert events[0] == (0, "start", "test") and events[-1] == (prog.length, "end", None)
+        assert expected is None or events == expected
+        expected = events
+    assert [e[0] for e in expected if e[1] == "step"] == [m[0] for m in prog.marks]
+
+
+def test_stop_fades_out_from_the_current_frame():
+    prog, session = _session()
+    mixer = Mixer(sr=SR, block=100)
+    mixer.add(session, automation=session.automation)
+    for _i in range(10):
+        mixer.mix()
+    assert session.rating("uncomfortable")
+    assert session.end == 1000 + int(FADE * SR)
+    while session.frame < session.end:
+        mixer.mix()
+    assert mixer.mix().max() == 0.0
+    assert (1000, "stop", "uncomfortable") in session.drain_events()
+
+
+def test_builtin_programs_compile():
+    for data in BUILTIN_PROGRAMS:
+        prog = Program(data)
+        assert prog.length > 0 and prog.sounds[0] == data["sound"]
+
+
+def test_load_programs_skips_bad_files_and_names_unnamed_ones(tmp_path):
+    (tmp_path / "list.json").write_text("[1, 2]")
+    (tmp_path / "broken.json").write_text("{")
+    (tmp_path / "no-steps.json").write_text(json.dumps({"sound": "Rain"}))
+    (tmp_path / "mine.json").write_text(json.dumps({"sound": "Rain", "steps": [{"hold": 5}]}))
+    user = load_programs(str(tmp_path))[len(BUILTIN_PROGRAMS):]
+    assert [(p["id"], p["name"]) for p in user] == [("mine", "mine")]
@@ -0,0 +1,88 @@
+import json
+import os
+import threading
+
+from ljudladan.journal import Journal
+
+FIELDS = ("date", "sound", "volume")
+
+
+def _journal(tmp_path, fields=FIELDS, legacy=None):
+    return Journal(str(tmp_path / "sessions.jsonl"), fields, legacy_path=legacy)
+
+
+def test_round_trip_keeps_unknown_keys(tmp_path):
+    j = _journal(tmp_path)
+    j.append({"date": "2026-01-01", "sound": "Rain", "volume": 30})
+    j.extend([{"date": "2026-01-02", "comfort": "good"}, {"date": "2026-01-03", "sound": "Wind"}])
+    j.close()
+    assert _journal(tmp_path).load() == [
+        {"date": "2026-01-01", "sound": "Rain", "volume": 30},
+        {"date": "2026-01-02", "comfort": "good"},
+        {"date": "2026-01-03", "sound": "Wind"},
+    ]
+
+
+def test_torn_line_is_skipped_and_compacted_away(tmp_path):
+    j = _journal(tmp_path)
+    j.append({"date": "2026-01-01", "sound": "Rain"})
+    j.close()
+    with open(j.path, "ab") as f:
+        f.write(b'["2026-01-02","Wi')
+    j = _journal(tmp_path)
+    assert j.load() == [{"date": "2026-01-01", "sound": "Rain"}]
+    assert j.needs_compaction
+    j.append({"date": "2026-01-03", "sound": "Forest"})
+    assert [r["sound"] for r in j.load()] == ["Rain", "Forest"]
+    j.compact()
+    j.close()
+    with open(j.path, "rb") as f:
+        lines = f.read().splitlines()
+    assert len(lines) == 3 and b"Wi" not in b"".join(lines)
+    j = _journal(tmp_path)
+    assert [r["sound"] for r in j.load()] == ["Rain", "Forest"]
+    assert not j.needs_compaction
+
+
+def test_compaction_moves_to_the_current_layout(tmp_path):
+    old = _journal(tmp_path, fields=("date", "sound"))
+    old.extend([{"date": "2026-01-01", "sound": "Rain", "volume": 40}])
+    old.close()
+    j = _journal(tmp_path)
+    assert j.needs_compaction
+    j.compact()
+    j.append({"date": "2026-01-02", "sound": "Wind", "volume": 20})
+    j.close()
+    with open(j.path, encoding="utf-8") as f:
+        assert json.loads(f.readline())["fields"] == list(FIELDS)
+    assert _journal(tmp_path).load() == [
+        {"date": "2026-01-01", "sound": "Rain", "volume": 40},
+        {"date": "2026-01-02", "sound": "Wind", "volume": 20},
+    ]
+
+
+def test_changes_resume_after_compaction(tmp_path):
+    j = _journal(tmp_path)
+    j.extend({"date": f"2026-01-0{i}", "sound": "Rain"} for i in range(1, 4))
+    cursor = list(j.changes())[-1][0]
+    j.append({"date": "2026-01-04", "sound": "Wind"})
+    assert [r["date"] for _c, r in j.changes(cursor)] == ["2026-01-04"]
+    j.compact()
+    assert [r["date"] for _c, r in j.changes(cursor)] == ["2026-01-04"]
+    j.close()
+
+
+def test_legacy_history_is_migrated_once(tmp_path):
+    legacy = tmp_path / "sessions.json"
+    legacy.write_text(json.dumps([{"date": "2026-01-01", "sound": "Rain"}, "junk"]))
+    j = _journal(tmp_path, legacy=str(legacy))
+    threads = [threading.Thread(target=j.load) for _i in range(8)]
+    threads.append(threading.Thread(target=j.append, args=({"date": "2026-01-02"},)))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    j.close()
+    assert not legacy.exists() and os.path.exists(str(legacy) + ".migrated")
+    assert _journal(tmp_path, legacy=str(legacy)).load() == [
+        {"date": "2026-01-01", "sound": "Rain"}, {"date": "2026-01-02"}]
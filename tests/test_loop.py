@@ -0,0 +1,73 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from ljudladan.loop import LoopSource, find_loop_end, plan_loop, seamless  # noqa: E402
+
+SR = 8000
+
+
+def _tone(seconds, freq=220.37):
+    t = np.arange(int(seconds * SR)) / SR
+    return (0.5 * np.sin(2 * np.pi * freq * t)).astype(np.float32)
+
+
+def _noise(seconds, seed=0):
+    return np.random.default_rng(seed).uniform(-0.5, 0.5, int(seconds * SR)).astype(np.float32)
+
+
+def _max_step(x):
+    return float(np.abs(np.diff(x)).max())
+
+
+def test_seamless_wraps_without_a_click():
+    clip = _tone(10)
+    inner = _max_step(clip)
+    assert abs(float(clip[0]) - float(clip[-1])) > 2 * inner
+    loop = seamless(clip, SR)
+    wrapped = np.concatenate((loop[-1000:], loop[:1000]))
+    assert _max_step(wrapped) <= 1.05 * inner
+
+
+def test_loop_end_matches_the_start():
+    clip = _tone(10)
+    fade = int(0.5 * SR)
+    end, score = find_loop_end(clip, fade, 6 * SR, len(clip) - fade)
+    assert score > 0.999
+    assert np.allclose(clip[end:end + 100], clip[:100], atol=0.02)
+
+
+def test_plan_segments_cover_the_loop():
+    plan = plan_loop(_noise(20), SR, fade=0.5, segment=3.0)
+    assert plan.bounds[0][0] == 0
+    assert all(a[1] == b[0] for a, b in zip(plan.bounds, plan.bounds[1:]))
+    assert len(plan.similarity) == len(plan.bounds)
+    with pytest.raises(ValueError):
+        plan_loop(_noise(1), SR, fade=0.5)
+
+
+def test_source_plays_the_clip_then_loops_smoothly():
+    clip = _tone(10)
+    plan = plan_loop(clip, SR, fade=0.5, segment=None)
+    end = plan.bounds[-1][1]
+    out = np.zeros(3 * end, dtype=np.float32)
+    source = LoopSource(clip, plan)
+    for i in range(0, len(out), 1000):
+        source.read_into(out[i:i + 1000])
+    assert np.array_equal(out[plan.fade:end], clip[plan.fade:end])
+    assert _max_step(out) <= 1.05 * _max_step(clip)
+    assert source.frames == len(out)
+
+
+def test_variations_keep_the_level_and_are_seeded():
+    clip = _noise(20)
+    plan = plan_loop(clip, SR, fade=0.5, segment=2.0)
+    runs = []
+    for _i in range(2):
+        out = np.zeros(60 * SR, dtype=np.float32)
+        LoopSource(clip, plan, variations=True, seed=7).read_into(out)
+        runs.append(out)
+    assert np.array_equal(runs[0], runs[1])
+    rms = np.sqrt(np.mean(np.square(runs[0].reshape(-1, SR // 4), dtype=np.float64), axis=1))
+    target = np.sqrt(np.mean(np.square(clip, dtype=np.float64)))
+    assert np.abs(20 * np.log10(rms / target)).max() < 1.5
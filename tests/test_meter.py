@@ -0,0 +1,60 @@
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from ljudladan.meter import LEVELS, LoudnessMeter, level_name  # noqa: E402
+
+SR = 48000
+
+
+def _sine(freq, amplitude, seconds, phase=0.0):
+    t = np.arange(int(seconds * SR)) / SR
+    return (amplitude * np.sin(2 * np.pi * freq * t + phase)).astype(np.float32)
+
+
+def _measure(x, block=4800):
+    meter = LoudnessMeter(SR)
+    for i in range(0, len(x), block):
+        meter.process(x[i:i + block])
+    return meter
+
+
+def test_1khz_at_minus_20_dbfs_reads_minus_23_lufs():
+    meter = _measure(_sine(1000, 0.1, 5))
+    assert meter.integrated == pytest.approx(-23.0, abs=0.1)
+    assert meter.momentary == pytest.approx(-23.0, abs=0.1)
+    assert meter.short_term == pytest.approx(-23.0, abs=0.1)
+    assert meter.peak_db == pytest.approx(-20.0, abs=0.05)
+
+
+def test_block_size_does_not_change_the_reading():
+    x = _sine(440, 0.3, 4) + _sine(3000, 0.05, 4)
+    readings = {round(_measure(x, block).integrated, 6) for block in (256, 1000, 4800, len(x))}
+    assert len(readings) == 1
+
+
+def test_true_peak_catches_inter_sample_peaks():
+    # A quarter of the sample rate sampled 45 degrees off its crests.
+    meter = _measure(_sine(SR / 4, 0.5, 1, phase=math.pi / 4))
+    assert meter.peak_db == pytest.approx(20 * math.log10(0.5 / math.sqrt(2)), abs=0.05)
+    assert meter.true_peak_db > meter.peak_db + 2.5
+
+
+def test_silence_is_gated_out():
+    meter = _measure(np.zeros(SR * 2, dtype=np.float32))
+    assert meter.integrated == float("-inf")
+    assert meter.level == LEVELS[0]
+
+
+def test_relative_gate_ignores_quiet_passages():
+    loud = _sine(1000, 0.1, 5)
+    quiet = _sine(1000, 0.001, 5)
+    # Ungated, the quiet half would pull the reading down by 3 dB; only the
+    # blocks straddling the change get through the gate.
+    assert _measure(np.concatenate((loud, quiet))).integrated == pytest.approx(-23.0, abs=0.2)
+
+
+def test_levels_follow_the_thresholds():
+    assert [level_name(v) for v in (-80, -50, -30, -15, -8, 0)] == list(LEVELS)
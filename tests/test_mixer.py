@@ -0,0 +1,91 @@
+import threading
+import time
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from ljudladan.mixer import AudioOutput, BufferSource, Mixer, RingBuffer  # noqa: E402
+
+
+class _Collect:
+    def __init__(self):
+        self.blocks = []
+
+    def write(self, block):
+        self.blocks.append(np.array(block))
+
+    def close(self):
+        pass
+
+
+def test_ring_buffer_wraps_around_without_losing_samples():
+    ring = RingBuffer(10)
+    source, out = np.arange(100, dtype=np.float32), []
+    pos = 0
+    while pos < len(source) or ring.available():
+        pos += ring.write(source[pos:pos + 7])
+        block = np.zeros(4, dtype=np.float32)
+        out.extend(block[:ring.read_into(block)])
+        assert 0 <= ring.available() <= ring.capacity
+    assert np.array_equal(out, source)
+
+
+def test_ring_buffer_across_threads():
+    ring, n = RingBuffer(256), 20000
+    source, received, got = np.arange(n, dtype=np.float32), [], 0
+
+    def produce():
+        pos = 0
+        while pos < n:
+            k = ring.write(source[pos:pos + 100])
+            pos += k
+            if not k:
+                time.sleep(0)
+
+    t = threading.Thread(target=produce)
+    t.start()
+    block = np.zeros(64, dtype=np.float32)
+    while got < n:
+        k = ring.read_into(block)
+        received.append(block[:k].copy())
+        got += k
+        if not k:
+            time.sleep(0)
+    t.join()
+    assert np.array_equal(np.concatenate(received), source)
+
+
+def test_mix_sums_layers_and_drops_finished_ones():
+    mixer = Mixer(block=256)
+    mixer.add(np.full(256, 0.25, dtype=np.float32), gain=1.0)
+    mixer.add(np.full(100, 0.5, dtype=np.float32), gain=0.5, loop=True)
+    once = mixer.add(np.full(300, 0.1, dtype=np.float32))
+    assert np.allclose(mixer.mix(), 0.6)
+    out = mixer.mix()
+    assert np.allclose(out[:44], 0.35) and np.allclose(out[44:], 0.25)
+    assert len(mixer.tracks) == 1 and once not in mixer.tracks
+
+
+def test_gain_changes_are_ramped():
+    mixer = Mixer(block=256, smoothing=0.05)
+    track = mixer.add(np.ones(256, dtype=np.float32), gain=0.0, loop=True)
+    track.set_gain(1.0)
+    blocks = [mixer.mix().copy() for _i in range(12)]
+    steps = np.abs(np.diff(np.concatenate(blocks)))
+    assert steps.max() <= 256 / (0.05 * mixer.sr) / 256 + 1e-6
+    assert blocks[-1][-1] == pytest.approx(1.0)
+
+
+def test_output_delivers_every_block_in_order():
+    data = np.arange(512 * 16, dtype=np.float32) / 1e5
+    mixer = Mixer(block=512)
+    mixer.add(BufferSource(data))
+    sink = _Collect()
+    output = AudioOutput(mixer, sink, realtime=False)
+    output.start()
+    while output.blocks < 16:
+        time.sleep(0.01)
+    output.stop()
+    played = np.concatenate(sink.blocks)
+    assert np.array_equal(played[:len(data)], data)
@@ -0,0 +1,90 @@
+import json
+import wave
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from ljudladan import catalog  # noqa: E402
+from ljudladan.pack import FLOAT32, INT16, SYNTH, AssetPack, Library, build, build_base, read_manifest  # noqa: E402
+
+
+def _wav(path, data, sr=22050):
+    with wave.open(str(path), "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sr)
+        w.writeframes((data * 32767).astype("<i2").tobytes())
+
+
+def _manifest(tmp_path, data):
+    _wav(tmp_path / "hum.wav", data)
+    (tmp_path / "sounds.json").write_text(json.dumps({"categories": [
+        {"name": "Home", "emoji": "H", "sounds": [
+            {"name": "Fridge hum", "file": "hum.wav", "safe": True, "description": "Low"},
+            {"name": "Rain"}]}]}))
+    return read_manifest(str(tmp_path / "sounds.json"))
+
+
+def test_build_open_samples_round_trip(tmp_path):
+    data = (0.5 * np.sin(np.arange(22050) / 7)).astype(np.float32)
+    sounds, meta = _manifest(tmp_path, data)
+    assert build(sounds, str(tmp_path / "a.pack"), meta) == 2
+    with AssetPack(str(tmp_path / "a.pack")) as pack:
+        hum = pack.assets["Fridge hum"]
+        assert (hum.category, hum.sample_rate, hum.frames, hum.format) == ("Home", 22050, 22050, FLOAT32)
+        assert hum.offset % 64 == 0 and hum.loudness is not None
+        samples = pack.samples("Fridge hum")
+        assert samples.shape == (22050, 1) and not samples.flags.writeable
+        assert not samples.flags.owndata
+        assert np.allclose(samples[:, 0], data, atol=1e-4)
+        assert np.shares_memory(pack.mono("Fridge hum"), samples)
+        assert pack.assets["Rain"].format == SYNTH
+        with pytest.raises(ValueError):
+            pack.samples("Rain")
+        assert pack.meta["sounds"]["Fridge hum"]["safe"]
+
+
+def test_int16_and_resampled_packs(tmp_path):
+    data = (0.5 * np.sin(np.arange(4410) / 5)).astype(np.float32)
+    sounds, meta = _manifest(tmp_path, data)
+    build(sounds, str(tmp_path / "b.pack"), meta, INT16, rate=44100)
+    with AssetPack(str(tmp_path / "b.pack")) as pack:
+        hum = pack.assets["Fridge hum"]
+        assert (hum.format, hum.sample_rate, hum.frames) == (INT16, 44100, 8820)
+        mono = pack.mono("Fridge hum")
+        assert mono.dtype == np.float32 and np.abs(mono).max() == pytest.approx(0.5, abs=0.03)
+
+
+def test_bad_files_are_rejected(tmp_path):
+    (tmp_path / "x.pack").write_bytes(b"RIFF0000WAVEfmt ")
+    with pytest.raises(ValueError):
+        AssetPack(str(tmp_path / "x.pack"))
+    with pytest.raises(ValueError):
+        build([("A", "C", None), ("A", "C", None)], str(tmp_path / "y.pack"))
+    assert not (tmp_path / "y.pack.part").exists()
+
+
+def test_base_pack_is_the_catalogue(tmp_path):
+    build_base(str(tmp_path / "sounds.pack"))
+    with AssetPack(str(tmp_path / "sounds.pack")) as base:
+        library = Library([base])
+        assert base.meta["base"]
+        assert library.categories() == catalog.categories()
+        assert library.safe_sounds() == catalog.safe_sounds()
+        assert library.categories() == Library([], builtin=True).categories()
+
+
+def test_earlier_packs_win(tmp_path):
+    data = np.zeros(2000, dtype=np.float32)
+    sounds, meta = _manifest(tmp_path, data)
+    build(sounds, str(tmp_path / "user.pack"), meta)
+    build_base(str(tmp_path / "sounds.pack"))
+    with AssetPack(str(tmp_path / "user.pack")) as user, \
+            AssetPack(str(tmp_path / "sounds.pack")) as base:
+        library = Library([user, base])
+        assert library.category_of("Rain") == "Home"
+        assert [c["name"] for c in library.categories()][0] == "Home"
+        assert library.recorded("Fridge hum")[1] == 22050
+        assert library.recorded("Rain") is None and library.recorded("Wind") is None
+        assert "Wind" in library and "Fridge hum" in library
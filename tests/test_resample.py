@@ -0,0 +1,70 @@
+import math
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from ljudladan.resample import QUALITY, Resampler, filter_bank, ratio, resample  # noqa: E402
+
+RATES = [(44100, 48000), (48000, 44100), (22050, 44100), (44100, 16000), (8000, 8000 * 3)]
+
+
+def _signal(n, seed=0):
+    return np.random.default_rng(seed).uniform(-0.5, 0.5, n).astype(np.float32)
+
+
+@pytest.mark.parametrize("src,dst", RATES)
+def test_chunked_equals_whole(src, dst):
+    x = _signal(10007)
+    whole = resample(x, src, dst)
+    r = Resampler(src, dst)
+    parts, pos = [], 0
+    for size in (1, 17, 500, 4096, 3):
+        parts.append(r.process(x[pos:pos + size]))
+        pos += size
+    while pos < len(x):
+        parts.append(r.process(x[pos:pos + 777]))
+        pos += 777
+    parts.append(r.flush())
+    assert np.allclose(np.concatenate(parts), whole, atol=1e-6)
+
+
+@pytest.mark.parametrize("src,dst", RATES)
+@pytest.mark.parametrize("n", [0, 1, 99, 4410])
+def test_output_length(src, dst, n):
+    assert len(resample(_signal(n), src, dst)) == math.ceil(n * dst / src)
+
+
+def test_flush_starts_a_new_stream():
+    x = _signal(3000)
+    r = Resampler(44100, 48000)
+    first = np.concatenate((r.process(x), r.flush()))
+    second = np.concatenate((r.process(x), r.flush()))
+    assert np.array_equal(first, second)
+
+
+@pytest.mark.parametrize("quality", sorted(QUALITY))
+def test_tone_passes_without_delay(quality):
+    sr, dst, f = 44100, 48000, 1000.0
+    t = np.arange(sr) / sr
+    y = resample(np.sin(2 * np.pi * f * t), sr, dst, quality)
+    expected = np.sin(2 * np.pi * f * np.arange(len(y)) / dst)
+    inner = slice(500, -500)
+    assert np.abs(y[inner] - expected[inner]).max() < 2e-3
+
+
+def test_content_above_the_new_nyquist_is_removed():
+    sr, dst = 48000, 16000
+    t = np.arange(sr) / sr
+    y = resample(np.sin(2 * np.pi * 12000 * t), sr, dst, "best")
+    assert np.sqrt(np.mean(y[500:-500] ** 2)) < 1e-3
+
+
+def test_banks_are_shared_and_checked():
+    assert filter_bank(44100, 48000) is filter_bank(44100, 48000)
+    assert not filter_bank(44100, 48000).flags.writeable
+    assert ratio(44100, 48000) == (160, 147)
+    with pytest.raises(ValueError):
+        filter_bank(44100, 48000, "ultra")
+    with pytest.raises(ValueError):
+        ratio(0, 48000)
@@ -0,0 +1,65 @@
+from ljudladan.history import SESSION_FIELDS, open_history
+from ljudladan.store import query
+
+
+def _add(directory, backend, *records):
+    history = open_history(backend, str(directory))
+    history.extend(records)
+    history.close()
+
+
+def test_store_is_filled_from_the_journal(tmp_path):
+    _add(tmp_path, "journal",
+         {"date": "2026-01-01T10:00", "sound": "Rain", "category": "Nature", "volume": 30},
+         {"date": "2026-01-01T10:05", "comfort": "good"})
+    store = open_history("sqlite", str(tmp_path))
+    assert store.load() == [
+        {"date": "2026-01-01T10:00", "sound": "Rain", "category": "Nature", "volume": 30},
+        {"date": "2026-01-01T10:05", "comfort": "good", "sound": "Rain", "category": "Nature"},
+    ]
+    assert store.count(comfort="good", sound="Rain") == 1
+    store.close()
+
+
+def test_sessions_recorded_on_the_journal_in_between_are_kept(tmp_path):
+    _add(tmp_path, "journal", {"date": "2026-01-01T10:00", "sound": "Rain"})
+    _add(tmp_path, "sqlite", {"date": "2026-01-02T10:00", "sound": "Wind"})
+    _add(tmp_path, "journal", {"date": "2026-01-03T10:00", "sound": "Forest"})
+    store = open_history("sqlite", str(tmp_path))
+    assert [r["sound"] for r in store.load()] == ["Rain", "Wind", "Forest"]
+    store.close()
+    store = open_history("sqlite", str(tmp_path))
+    assert store.count() == 3
+    store.close()
+
+
+def test_queries_agree_across_backends(tmp_path):
+    records = [{"date": f"2026-01-{d:02}", "sound": s, "volume": v}
+               for d, s, v in ((1, "Rain", 20), (2, "Wind", 50), (3, "Rain", 70))]
+    _add(tmp_path, "journal", *records)
+    journal, store = open_history("journal", str(tmp_path)), open_history("sqlite", str(tmp_path))
+    for filters in ({"sound": "Rain"}, {"since": "2026-01-02"}, {"min_volume": 40, "max_volume": 60}):
+        assert list(query(journal, **filters)) == list(query(store, **filters))
+    assert store.group("sound") == {"Rain": (2, 45.0), "Wind": (1, 50.0)}
+    assert set(store.fields) == set(SESSION_FIELDS)
+    store.close()
+
+
+def test_catching_up_resumes_from_the_journal_cursor(tmp_path):
+    _add(tmp_path, "journal", {"date": "2026-01-01T10:00", "sound": "Rain", "category": "Nature"})
+    _add(tmp_path, "sqlite", {"date": "2026-01-01T10:05", "sound": "Wind"})
+    # Same timestamp as the newest stored row, and a rating for the last sound.
+    _add(tmp_path, "journal", {"date": "2026-01-01T10:05", "sound": "Forest", "category": "Calm"})
+    _add(tmp_path, "journal", {"date": "2026-01-01T10:06", "comfort": "good"})
+    store = open_history("sqlite", str(tmp_path))
+    assert store.load()[2:] == [
+        {"date": "2026-01-01T10:05", "sound": "Forest", "category": "Calm"},
+        {"date": "2026-01-01T10:06", "comfort": "good", "sound": "Forest", "category": "Calm"},
+    ]
+    store.close()
+    journal = open_history("journal", str(tmp_path))
+    journal.compact()
+    journal.close()
+    store = open_history("sqlite", str(tmp_path))
+    assert store.count() == 4
+    store.close()
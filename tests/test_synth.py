@@ -0,0 +1,48 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from ljudladan import catalog  # noqa: E402
+from ljudladan.sinks import NullSink  # noqa: E402
+from ljudladan.synth import BLOCK_SIZE, SAMPLE_RATE, SOUNDS, Voice, render, render_to  # noqa: E402
+
+
+class _Collect(NullSink):
+    def __init__(self):
+        super().__init__()
+        self.blocks = []
+
+    def write(self, block):
+        self.blocks.append(np.array(block))
+
+
+def test_every_catalogue_sound_can_be_synthesized():
+    names = [s for c in catalog.categories() for s in c["sounds"]]
+    assert set(names) <= set(SOUNDS)
+
+
+@pytest.mark.parametrize("name", sorted(SOUNDS))
+def test_render_is_deterministic_and_in_range(name):
+    a = render(name, 0.5)
+    assert a.dtype == np.float32 and len(a) == SAMPLE_RATE // 2
+    assert np.array_equal(a, render(name, 0.5))
+    assert np.isfinite(a).all() and np.abs(a).max() <= 1.0
+
+
+def test_seed_changes_noise():
+    assert not np.array_equal(render("Rain", 0.5, seed=1), render("Rain", 0.5, seed=2))
+
+
+def test_block_size_does_not_change_the_signal():
+    whole = render("Ocean waves", 1.0)
+    voice = Voice("Ocean waves")
+    parts = [voice.read(n) for n in (1, 700, BLOCK_SIZE, 3000)]
+    parts.append(voice.read(len(whole) - sum(map(len, parts))))
+    assert np.array_equal(np.concatenate(parts), whole)
+    sink = render_to(_Collect(), "Ocean waves", 1.0)
+    assert np.array_equal(np.concatenate(sink.blocks), whole)
+
+
+def test_unknown_sound_is_a_key_error():
+    with pytest.raises(KeyError):
+        Voice("Doorbell (recorded)")
@@ -0,0 +1,94 @@
+from ljudladan.undo_redo import SetValue, UndoRedoManager
+
+
+def _manager(state, **kwargs):
+    return UndoRedoManager(apply=state.__setitem__, **kwargs)
+
+
+def _set(manager, key, old, new, stamp):
+    manager.record(SetValue(key, old, new, stamp=stamp))
+
+
+def _undo_all(manager):
+    steps = []
+    while manager.can_undo():
+        steps.append(manager.undo_description)
+        manager.undo()
+    return steps
+
+
+def test_edits_within_the_window_merge():
+    state = {"volume": 10}
+    undo = _manager(state, merge_window=1.0)
+    for stamp, (old, new) in enumerate(((10, 20), (20, 30)), 1):
+        _set(undo, "volume", old, new, stamp * 0.5)
+    _set(undo, "volume", 30, 40, 5.0)
+    assert undo.undo() and state["volume"] == 30
+    assert undo.undo() and state["volume"] == 10
+    assert not undo.undo()
+    assert undo.redo() and state["volume"] == 30
+
+
+def test_seal_and_other_keys_stop_merging():
+    state = {}
+    undo = _manager(state)
+    _set(undo, "volume", 10, 20, 0.0)
+    undo.seal()
+    _set(undo, "volume", 20, 30, 0.1)
+    _set(undo, "theme", "light", "dark", 0.2)
+    _set(undo, "volume", 30, 40, 0.3)
+    assert len(_undo_all(undo)) == 4
+    assert state == {"volume": 10, "theme": "light"}
+
+
+def test_history_is_trimmed_by_count_and_bytes():
+    undo = _manager({}, max_size=3)
+    for i in range(5):
+        undo.set_value(f"k{i}", 0, 1, f"step {i}")
+    assert _undo_all(undo) == ["step 4", "step 3", "step 2"]
+    undo = _manager({}, max_bytes=1000)
+    for i in range(50):
+        undo.set_value(f"k{i}", "x" * 100, "y" * 100, f"step {i}")
+    assert undo.nbytes <= 1000
+    assert undo.undo_description == "step 49"
+
+
+def test_redo_entries_count_against_the_byte_limit(tmp_path):
+    undo = _manager({}, max_bytes=100000, path=str(tmp_path / "undo.json"))
+    for i in range(20):
+        undo.set_value(f"k{i}", "x" * 100, "y" * 100, f"step {i}")
+    _undo_all(undo)
+    undo.save()
+    small = _manager({}, max_bytes=1000, path=undo.path)
+    assert small.load()
+    assert 0 < small.nbytes <= 1000
+    assert small.redo_description == "step 0"
+
+
+def test_save_and_load_round_trip(tmp_path):
+    state = {}
+    undo = _manager(state, path=str(tmp_path / "undo.json"))
+    undo.set_value("theme", "light", "dark", "Theme")
+    undo.push(lambda: None, lambda: None, "not saved")
+    undo.seal()
+    undo.set_value("volume", 30, 50, "Volume")
+    undo.undo()
+    undo.save()
+    again = _manager(state, path=undo.path)
+    assert again.load(current={"volume": 30})
+    assert again.undo_description == "Theme" and again.redo_description == "Volume"
+    assert again.redo() and state["volume"] == 50
+    assert _undo_all(again) == ["Volume", "Theme"]
+
+
+def test_load_drops_steps_that_do_not_lead_to_the_current_value(tmp_path):
+    undo = _manager({}, path=str(tmp_path / "undo.json"))
+    undo.set_value("volume", 30, 55, "Volume")
+    undo.seal()
+    undo.set_value("theme", "light", "dark", "Theme")
+    undo.save()
+    again = _manager({}, path=undo.path)
+    assert again.load(current={"volume": 30})
+    assert _undo_all(again) == ["Theme"]
+    assert again.load(current={"volume": 55})
+    assert _undo_all(again) == ["Theme", "Volume"]